@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+from xml2xls.batch import run_batch
+
+from .test_staleness import read_sheets, write_strings
+
+
+def test_batch_matches_separate_runs(tmp_path):
+    for app, lang_code in (('app-a', 'de'), ('app-b', 'fr')):
+        res = str(tmp_path / app / 'res')
+        write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye'})
+        write_strings(os.path.join(res, f'values-{lang_code}'), {'greet': f'Hello ({lang_code})'})
+    vendor = str(tmp_path / 'in' / 'app-b.xlsx')
+    os.makedirs(os.path.dirname(vendor))
+    export_to_excel(str(tmp_path / 'app-b' / 'res'), vendor)
+    wb = load_workbook(vendor)
+    wb['Untranslated']['C2'] = 'Au revoir'
+    wb.save(vendor)
+
+    # 各项目的副本按旧做法逐个处理
+    expected = str(tmp_path / 'expected')
+    for app in ('app-a', 'app-b'):
+        shutil.copytree(str(tmp_path / app), os.path.join(expected, app))
+    import_from_excel(os.path.join(expected, 'app-b', 'res'), vendor, 'partial')
+    for app in ('app-a', 'app-b'):
+        export_to_excel(os.path.join(expected, app, 'res'), os.path.join(expected, f'{app}.xlsx'))
+
+    manifest = str(tmp_path / 'jobs.json')
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump({'jobs': [
+            {'res_dir': 'app-a/res', 'workbook': 'out/app-a.xlsx'},
+            {'res_dir': 'app-b/res', 'workbook': 'in/app-b.xlsx', 'mode': 'partial'},
+            ['app-b/res', 'out/app-b.xlsx', 'export'],
+            {'res_dir': 'app-c/res', 'workbook': 'out/app-c.xlsx'},
+        ]}, f)
+    results = run_batch(manifest, workers=2)
+
+    assert [result['status'] for result in results] == ['ok', 'ok', 'ok', 'failed']
+    assert load_resources(str(tmp_path / 'app-b' / 'res')) == load_resources(os.path.join(expected, 'app-b', 'res'))
+    for app in ('app-a', 'app-b'):
+        assert read_sheets(str(tmp_path / 'out' / f'{app}.xlsx')) == read_sheets(os.path.join(expected, f'{app}.xlsx'))
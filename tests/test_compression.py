@@ -0,0 +1,45 @@
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from xml2xls import export_to_excel
+from xml2xls.xlsx_writer import save_dataframe
+
+from .test_staleness import read_sheets, write_strings
+
+COMPRESS_TYPES = {'store': zipfile.ZIP_STORED, 'fast': zipfile.ZIP_DEFLATED, 'max': zipfile.ZIP_DEFLATED}
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    entries = {f'key_{i}': f'Some fairly repetitive source text number {i}' for i in range(200)}
+    write_strings(os.path.join(res, 'values'), entries)
+    write_strings(os.path.join(res, 'values-de'),
+                  {key: f'{value} (de)' for key, value in entries.items() if '1' in key})
+    return res
+
+
+def test_levels_write_same_workbook(res_dir, tmp_path):
+    default = str(tmp_path / 'default.xlsx')
+    export_to_excel(res_dir, default)
+    sizes = {}
+    for level, compress_type in COMPRESS_TYPES.items():
+        path = str(tmp_path / f'{level}.xlsx')
+        export_to_excel(res_dir, path, compression=level)
+        assert read_sheets(path) == read_sheets(default)
+        with zipfile.ZipFile(path) as archive:
+            assert {info.compress_type for info in archive.infolist()} == {compress_type}
+        sizes[level] = os.path.getsize(path)
+    assert sizes['store'] > sizes['fast'] >= sizes['max']
+
+
+@pytest.mark.parametrize('level', ['store', 'max'])
+def test_save_dataframe_matches_to_excel(tmp_path, level):
+    df = pd.DataFrame({'key': ['greet', 'bye'], 'en': ['Hello', 'Goodbye'], 'de': ['Hallo', '']})
+    expected, saved = str(tmp_path / 'to_excel.xlsx'), str(tmp_path / 'saved.xlsx')
+    df.to_excel(expected, index=False)
+    save_dataframe(df, saved, level)
+    assert read_sheets(saved) == read_sheets(expected)
@@ -0,0 +1,46 @@
+import csv
+import os
+
+import pytest
+
+from xml2xls import export_to_excel, read_workbook_updates
+from xml2xls.csv_exchange import read_table_updates, untranslated_path
+
+from .test_staleness import read_sheets, write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {
+        'greet': 'Hello <b>%1$s</b>',
+        'lines': 'First, "second"\\nthird',
+        'multi': 'Line one\nLine\ttwo',
+        'tom': 'Tom &amp; Jerry',
+    })
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo <b>%1$s</b>', 'multi': 'Zeile eins\nZeile\tzwei'})
+    write_strings(os.path.join(res, 'values-fr'), {'tom': 'Tom &amp; Jerry', 'lines': 'Un, "deux"\\ntrois'})
+    return res
+
+
+def read_table(path):
+    dialect = 'excel-tab' if path.endswith('.tsv') else 'excel'
+    with open(path, encoding='utf-8', newline='') as f:
+        return [tuple(row) for row in csv.reader(f, dialect=dialect)]
+
+
+def sheet_as_table(rows):
+    return [tuple('' if value is None else value for value in row) for row in rows]
+
+
+@pytest.mark.parametrize('ext', ['csv', 'tsv'])
+def test_table_matches_workbook(res_dir, tmp_path, ext):
+    workbook, table = str(tmp_path / 'out.xlsx'), str(tmp_path / f'out.{ext}')
+    export_to_excel(res_dir, workbook)
+    export_to_excel(res_dir, table)
+    sheets = read_sheets(workbook)
+    assert read_table(table) == sheet_as_table(sheets['All Translations'])
+    assert read_table(untranslated_path(table)) == sheet_as_table(sheets['Untranslated'])
+
+    for mode, path in (('full', table), ('partial', untranslated_path(table))):
+        assert read_table_updates(path, mode) == read_workbook_updates(workbook, mode)
@@ -0,0 +1,93 @@
+import csv
+import json
+import os
+
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, i18n_manager, import_from_excel, load_resources
+from xml2xls.csv_exchange import export_to_table
+from xml2xls.processor import LONG_HEADERS, dedup_export_rows, dedup_rows
+
+from .test_staleness import write_strings
+
+HEADERS = ['key', 'en', 'de', 'fr']
+
+
+def test_same_source_and_translations_merge():
+    rows = [['ok', 'OK', 'OK', 'OK'], ['cancel', 'Cancel', 'Abbrechen', 'Annuler'], ['ok2', 'OK', 'OK', 'OK']]
+    assert dedup_rows(rows, HEADERS) == [['ok\nok2', 'OK', 'OK', 'OK'], ['cancel', 'Cancel', 'Abbrechen', 'Annuler']]
+
+
+def test_missing_translation_is_filled_from_unit():
+    rows = [['ok', 'OK', 'OK', ''], ['ok2', 'OK', '', 'D’accord'], ['ok3', 'OK', '', '']]
+    assert dedup_rows(rows, HEADERS) == [['ok\nok2\nok3', 'OK', 'OK', 'D’accord']]
+
+
+def test_conflicting_translations_stay_separate():
+    rows = [['save', 'Save', 'Speichern', ''], ['save2', 'Save', 'Sichern', ''], ['save3', 'Save', 'Speichern', '']]
+    assert dedup_rows(rows, HEADERS) == [['save\nsave3', 'Save', 'Speichern', ''], ['save2', 'Save', 'Sichern', '']]
+
+
+def test_stale_translation_does_not_fill():
+    rows = [['ok', 'OK', 'Gut', ''], ['ok2', 'OK', '', '']]
+    assert dedup_rows(rows, HEADERS, {'de': {'ok'}}) == rows
+    assert dedup_rows(rows, HEADERS, {'fr': {'ok'}}) == [['ok\nok2', 'OK', 'Gut', '']]
+
+
+def test_long_layout_groups_by_locale_and_source():
+    rows = [['a', 'de', 'OK', ''], ['a', 'fr', 'OK', ''], ['b', 'de', 'OK', ''], ['c', 'de', 'Yes', '']]
+    assert dedup_rows(rows, LONG_HEADERS) == [['a\nb', 'de', 'OK', ''], ['a', 'fr', 'OK', ''], ['c', 'de', 'Yes', '']]
+
+
+def test_values_are_interned():
+    rows = [['a', 'OK', ''.join(['O', 'K']), ''], ['b', 'Yes', ''.join(['O', 'K']), '']]
+    first, second = dedup_rows(rows, HEADERS)
+    assert first[2] is second[2]
+
+
+def test_unit_is_untranslated_when_any_key_is():
+    main_rows = [['ok', 'OK', 'OK', 'OK'], ['ok2', 'OK', '', 'OK'], ['bye', 'Bye', 'Tschüss', 'Salut']]
+    main_rows, untrans_rows = dedup_export_rows(HEADERS, main_rows, [main_rows[1]])
+    assert main_rows == [['ok\nok2', 'OK', 'OK', 'OK'], ['bye', 'Bye', 'Tschüss', 'Salut']]
+    assert untrans_rows == [['ok\nok2', 'OK', 'OK', 'OK']]
+
+
+def test_export_import_round_trip(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'ok': 'OK', 'ok2': 'OK', 'save': 'Save', 'save2': 'Save'})
+    write_strings(os.path.join(res, 'values-de'), {'ok': 'Gut', 'save': 'Speichern', 'save2': 'Sichern'})
+    output = str(tmp_path / 'out.xlsx')
+    export_to_excel(res, output, dedup=True)
+    rows = list(load_workbook(output)['All Translations'].iter_rows(min_row=2, values_only=True))
+    assert rows == [('ok\nok2', 'OK', 'Gut'), ('save', 'Save', 'Speichern'), ('save2', 'Save', 'Sichern')]
+
+    import_from_excel(res, output, 'partial')
+    assert load_resources(res)[2]['de'] == {'ok': 'Gut', 'ok2': 'Gut', 'save': 'Speichern', 'save2': 'Sichern'}
+
+
+def test_kept_rows_are_not_merged():
+    rows = [['ok', 'OK', 'OK', ''], ['@ok', '{}', '', ''], ['ok2', 'OK', '', ''], ['@ok2', '{}', '', '']]
+    assert dedup_rows(rows, HEADERS, keep=lambda key: key.startswith('@')) == [
+        ['ok\nok2', 'OK', 'OK', ''], ['@ok', '{}', '', ''], ['@ok2', '{}', '', '']]
+
+
+def test_arb_metadata_is_not_merged(tmp_path):
+    l10n = tmp_path / 'l10n'
+    l10n.mkdir()
+    meta = {'description': 'Button'}
+    (l10n / 'app_en.arb').write_text(json.dumps({'ok': 'OK', '@ok': meta, 'ok2': 'OK', '@ok2': meta}), 'utf-8')
+    (l10n / 'app_de.arb').write_text(json.dumps({'ok': 'OK'}), 'utf-8')
+    output = str(tmp_path / 'out.xlsx')
+    i18n_manager.export_translations(str(l10n), output, dedup=True)
+    keys = [row[0] for row in load_workbook(output).worksheets[0].iter_rows(min_row=2, values_only=True)]
+    assert keys == ['ok\nok2', '@ok', '@ok2']
+
+
+def test_csv_untranslated_units(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'ok': 'OK', 'ok2': 'OK', 'bye': 'Bye', 'yes': 'Yes'})
+    write_strings(os.path.join(res, 'values-de'), {'ok': 'OK', 'bye': 'Tschüss'})
+    output = str(tmp_path / 'out.csv')
+    _, untrans_file = export_to_table(res, output, dedup=True)
+    with open(untrans_file, encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [['key', 'en', 'de'], ['ok\nok2', 'OK', 'OK'], ['yes', 'Yes', '']]
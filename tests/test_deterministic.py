@@ -0,0 +1,34 @@
+import os
+
+from xml2xls import export_to_excel, load_resources
+
+from .test_staleness import write_strings
+
+LOCALES = {
+    'values': {'greet': 'Hello', 'bye': 'Goodbye'},
+    'values-de': {'greet': 'Hallo', 'bye': 'Tschüss'},
+    'values-zh-rCN': {'greet': '你好'},
+    'values-b+sr+Latn': {'greet': 'Zdravo'},
+    'values-fr': {'bye': 'Au revoir'},
+}
+
+
+def build(res, order):
+    for name in order:
+        write_strings(os.path.join(res, name), LOCALES[name])
+
+
+def test_same_tree_gives_same_bytes(tmp_path, monkeypatch):
+    first, second = str(tmp_path / 'a' / 'res'), str(tmp_path / 'b' / 'res')
+    build(first, list(LOCALES))
+    build(second, list(reversed(LOCALES)))
+    export_to_excel(first, str(tmp_path / 'a.xlsx'), deterministic=True)
+
+    # 文件系统返回目录的顺序与创建顺序都不应影响结果
+    listdir = os.listdir
+    monkeypatch.setattr(os, 'listdir', lambda path: list(reversed(listdir(path))))
+    export_to_excel(second, str(tmp_path / 'b.xlsx'), deterministic=True)
+
+    assert load_resources(second)[1] == ['b+sr+Latn', 'de', 'fr', 'zh-rCN']
+    with open(tmp_path / 'a.xlsx', 'rb') as a, open(tmp_path / 'b.xlsx', 'rb') as b:
+        assert a.read() == b.read()
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+from xml2xls.differ import diff_workbook_against_resources, diff_workbooks
+
+from .test_staleness import write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'tom': 'Tom &amp; Jerry', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'bye': 'Tschüss'})
+    write_strings(os.path.join(res, 'values-fr'), {'greet': 'Bonjour'})
+    return res
+
+
+@pytest.fixture
+def exported(res_dir, tmp_path):
+    path = str(tmp_path / 'export.xlsx')
+    export_to_excel(res_dir, path)
+    return path
+
+
+@pytest.fixture
+def vendor(exported, tmp_path):
+    """供应商改了 de 的 greet，补上 de 的 tom 和 fr 的 bye"""
+    wb = load_workbook(exported)
+    sheet = wb['All Translations']
+    assert [cell.value for cell in sheet[1]] == ['key', 'en', 'de', 'fr']
+    sheet['C2'] = 'Servus'
+    sheet['C3'] = 'Tom & Jerry'
+    sheet['D4'] = 'Au revoir'
+    path = str(tmp_path / 'vendor.xlsx')
+    wb.save(path)
+    return path
+
+
+def import_changes(res_dir, workbook, tmp_path):
+    """旧做法：导入到副本，再比较导入前后的资源"""
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res_dir, copy)
+    before = load_resources(copy)[2]
+    import_from_excel(copy, workbook)
+    changes = {}
+    for lang_code, data in load_resources(copy)[2].items():
+        for key, value in data.items():
+            old = before.get(lang_code, {}).get(key)
+            if old != value:
+                changes.setdefault(lang_code, {})[key] = (old, value)
+    return changes
+
+
+def flatten(changes):
+    result = {}
+    for lang_code, bucket in changes.items():
+        for key, value in bucket['added'].items():
+            result.setdefault(lang_code, {})[key] = (None, value)
+        for kind in ('modified', 'conflicting'):
+            for key, item in bucket[kind].items():
+                result.setdefault(lang_code, {})[key] = (item['old'], item['new'])
+        assert not bucket['removed']
+    return result
+
+
+def test_unchanged_export_has_no_changes(res_dir, exported):
+    assert diff_workbook_against_resources(res_dir, exported) == {}
+
+
+def test_diff_matches_import(res_dir, exported, vendor, tmp_path):
+    changes = diff_workbook_against_resources(res_dir, vendor)
+    assert flatten(changes) == import_changes(res_dir, vendor, tmp_path) == {
+        'de': {'greet': ('Hallo', 'Servus'), 'tom': (None, 'Tom &amp; Jerry')},
+        'fr': {'bye': (None, 'Au revoir')},
+    }
+    assert diff_workbooks(exported, vendor) == changes
@@ -0,0 +1,74 @@
+import pytest
+
+from xml2xls.escaping import _sample_texts, escape_values, escape_xml_chars, unescape_xml_chars
+
+# (strings.xml 中的原文, 导出到单元格的文本)
+ROUND_TRIP = [
+    ('My App', 'My App'),
+    ('@string/app_name', '@string/app_name'),
+    ('@android:string/ok', '@android:string/ok'),
+    ('@null', '@null'),
+    ('?attr/colorPrimary', '?attr/colorPrimary'),
+    ('?android:attr/textColor', '?android:attr/textColor'),
+    ('\\@home', '@home'),
+    ('\\?', '?'),
+    ('\\@string/app_name', '\\@string/app_name'),
+    ('"Hello" world "foo"', '"Hello" world "foo"'),
+    ('"It\'s fine"', '"It\'s fine"'),
+    ('"It\\\'s fine"', '"It\\\'s fine"'),
+    ("It\\'s", "It's"),
+    ('He said \\"hi\\"', 'He said \\"hi\\"'),
+    ('Line\\nTwo\\tTab', 'Line\\nTwo\\tTab'),
+    ('a &amp; b &lt;3', 'a & b <3'),
+    ('&amp;lt; &#39; &#x1F600; &nbsp;', '&amp;lt; &#39; &#x1F600; &nbsp;'),
+    ('&lt;b&gt;', '&lt;b&gt;'),
+    ('<![CDATA[<i>&</i>]]>', '<![CDATA[<i>&</i>]]>'),
+    ('<!-- note --> x', '<!-- note --> x'),
+    ('Say <b>hi</b> <xliff:g id="n" example=\'5\'>%1$s</xliff:g>',
+     'Say <b>hi</b> <xliff:g id="n" example=\'5\'>%1$s</xliff:g>'),
+    ('100\\\\', '100\\\\'),
+]
+
+
+@pytest.mark.parametrize('raw, cell', ROUND_TRIP)
+def test_unescape_for_export(raw, cell):
+    assert unescape_xml_chars(raw) == cell
+
+
+@pytest.mark.parametrize('raw, cell', ROUND_TRIP)
+def test_export_then_import_keeps_raw(raw, cell):
+    assert escape_xml_chars(unescape_xml_chars(raw)) == raw
+
+
+@pytest.mark.parametrize('raw, cell', ROUND_TRIP)
+def test_valid_content_is_not_escaped(raw, cell):
+    # 直接写入原文的旧工作簿导入后同样不变
+    assert escape_xml_chars(raw) == raw
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("It's", "It\\'s"),
+    ('Tom & Jerry', 'Tom &amp; Jerry'),
+    ('a < b', 'a &lt; b'),
+    ('@home', '\\@home'),
+    ('? what', '\\? what'),
+    ("\\\\'", "\\\\\\'"),
+    ('"quoted \'span\'" and it\'s', '"quoted \'span\'" and it\\\'s'),
+    # 裸引号是 Android 语法（显示为 Say hi），字面量引号写成 \"
+    ('Say "hi"', 'Say "hi"'),
+    ('Say \\"hi\\"', 'Say \\"hi\\"'),
+])
+def test_escape_cell_text(text, expected):
+    assert escape_xml_chars(text) == expected
+
+
+def test_escape_values_matches_single_escape():
+    texts = _sample_texts(2000, seed=3)
+    assert escape_values(texts) == [escape_xml_chars(text) for text in texts]
+
+
+def test_random_round_trip():
+    for text in _sample_texts(5000, seed=7):
+        raw = escape_xml_chars(text)
+        assert escape_xml_chars(raw) == raw, text
+        assert escape_xml_chars(unescape_xml_chars(raw)) == raw, text
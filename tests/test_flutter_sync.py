@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from xml2xls.escaping import escape_xml_chars, unescape_xml_chars
+from xml2xls.flutter_sync import (android_placeholders, android_to_flutter, android_to_flutter_locale,
+                                  android_to_flutter_text, escape_android, flutter_to_android_locale,
+                                  unescape_android)
+
+
+@pytest.mark.parametrize('value', ['50% off', '100 % sure', 'Save 20%', '50%now', '100%% sure', '50%OFF',
+                                   'Up to 30%discount'])
+def test_literal_percent_is_not_a_placeholder(value):
+    assert android_to_flutter_text(value) == (value, [])
+    assert android_placeholders(value) == {}
+
+
+@pytest.mark.parametrize('value, text, placeholders', [
+    ('Hi %1$s, 50%% off', 'Hi {arg1}, 50% off', [('arg1', 's')]),
+    ('%d items', '{arg1} items', [('arg1', 'd')]),
+    ('%.2f%%', '{arg1}%', [('arg1', 'f')]),
+    ('%2$s and %1$s', '{arg2} and {arg1}', [('arg2', 's'), ('arg1', 's')]),
+])
+def test_format_specifiers(value, text, placeholders):
+    assert android_to_flutter_text(value) == (text, placeholders)
+
+
+def test_literal_percent_adds_no_arb_metadata(tmp_path):
+    values_dir = tmp_path / 'res' / 'values'
+    values_dir.mkdir(parents=True)
+    (values_dir / 'strings.xml').write_text(
+        '<?xml version="1.0" encoding="utf-8"?>\n<resources>\n'
+        '    <string name="sale">50% off</string>\n'
+        '    <string name="sure">100 % sure</string>\n'
+        '    <string name="greet">Hi %1$s</string>\n'
+        '</resources>\n', encoding='utf-8')
+    l10n_dir = tmp_path / 'l10n'
+    l10n_dir.mkdir()
+    android_to_flutter(str(tmp_path / 'res'), str(l10n_dir))
+    with open(os.path.join(l10n_dir, 'app_en.arb'), encoding='utf-8') as f:
+        arb = json.load(f)
+    assert arb['sale'] == '50% off'
+    assert arb['sure'] == '100 % sure'
+    assert '@sale' not in arb and '@sure' not in arb
+    assert arb['@greet'] == {'placeholders': {'arg1': {'type': 'String'}}}
+
+
+@pytest.mark.parametrize('flutter, android', [
+    ('de', 'de'),
+    ('zh_CN', 'zh-rCN'),
+    ('es_419', 'b+es+419'),
+    ('sr_Latn', 'b+sr+Latn'),
+])
+def test_locale_round_trip(flutter, android):
+    assert flutter_to_android_locale(flutter) == android
+    assert android_to_flutter_locale(android) == flutter
+
+
+@pytest.mark.parametrize('flutter, android', [
+    ('sr_latn', 'b+sr+Latn'),
+    ('ZH-cn', 'zh-rCN'),
+    ('zh_hant_tw', 'b+zh+Hant+TW'),
+])
+def test_locale_is_normalized(flutter, android):
+    assert flutter_to_android_locale(flutter) == android
+
+
+@pytest.mark.parametrize('text, android', [
+    ('Say "hi"', 'Say \\"hi\\"'),
+    ("It's", "It\\'s"),
+    ('Tom & Jerry', 'Tom &amp; Jerry'),
+    ('@home', '\\@home'),
+])
+def test_escape_android_agrees_with_cell_escaping(text, android):
+    # flutter_sync 写出的内容经工作簿导出再导入不变
+    assert escape_android(text) == android
+    assert unescape_android(android) == text
+    assert escape_xml_chars(android) == android
+    assert escape_xml_chars(unescape_xml_chars(android)) == android
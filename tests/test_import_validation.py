@@ -0,0 +1,107 @@
+import asyncio
+import os
+
+import pytest
+from openpyxl import Workbook
+
+from xml2xls import Project, load_resources
+from xml2xls.batch import run_job
+from xml2xls.server import HttpError, TranslationService
+from xml2xls.translation_store import TranslationStore
+from xml2xls.validation import build_signatures, validate_locale
+
+from .test_staleness import write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hi %1$s', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'bye': 'Tschüss'})
+    return res
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """de 的 greet 丢了占位符"""
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'All Translations'
+    sheet.append(['key', 'en', 'de'])
+    sheet.append(['greet', 'Hi %1$s', 'Hallo'])
+    sheet.append(['bye', 'Goodbye', 'Auf Wiedersehen'])
+    path = str(tmp_path / 'in.xlsx')
+    wb.save(path)
+    return path
+
+
+def de_strings(res_dir):
+    return load_resources(res_dir)[2]['de']
+
+
+def test_project_import_strict(res_dir, workbook):
+    with pytest.raises(ValueError):
+        Project(res_dir).import_workbook(workbook, strict=True)
+    assert de_strings(res_dir) == {'bye': 'Tschüss'}
+
+
+def test_project_import_reports(res_dir, workbook, tmp_path):
+    report = str(tmp_path / 'report.json')
+    Project(res_dir).import_workbook(workbook, validate_report=report)
+    assert os.path.exists(report)
+    assert de_strings(res_dir)['greet'] == 'Hallo'
+
+
+def test_batch_import_strict(res_dir, workbook):
+    with pytest.raises(ValueError):
+        run_job(res_dir, workbook, 'full', strict=True)
+    assert de_strings(res_dir) == {'bye': 'Tschüss'}
+
+
+def test_server_import_strict(res_dir, workbook):
+    with open(workbook, 'rb') as f:
+        body = f.read()
+
+    async def run(strict):
+        return await TranslationService(res_dir).import_(body, 'full', strict)
+
+    with pytest.raises(HttpError) as e:
+        asyncio.run(run(True))
+    assert e.value.status == 400
+    assert de_strings(res_dir) == {'bye': 'Tschüss'}
+
+    result = asyncio.run(run(False))
+    assert [(issue['locale'], issue['key']) for issue in result['issues']] == [('de', 'greet')]
+
+
+def test_store_write_back_strict(res_dir, workbook, tmp_path):
+    with TranslationStore(str(tmp_path / 'store.db')) as store:
+        store.sync(res_dir, 'android')
+        with pytest.raises(ValueError):
+            store.import_workbook(workbook, write_back=True, strict=True)
+        assert dict(store.conn.execute("SELECT key, value FROM strings WHERE locale = 'de'")) == {'bye': 'Tschüss'}
+    assert de_strings(res_dir) == {'bye': 'Tschüss'}
+
+
+@pytest.mark.parametrize('source, translation', [
+    ('Up to 30%discount', 'Bis zu 30 % Rabatt'),
+    ('50%OFF', '50 % RABATT'),
+    ('50% off', '50 % Rabatt'),
+    ('100%% sure', '100 %% sicher'),
+    ('Save %1$d%%', '%1$d %% sparen'),
+    ('Retry in %ds', 'Erneut in %d s'),
+    ('On %1$tY-%1$tm', 'Am %1$tm.%1$tY'),
+])
+def test_literal_percent_is_not_a_placeholder(source, translation):
+    signatures = build_signatures({'k': source})
+    assert validate_locale('de', {'k': translation}, signatures) == []
+
+
+@pytest.mark.parametrize('source, translation, missing', [
+    ('%d items', 'Elemente', ['%d']),
+    ('Hi %1$s', 'Hallo', ['%1$s']),
+    ('On %1$tY', 'Am', ['%1$tY']),
+])
+def test_missing_placeholder(source, translation, missing):
+    signatures = build_signatures({'k': source})
+    assert [issue['missing'] for issue in validate_locale('de', {'k': translation}, signatures)] == [missing]
@@ -0,0 +1,49 @@
+import pytest
+
+from xml2xls import parse_strings_xml, write_strings_xml
+from xml2xls.processor import LazyStrings, parse_strings_content
+
+CONTENT = '''<?xml version="1.0" encoding="utf-8"?>\r
+<resources xmlns:xliff="urn:oasis:names:tc:xliff:document:1.2">\r
+    <!-- <string name="commented">Not a string</string> -->\r
+    <string name="greet">Grüß dich, <xliff:g id="name">%1$s</xliff:g></string>\r
+    <string name="cdata"><![CDATA[<b>不要</b> & more]]></string>\r
+    <string name="multi">第一行\r
+        第二行 😀</string>\r
+\t<string name="empty"></string>\r
+    <string name="keep" translatable="false">Skip</string>\r
+</resources>\r
+'''
+
+
+@pytest.fixture
+def xml_path(tmp_path):
+    path = tmp_path / 'strings.xml'
+    path.write_bytes(CONTENT.encode('utf-8'))
+    return str(path)
+
+
+def test_bytes_scan_matches_text_parse(xml_path):
+    order, strings = parse_strings_xml(xml_path)
+    assert isinstance(strings, LazyStrings)
+    assert (order, dict(strings)) == parse_strings_content(CONTENT)
+    assert order == ['greet', 'cdata', 'multi', 'empty']
+
+
+def test_values_are_decoded_lazily(xml_path):
+    _, strings = parse_strings_xml(xml_path)
+    assert strings._decoded == {}
+    assert strings['multi'] == '第一行\r\n        第二行 😀'
+    assert list(strings._decoded) == ['multi']
+
+
+def test_writer_keeps_untouched_bytes(xml_path):
+    _, strings = parse_strings_xml(xml_path)
+    write_strings_xml(xml_path, dict(strings))
+    with open(xml_path, 'rb') as f:
+        assert f.read() == CONTENT.encode('utf-8')
+
+    write_strings_xml(xml_path, {'cdata': 'Neu &amp; <b>fett</b>'})
+    expected = CONTENT.replace('<![CDATA[<b>不要</b> & more]]>', 'Neu &amp; <b>fett</b>')
+    with open(xml_path, 'rb') as f:
+        assert f.read() == expected.encode('utf-8')
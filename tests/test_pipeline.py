@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+
+import pytest
+
+from xml2xls import export_to_excel, load_resources, pipeline
+from xml2xls.pipeline import read_and_parse
+
+from .test_staleness import read_sheets, write_strings
+
+LOCALES = ['de', 'es', 'fr', 'it', 'ja', 'ko', 'nl', 'pt', 'ru', 'sv']
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye'})
+    for lang_code in LOCALES:
+        write_strings(os.path.join(res, f'values-{lang_code}'), {'greet': f'Hello ({lang_code})'})
+    return res
+
+
+def test_read_error_stops_readers(res_dir):
+    # 无法解码的文件让一个读取线程出错；队列只有一个位置，其余线程会卡在 put() 上
+    with open(os.path.join(res_dir, 'values-de', 'strings.xml'), 'wb') as f:
+        f.write(b'\xff\xfe\xff')
+    before = threading.active_count()
+    start = time.perf_counter()
+    with pytest.raises(UnicodeDecodeError):
+        read_and_parse(res_dir, read_workers=4, queue_size=1)
+    assert time.perf_counter() - start < 5
+    assert threading.active_count() == before
+
+
+def test_parse_error_stops_readers(res_dir, monkeypatch):
+    parse = pipeline._parse_contents
+
+    def failing(contents):
+        if 'Hello (de)' in contents[0]:
+            raise ValueError('bad strings.xml')
+        return parse(contents)
+
+    monkeypatch.setattr(pipeline, '_parse_contents', failing)
+    before = threading.active_count()
+    with pytest.raises(ValueError):
+        read_and_parse(res_dir, read_workers=4, queue_size=1)
+    assert threading.active_count() == before
+
+
+def test_read_and_parse_matches_load_resources(res_dir):
+    assert read_and_parse(res_dir, read_workers=3, queue_size=2) == load_resources(res_dir)
+
+
+def test_pipelined_export_matches_export(res_dir, tmp_path):
+    plain, pipelined = str(tmp_path / 'plain.xlsx'), str(tmp_path / 'pipelined.xlsx')
+    export_to_excel(res_dir, plain)
+    export_to_excel(res_dir, pipelined, pipeline=True)
+    assert read_sheets(pipelined) == read_sheets(plain)
+
+    # 批次小于行数时行仍按原顺序写出
+    batched = str(tmp_path / 'batched.xlsx')
+    pipeline.export_pipelined(res_dir, batched, read_workers=2, queue_size=1, batch_size=1)
+    assert read_sheets(batched) == read_sheets(plain)
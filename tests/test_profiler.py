@@ -0,0 +1,47 @@
+import argparse
+import os
+
+import pytest
+
+from xml2xls import PhaseProfiler, export_to_excel
+from xml2xls.profiler import add_profile_arguments, profiler_from_args, report
+
+from .test_staleness import read_sheets, write_strings
+
+
+def run_profiled(argv):
+    parser = argparse.ArgumentParser()
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    with profiler_from_args(args) as profiler:
+        with profiler.phase('work') as p:
+            p.items = 1
+    report(profiler, args)
+
+
+@pytest.mark.parametrize('argv, written', [
+    (['--cprofile', 'out.prof'], ['out.prof']),
+    (['--profile'], ['profile.json']),
+    (['--profile', 'phases.json', '--cprofile', 'out.prof'], ['out.prof', 'phases.json']),
+])
+def test_json_only_with_profile(tmp_path, monkeypatch, argv, written):
+    monkeypatch.chdir(tmp_path)
+    run_profiled(argv)
+    assert sorted(os.listdir(tmp_path)) == written
+
+
+def test_profiled_export_matches_plain_export(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo'})
+    write_strings(os.path.join(res, 'values-fr'), {'greet': 'Bonjour', 'bye': 'Au revoir'})
+    plain, profiled = str(tmp_path / 'plain.xlsx'), str(tmp_path / 'profiled.xlsx')
+    export_to_excel(res, plain)
+    with PhaseProfiler() as profiler:
+        export_to_excel(res, profiled, profiler)
+
+    assert read_sheets(profiled) == read_sheets(plain)
+    phases = {(record.name, record.locale): record.items for record in profiler.records}
+    assert phases[('parse', 'de')] == 1
+    assert phases[('parse', 'fr')] == 2
+    assert {'scan', 'build_matrix', 'save'} <= {name for name, _ in phases}
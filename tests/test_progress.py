@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import shutil
+
+from xml2xls import JSONLinesEmitter, ProgressReporter, export_to_excel, import_from_excel, load_resources
+
+from .test_staleness import read_sheets, write_strings
+
+
+def build(res):
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye', 'ok': 'OK'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo'})
+    write_strings(os.path.join(res, 'values-fr'), {'greet': 'Bonjour', 'bye': 'Au revoir'})
+
+
+def totals(events):
+    """每个任务结束时的 (完成量, 单位)"""
+    return {event['task']: (event['done'], event['unit']) for event in events if event['event'] == 'end'}
+
+
+def test_reported_export_matches_plain_export(tmp_path):
+    res = str(tmp_path / 'res')
+    build(res)
+    plain, reported = str(tmp_path / 'plain.xlsx'), str(tmp_path / 'reported.xlsx')
+    export_to_excel(res, plain)
+    events = []
+    export_to_excel(res, reported, progress=ProgressReporter(events.append))
+
+    assert read_sheets(reported) == read_sheets(plain)
+    done = totals(events)
+    assert done['discover'] == (3, 'files')
+    assert done['parse'] == (3, 'locales')
+    assert done['write'][1] == 'rows'
+    assert done['save'] == (os.path.getsize(reported), 'bytes')
+
+
+def test_reported_import_matches_plain_import(tmp_path):
+    res = str(tmp_path / 'res')
+    build(res)
+    workbook = str(tmp_path / 'out.xlsx')
+    export_to_excel(res, workbook)
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res, copy)
+    write_strings(os.path.join(res, 'values-de'), {})
+    write_strings(os.path.join(copy, 'values-de'), {})
+
+    stream = io.StringIO()
+    import_from_excel(res, workbook, progress=ProgressReporter(JSONLinesEmitter(stream=stream)))
+    import_from_excel(copy, workbook)
+    assert load_resources(res) == load_resources(copy)
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert totals(events)['merge'] == (3, 'files')
@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import Project, export_to_excel, import_from_excel, load_resources
+from xml2xls.processor import compute_coverage
+
+from .test_staleness import read_sheets, write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'ok': 'OK', 'ok2': 'OK', 'its': "It\\'s"})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'ok': 'OK'})
+    write_strings(os.path.join(res, 'values-zh-rCN'), {'its': '它是'})
+    return res
+
+
+def test_project_reads_same_resources(res_dir):
+    project = Project(res_dir)
+    snapshot = load_resources(res_dir)
+    assert project.snapshot() == snapshot
+    assert project.locales == ['en', 'de', 'zh-rCN']
+    assert project.keys == snapshot[0]
+    assert project.coverage() == compute_coverage(*snapshot)
+
+
+@pytest.mark.parametrize('options', [{}, {'layout': 'long'}, {'layout': 'locales', 'dedup': True}])
+def test_project_export_matches_export(res_dir, tmp_path, options):
+    exported, projected = str(tmp_path / 'export.xlsx'), str(tmp_path / 'project.xlsx')
+    export_to_excel(res_dir, exported, **options)
+    Project(res_dir).export_workbook(projected, **options)
+    assert read_sheets(projected) == read_sheets(exported)
+
+
+def test_project_import_matches_import(res_dir, tmp_path):
+    workbook = str(tmp_path / 'in.xlsx')
+    export_to_excel(res_dir, workbook)
+    wb = load_workbook(workbook)
+    wb['All Translations']['C2'] = 'Servus'
+    wb['All Translations']['D3'] = '好的'
+    wb.save(workbook)
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res_dir, copy)
+
+    project = Project(res_dir, auto_refresh=False)
+    project.snapshot()
+    project.import_workbook(workbook)
+    import_from_excel(copy, workbook)
+    assert load_resources(res_dir) == load_resources(copy)
+    # 导入后缓存已失效，不需要 auto_refresh 也能读到新内容
+    assert project.snapshot() == load_resources(copy)
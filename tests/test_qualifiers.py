@@ -0,0 +1,37 @@
+import pytest
+
+from xml2xls.qualifiers import locale_qualifier, normalize_locale, parse_locale
+
+
+@pytest.mark.parametrize('qualifier, expected', [
+    ('de', 'de'),
+    ('zh-rcn', 'zh-rCN'),
+    ('b+de+DE', 'de-rDE'),
+    ('b+es+419', 'b+es+419'),
+    ('es-r419', 'b+es+419'),
+    ('b+sr+Latn', 'b+sr+Latn'),
+    ('b+sr+latn+rs', 'b+sr+Latn+RS'),
+    ('b+zh+Hant+TW', 'b+zh+Hant+TW'),
+    ('b+ca+ES+valencia', 'b+ca+ES+valencia'),
+    ('night', 'night'),
+])
+def test_normalize_locale(qualifier, expected):
+    assert normalize_locale(qualifier) == expected
+
+
+@pytest.mark.parametrize('qualifier', ['b+es+419', 'b+sr+Latn', 'b+zh+Hant+TW', 'de-rDE', 'pt'])
+def test_normalized_form_is_stable(qualifier):
+    assert normalize_locale(qualifier) == qualifier
+    assert parse_locale(normalize_locale(qualifier)) == parse_locale(qualifier)
+
+
+@pytest.mark.parametrize('dir_name, expected', [
+    ('values', ''),
+    ('values-b+es+419', 'b+es+419'),
+    ('values-es-r419', 'b+es+419'),
+    ('values-b+de+DE', 'de-rDE'),
+    ('values-de-night', None),
+    ('values-v21', None),
+])
+def test_locale_qualifier(dir_name, expected):
+    assert locale_qualifier(dir_name) == expected
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+from xml2xls.renames import DEFAULT_THRESHOLD, _dice, _ngrams, apply_renames, detect_renames
+
+from .test_staleness import write_strings
+
+BASE = {
+    'welcome': 'Welcome back to the app',
+    'title': 'Settings',
+    'logout': 'Log out of your account now',
+    'delete': 'Delete all data',
+    'bye': 'Goodbye',
+}
+CURRENT = {
+    'welcome_back': 'Welcome back to the app',
+    'settings_title': 'Settings',
+    'logout_button': 'Log out of your account now!',
+    'erase': 'Erase everything',
+    'bye': 'Goodbye',
+}
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    base = str(tmp_path / 'base')
+    write_strings(os.path.join(base, 'values'), BASE)
+    write_strings(os.path.join(base, 'values-de'), {key: f'{value} (de)' for key, value in BASE.items()})
+    write_strings(os.path.join(base, 'values-fr'), {'welcome': 'Bon retour', 'logout': 'Se déconnecter'})
+    return base
+
+
+@pytest.fixture
+def res_dir(base_dir, tmp_path):
+    res = str(tmp_path / 'res')
+    shutil.copytree(base_dir, res)
+    write_strings(os.path.join(res, 'values'), CURRENT)
+    return res
+
+
+def all_pairs(base, current, threshold=DEFAULT_THRESHOLD):
+    """两两比较全部移除与新增的 key（索引应给出相同的结果）"""
+    removed = {key: value for key, value in base.items() if key not in current}
+    added = {key: value for key, value in current.items() if key not in base}
+    matches = {}
+    for new, source in added.items():
+        for old, old_source in removed.items():
+            if source == old_source:
+                matches[new] = (old, 'exact')
+    scored = sorted(((_dice(_ngrams(source), _ngrams(old_source)), new, old)
+                     for new, source in added.items() if new not in matches
+                     for old, old_source in removed.items()), reverse=True)
+    used = {old for old, _ in matches.values()}
+    for score, new, old in scored:
+        if score >= threshold and new not in matches and old not in used:
+            used.add(old)
+            matches[new] = (old, 'near')
+    return matches
+
+
+def test_index_matches_all_pairs(res_dir, base_dir, tmp_path):
+    renames = detect_renames(load_resources(res_dir), base_dir)
+    assert {item['new']: (item['old'], item['kind']) for item in renames} == all_pairs(BASE, CURRENT) == {
+        'welcome_back': ('welcome', 'exact'),
+        'settings_title': ('title', 'exact'),
+        'logout_button': ('logout', 'near'),
+    }
+    # 以上次导出的工作簿为基准时结果相同
+    workbook = str(tmp_path / 'base.xlsx')
+    export_to_excel(base_dir, workbook)
+    assert detect_renames(load_resources(res_dir), workbook) == renames
+
+
+def test_carry_over_matches_manual_translation(res_dir, base_dir, tmp_path):
+    renames = detect_renames(load_resources(res_dir), base_dir)
+    manual = str(tmp_path / 'manual')
+    shutil.copytree(res_dir, manual)
+    apply_renames(res_dir, renames, kinds=('exact', 'near'))
+
+    # 旧做法：导出后由译者把旧 key 的译文填到新 key 上再导入
+    workbook = str(tmp_path / 'manual.xlsx')
+    export_to_excel(manual, workbook)
+    wb = load_workbook(workbook)
+    sheet = wb['All Translations']
+    headers = [cell.value for cell in sheet[1]]
+    base = load_resources(base_dir)[2]
+    old_keys = {item['new']: item['old'] for item in renames}
+    for row in sheet.iter_rows(min_row=2):
+        old = old_keys.get(row[0].value)
+        for lang_code, cell in zip(headers[2:], row[2:]):
+            if old and not cell.value and old in base[lang_code]:
+                cell.value = base[lang_code][old]
+    wb.save(workbook)
+    import_from_excel(manual, workbook)
+
+    assert load_resources(res_dir)[2] == load_resources(manual)[2]
+    assert load_resources(res_dir)[2]['fr']['logout_button'] == 'Se déconnecter'
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import os
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from xml2xls import processor, server
+from xml2xls.server import TranslationService
+
+from .test_staleness import write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'bye': 'Tschüss'})
+    return res
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """记录 _render_workbook 的调用次数"""
+    calls = []
+    render = server._render_workbook
+
+    def counted(*args):
+        calls.append(args)
+        return render(*args)
+
+    monkeypatch.setattr(server, '_render_workbook', counted)
+    return calls
+
+
+def rows(content):
+    sheet = load_workbook(io.BytesIO(content))['All Translations']
+    return list(sheet.iter_rows(min_row=2, values_only=True))
+
+
+def workbook_bytes(rows):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'All Translations'
+    sheet.append(['key', 'en', 'de'])
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_concurrent_exports_share_one_render(res_dir, renders):
+    async def run():
+        service = TranslationService(res_dir)
+        return await asyncio.gather(service.export(), service.export(), service.export())
+
+    first, second, third = asyncio.run(run())
+    assert first == second == third
+    assert len(renders) == 1
+
+
+def test_unchanged_resources_hit_export_cache(res_dir, renders):
+    async def run():
+        service = TranslationService(res_dir)
+        first = await service.export()
+        second = await service.export()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(renders) == 1
+
+
+def test_export_after_import_is_fresh(res_dir, renders, monkeypatch):
+    # 模拟导入在同一时间戳内改写了文件且大小不变：stat 看不出任何变化
+    monkeypatch.setattr(processor.ResourceCache, '_stamp', staticmethod(lambda path: (0, 0)))
+    body = workbook_bytes([('greet', 'Hello', 'Servus'), ('bye', 'Goodbye', 'Tschüss')])
+
+    async def run():
+        service = TranslationService(res_dir)
+        before = await service.export()
+        coverage = await service.coverage()
+        await service.import_(body, 'full')
+        return before, coverage, await service.export()
+
+    before, coverage, after = asyncio.run(run())
+    assert coverage['de']['missing'] == 0
+    assert rows(before) == [('greet', 'Hello', 'Hallo'), ('bye', 'Goodbye', 'Tschüss')]
+    assert rows(after) == [('greet', 'Hello', 'Servus'), ('bye', 'Goodbye', 'Tschüss')]
+    assert len(renders) == 2
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+from xml2xls import export_to_excel, import_from_excel, load_resources, read_workbook_updates
+from xml2xls.sharding import list_shard_files, manifest_path
+
+from .test_staleness import read_sheets, write_strings
+
+KEYS = [f'key_{i:02d}' for i in range(10)]
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {key: f'Text {i}' for i, key in enumerate(KEYS)})
+    write_strings(os.path.join(res, 'values-de'), {key: f'Text {i} (de)' for i, key in enumerate(KEYS) if i % 2})
+    write_strings(os.path.join(res, 'values-fr'), {key: f'Texte {i}' for i, key in enumerate(KEYS) if i % 3})
+    write_strings(os.path.join(res, 'values-ja'), {key: f'テキスト {i}' for i, key in enumerate(KEYS[:4])})
+    return res
+
+
+def cells(sheets, title):
+    """工作表中的全部单元格 {(key, 语言): 值}"""
+    result = {}
+    for sheet in sheets:
+        headers, *rows = sheet[title]
+        for row in rows:
+            result.update(((row[0], lang_code), value) for lang_code, value in zip(headers[1:], row[1:]))
+    return result
+
+
+def missing(sheets):
+    return {cell for cell, value in cells(sheets, 'Untranslated').items() if value is None}
+
+
+@pytest.mark.parametrize('options', [
+    {'shards': 3},
+    {'shards': 2, 'shard_by': 'locales'},
+    {'max_cells': 12},
+])
+def test_shards_merge_into_single_workbook(res_dir, tmp_path, options):
+    single, sharded = str(tmp_path / 'single.xlsx'), str(tmp_path / 'shards' / 'out.xlsx')
+    os.makedirs(os.path.dirname(sharded))
+    export_to_excel(res_dir, single)
+    export_to_excel(res_dir, sharded, **options)
+
+    files = list_shard_files(manifest_path(sharded))
+    assert len(files) > 1
+    shards = [read_sheets(path) for path in files]
+    expected = read_sheets(single)
+    assert cells(shards, 'All Translations') == cells([expected], 'All Translations')
+    # 按语言分片时各分片的未翻译表只列本组语言缺少的行，所以比较缺少翻译的单元格
+    assert missing(shards) == missing([expected])
+    assert read_workbook_updates(manifest_path(sharded)) == read_workbook_updates(single)
+    assert read_workbook_updates(os.path.dirname(sharded)) == read_workbook_updates(single)
+
+
+def test_sharded_import_matches_single_import(res_dir, tmp_path):
+    single, sharded = str(tmp_path / 'single.xlsx'), str(tmp_path / 'out.xlsx')
+    export_to_excel(res_dir, single)
+    export_to_excel(res_dir, sharded, shards=3)
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res_dir, copy)
+
+    import_from_excel(res_dir, manifest_path(sharded))
+    import_from_excel(copy, single)
+    assert load_resources(res_dir) == load_resources(copy)
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+
+from .test_staleness import write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'),
+                  {'greet': 'Hello', 'bye': 'Goodbye', 'ok': 'OK', 'tom': 'Tom &amp; Jerry'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'bye': 'Tschüss', 'ok': 'OK'})
+    write_strings(os.path.join(res, 'values-fr'), {'greet': 'Bonjour'})
+    return res
+
+
+def fill(path):
+    """补上未翻译表中所有缺少的译文（key + 语言），返回补上的 {(key, 语言)}"""
+    wb = load_workbook(path)
+    filled = set()
+    for sheet in wb.worksheets[1:]:
+        headers = [cell.value for cell in sheet[1]]
+        for row in sheet.iter_rows(min_row=2):
+            if headers[1] == 'locale':
+                cells = [(row[1].value, row[3])]
+            else:
+                cells = list(zip(headers[2:], row[2:]))
+            for lang_code, cell in cells:
+                if not cell.value:
+                    cell.value = f'{row[0].value} & {lang_code}'
+                    filled.add((row[0].value, lang_code))
+    wb.save(path)
+    return filled
+
+
+@pytest.mark.parametrize('layout', ['locales', 'long'])
+def test_sparse_import_matches_rows_import(res_dir, tmp_path, layout):
+    rows, sparse = str(tmp_path / 'rows.xlsx'), str(tmp_path / f'{layout}.xlsx')
+    export_to_excel(res_dir, rows)
+    export_to_excel(res_dir, sparse, layout=layout)
+    assert fill(sparse) == fill(rows) == {('tom', 'de'), ('bye', 'fr'), ('ok', 'fr'), ('tom', 'fr')}
+
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res_dir, copy)
+    import_from_excel(res_dir, sparse, 'partial')
+    import_from_excel(copy, rows, 'partial')
+    assert load_resources(res_dir) == load_resources(copy)
+    assert load_resources(res_dir)[2]['fr']['tom'] == 'tom &amp; fr'
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+from xml2xls.spill import _Partition
+
+from .test_staleness import write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hi %1$s', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'bye': 'Tschüss'})
+    return res
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """de 的 greet 丢了占位符"""
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'All Translations'
+    sheet.append(['key', 'en', 'de', 'fr'])
+    sheet.append(['greet', 'Hi %1$s', 'Hallo', 'Salut %1$s'])
+    sheet.append(['bye', 'Goodbye', 'Auf Wiedersehen', 'Au revoir'])
+    path = str(tmp_path / 'in.xlsx')
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """记录读回的分区文件"""
+    paths = []
+    load = _Partition.load
+
+    def counted(self):
+        paths.append(self.path)
+        return load(self)
+
+    monkeypatch.setattr(_Partition, 'load', counted)
+    return paths
+
+
+def test_partitions_are_read_once(res_dir, workbook, tmp_path, loads):
+    report = str(tmp_path / 'report.json')
+    import_from_excel(res_dir, workbook, out_of_core=True, validate_report=report)
+    assert len(loads) == len(set(loads)) == 3
+    with open(report, encoding='utf-8') as f:
+        assert [(issue['locale'], issue['key']) for issue in json.load(f)['issues']] == [('de', 'greet')]
+    assert load_resources(res_dir)[2]['de'] == {'greet': 'Hallo', 'bye': 'Auf Wiedersehen'}
+
+
+def test_strict_validates_before_writing(res_dir, workbook, loads):
+    with pytest.raises(ValueError):
+        import_from_excel(res_dir, workbook, out_of_core=True, strict=True)
+    assert load_resources(res_dir)[2]['de'] == {'bye': 'Tschüss'}
+
+
+@pytest.mark.parametrize('mode', ['full', 'partial'])
+def test_out_of_core_matches_in_memory_import(res_dir, tmp_path, mode):
+    workbook = str(tmp_path / 'export.xlsx')
+    write_strings(os.path.join(res_dir, 'values-ja'), {'bye': 'さようなら'})
+    export_to_excel(res_dir, workbook)
+    wb = load_workbook(workbook)
+    for sheet in wb.worksheets:
+        for row in sheet.iter_rows(min_row=2):
+            for cell in row[2:]:
+                cell.value = cell.value or f'<b>{row[0].value}</b> & "{cell.column_letter}"\nline'
+    wb.save(workbook)
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    copy = str(tmp_path / 'copy')
+    shutil.copytree(res_dir, copy)
+
+    import_from_excel(res_dir, workbook, mode, out_of_core=True, spill_dir=str(spill_dir))
+    import_from_excel(copy, workbook, mode)
+    assert load_resources(res_dir) == load_resources(copy)
+    assert os.listdir(spill_dir) == []
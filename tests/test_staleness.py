@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import Project, export_to_excel, load_resources, write_updates
+from xml2xls.processor import STALE_FILL
+from xml2xls.renames import apply_renames, detect_renames
+from xml2xls.sharding import manifest_path
+from xml2xls.staleness import find_stale
+
+
+def write_strings(values_dir, entries):
+    os.makedirs(values_dir, exist_ok=True)
+    lines = ''.join(f'    <string name="{key}">{value}</string>\n' for key, value in entries.items())
+    with open(os.path.join(values_dir, 'strings.xml'), 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<resources>\n{lines}</resources>\n')
+
+
+def read_sheets(path):
+    """工作簿中每个工作表的全部行 {工作表名: [行]}"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in wb.worksheets}
+    finally:
+        wb.close()
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    """greet 的源文本在 de 翻译之后改过，de 的 greet 过期"""
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye', 'ok': 'OK'})
+    write_strings(os.path.join(res, 'values-de'), {})
+    write_updates(res, {'de': {'greet': 'Hallo', 'bye': 'Tschüss', 'ok': 'OK'}})
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello there', 'bye': 'Goodbye', 'ok': 'OK'})
+    assert find_stale(res, load_resources(res)) == {'de': {'greet'}}
+    return res
+
+
+def untranslated_keys(path):
+    wb = load_workbook(path)
+    sheet = wb['Untranslated']
+    keys = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True)]
+    fills = [cell.fill.start_color.rgb for cell in wb['All Translations']['C'][1:]]
+    return keys, fills
+
+
+def assert_flagged(path):
+    keys, fills = untranslated_keys(path)
+    assert keys == ['greet']
+    assert fills[0].endswith(STALE_FILL.start_color.rgb[-6:])
+    assert not any(fill.endswith(STALE_FILL.start_color.rgb[-6:]) for fill in fills[1:])
+
+
+def test_pipeline_export_flags_stale(res_dir, tmp_path):
+    output = str(tmp_path / 'out.xlsx')
+    export_to_excel(res_dir, output, pipeline=True)
+    assert_flagged(output)
+
+
+def test_sharded_export_flags_stale(res_dir, tmp_path):
+    output = str(tmp_path / 'out.xlsx')
+    export_to_excel(res_dir, output, shards=1)
+    with open(manifest_path(output), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert_flagged(os.path.join(tmp_path, manifest['shards'][0]['file']))
+
+
+def test_sharded_export_ignores_stale(res_dir, tmp_path):
+    output = str(tmp_path / 'out.xlsx')
+    export_to_excel(res_dir, output, shards=1, stale='ignore')
+    with open(manifest_path(output), encoding='utf-8') as f:
+        manifest = json.load(f)
+    keys, _ = untranslated_keys(os.path.join(tmp_path, manifest['shards'][0]['file']))
+    assert keys == []
+
+
+def test_project_export_flags_stale(res_dir, tmp_path):
+    output = str(tmp_path / 'out.xlsx')
+    Project(res_dir).export_workbook(output)
+    assert_flagged(output)
+
+
+@pytest.mark.parametrize('new_source, kind, stale', [
+    ('Welcome back to the app', 'exact', {}),
+    ('Welcome back to the app!', 'near', {'de': {'welcome_back'}}),
+])
+def test_carried_translations_keep_old_source(tmp_path, new_source, kind, stale):
+    base = str(tmp_path / 'base')
+    write_strings(os.path.join(base, 'values'), {'welcome': 'Welcome back to the app'})
+    write_strings(os.path.join(base, 'values-de'), {'welcome': 'Willkommen zurück'})
+    res = str(tmp_path / 'res')
+    shutil.copytree(base, res)
+    write_strings(os.path.join(res, 'values'), {'welcome_back': new_source})
+
+    renames = detect_renames(load_resources(res), base)
+    assert [(item['old'], item['new'], item['kind']) for item in renames] == [('welcome', 'welcome_back', kind)]
+    apply_renames(res, renames, kinds=('exact', 'near'))
+    snapshot = load_resources(res)
+    assert snapshot[2]['de']['welcome_back'] == 'Willkommen zurück'
+    assert find_stale(res, snapshot) == stale
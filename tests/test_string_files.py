@@ -0,0 +1,86 @@
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+
+from .test_staleness import read_sheets, write_strings
+
+MAIN = {'greet': 'Hello', 'bye': 'Goodbye'}
+ONBOARDING = {'welcome': 'Welcome', 'next': 'Next'}
+
+
+def write_file(path, body):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<resources>\n{body}</resources>\n')
+
+
+@pytest.fixture
+def split_res(tmp_path):
+    """字符串分散在多个文件中，另有不需要翻译的条目和不含字符串的文件"""
+    res = str(tmp_path / 'split')
+    write_strings(os.path.join(res, 'values'), MAIN)
+    write_file(os.path.join(res, 'values', 'strings_onboarding.xml'),
+               ''.join(f'    <string name="{k}">{v}</string>\n' for k, v in ONBOARDING.items())
+               + '    <string name="brand" translatable="false">Acme</string>\n')
+    write_file(os.path.join(res, 'values', 'donottranslate.xml'), '    <string name="api">https://x</string>\n')
+    write_file(os.path.join(res, 'values', 'colors.xml'), '    <color name="red">#f00</color>\n')
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo'})
+    write_file(os.path.join(res, 'values-de', 'strings_onboarding.xml'),
+               '    <string name="welcome">Willkommen</string>\n')
+    return res
+
+
+@pytest.fixture
+def single_res(tmp_path):
+    """旧做法：同样的可翻译条目全部放在 strings.xml 中"""
+    res = str(tmp_path / 'single')
+    write_strings(os.path.join(res, 'values'), {**MAIN, **ONBOARDING})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'welcome': 'Willkommen'})
+    return res
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def values_files(res):
+    values_dir = os.path.join(res, 'values')
+    return {name: read_bytes(os.path.join(values_dir, name)) for name in os.listdir(values_dir)}
+
+
+def test_split_files_export_like_single_file(split_res, single_res, tmp_path):
+    assert load_resources(split_res) == load_resources(single_res)
+    split, single = str(tmp_path / 'split.xlsx'), str(tmp_path / 'single.xlsx')
+    export_to_excel(split_res, split)
+    export_to_excel(single_res, single)
+    assert read_sheets(split) == read_sheets(single)
+
+
+def test_import_writes_back_to_owning_file(split_res, single_res, tmp_path):
+    workbook = str(tmp_path / 'in.xlsx')
+    export_to_excel(single_res, workbook)
+    wb = load_workbook(workbook)
+    sheet = wb['All Translations']
+    for row in sheet.iter_rows(min_row=2):
+        row[2].value = {'welcome': 'Herzlich willkommen', 'next': 'Weiter'}.get(row[0].value, row[2].value)
+    wb.save(workbook)
+
+    de_dir = os.path.join(split_res, 'values-de')
+    de_strings = read_bytes(os.path.join(de_dir, 'strings.xml'))
+    default_files = values_files(split_res)
+    import_from_excel(split_res, workbook)
+    import_from_excel(single_res, workbook)
+
+    assert load_resources(split_res) == load_resources(single_res)
+    # 只改写包含变化条目的文件
+    assert read_bytes(os.path.join(de_dir, 'strings.xml')) == de_strings
+    assert values_files(split_res) == default_files
+    # 新条目写入默认语言中同名的文件
+    assert load_resources(split_res)[2]['de']['next'] == 'Weiter'
+    with open(os.path.join(de_dir, 'strings_onboarding.xml'), encoding='utf-8') as f:
+        content = f.read()
+    assert '<string name="welcome">Herzlich willkommen</string>' in content
+    assert '<string name="next">Weiter</string>' in content
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import pytest
+from openpyxl import Workbook
+
+from xml2xls import export_to_excel, import_from_excel, load_resources
+from xml2xls.processor import compute_coverage
+from xml2xls.translation_store import TranslationStore
+
+from .test_staleness import read_sheets, write_strings
+
+
+@pytest.fixture
+def res_dir(tmp_path):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'tom': 'Tom &amp; Jerry', 'its': "It\\'s"})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo', 'its': "Es ist\\'s"})
+    write_strings(os.path.join(res, 'values-fr'), {'tom': 'Tom &amp; Jerry'})
+    return res
+
+
+@pytest.fixture
+def store(res_dir, tmp_path):
+    with TranslationStore(str(tmp_path / 'store.db')) as store:
+        store.sync(res_dir, 'android')
+        yield store
+
+
+def test_store_matches_files(res_dir, store):
+    snapshot = load_resources(res_dir)
+    assert store.snapshot() == (snapshot[0], snapshot[1], {lc: dict(data) for lc, data in snapshot[2].items()})
+    assert store.coverage() == compute_coverage(*snapshot)
+    assert store.missing() == {'de': ['tom'], 'fr': ['greet', 'its']}
+
+
+def test_store_export_matches_export(res_dir, store, tmp_path):
+    exported, stored = str(tmp_path / 'export.xlsx'), str(tmp_path / 'store.xlsx')
+    export_to_excel(res_dir, exported)
+    store.export_workbook(stored)
+    assert read_sheets(stored) == read_sheets(exported)
+
+
+def test_store_write_back_matches_import(res_dir, store, tmp_path):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'All Translations'
+    sheet.append(['key', 'en', 'de', 'fr'])
+    sheet.append(['greet', 'Hello', 'Servus', 'Bonjour'])
+    sheet.append(['tom', 'Tom & Jerry', 'Tom & Jerry', ''])
+    sheet.append(['its', "It's", "Es ist's", "C'est"])
+    workbook = str(tmp_path / 'in.xlsx')
+    wb.save(workbook)
+
+    imported = str(tmp_path / 'imported')
+    shutil.copytree(res_dir, imported)
+    import_from_excel(imported, workbook)
+    store.import_workbook(workbook, write_back=True)
+    assert load_resources(res_dir)[2] == load_resources(imported)[2]
+    assert store.snapshot()[2]['fr'] == dict(load_resources(imported)[2]['fr'])
@@ -0,0 +1,43 @@
+import os
+
+from xml2xls import export_to_excel, load_resources, processor
+from xml2xls.processor import ResourceCache, watch_and_export
+
+from .test_staleness import read_sheets, write_strings
+
+
+def touch(res, name, entries, mtime_ns):
+    write_strings(os.path.join(res, name), entries)
+    os.utime(os.path.join(res, name, 'strings.xml'), ns=(mtime_ns, mtime_ns))
+
+
+def test_cache_matches_full_parse(tmp_path):
+    res = str(tmp_path / 'res')
+    touch(res, 'values', {'greet': 'Hello', 'bye': 'Goodbye'}, 1)
+    touch(res, 'values-de', {'greet': 'Hallo'}, 1)
+    touch(res, 'values-fr', {'bye': 'Au revoir'}, 1)
+    cache = ResourceCache(res)
+    assert cache.refresh() == {'en', 'de', 'fr'}
+    assert cache.snapshot() == load_resources(res)
+
+    touch(res, 'values-de', {'greet': 'Hallo', 'bye': 'Tschüss'}, 2)
+    touch(res, 'values-es', {'greet': 'Hola'}, 2)
+    assert cache.changed() == {'de', 'es'}
+    assert cache.refresh() == {'de', 'es'}
+    assert cache.snapshot() == load_resources(res)
+
+
+def test_watch_writes_same_workbook_as_export(tmp_path, monkeypatch):
+    res = str(tmp_path / 'res')
+    write_strings(os.path.join(res, 'values'), {'greet': 'Hello', 'bye': 'Goodbye'})
+    write_strings(os.path.join(res, 'values-de'), {'greet': 'Hallo'})
+    exported, watched = str(tmp_path / 'export.xlsx'), str(tmp_path / 'watch.xlsx')
+    export_to_excel(res, exported)
+
+    def stop(seconds):
+        raise KeyboardInterrupt
+
+    # 第一次生成工作簿后立即停止监听
+    monkeypatch.setattr(processor.time, 'sleep', stop)
+    watch_and_export(res, watched)
+    assert read_sheets(watched) == read_sheets(exported)
@@ -0,0 +1,54 @@
+import os
+
+from xml2xls import parse_strings_xml, write_strings_xml
+from xml2xls.processor import plan_new_entries
+
+EXISTING = '''<?xml version="1.0" encoding="utf-8"?>
+<resources>
+    <!-- settings -->
+    <string name="b">B</string>
+    <string name="d">D</string>
+</resources>
+'''
+
+
+def test_plan_new_entries():
+    existing = {'b', 'd'}
+    new_keys = ['e', 'a', 'c', 'x', 'c', 'a2']
+    assert plan_new_entries(existing, new_keys, ['a', 'a2', 'b', 'c', 'd', 'e']) == (
+        {'b': ['c'], 'd': ['e']}, {'b': ['a', 'a2']}, ['x'])
+    assert plan_new_entries(existing, new_keys) == ({}, {}, ['e', 'a', 'c', 'x', 'a2'])
+
+
+def test_new_keys_follow_reference_order(tmp_path):
+    xml_path = str(tmp_path / 'values-de' / 'strings.xml')
+    os.makedirs(os.path.dirname(xml_path))
+    with open(xml_path, 'w', encoding='utf-8') as f:
+        f.write(EXISTING)
+    data = {'e': 'E', 'a': 'A', 'd': 'D2', 'c': 'C', 'x': 'X'}
+    write_strings_xml(xml_path, data, ['a', 'b', 'c', 'd', 'e'])
+
+    # 与旧做法（新条目追加到末尾）写出的内容相同，只是新条目排在相邻 key 旁边
+    order, strings = parse_strings_xml(xml_path)
+    assert dict(strings) == {'b': 'B', 'd': 'D2', 'e': 'E', 'a': 'A', 'c': 'C', 'x': 'X'}
+    assert order == ['a', 'b', 'c', 'd', 'e', 'x']
+    with open(xml_path, encoding='utf-8') as f:
+        assert f.read() == '''<?xml version="1.0" encoding="utf-8"?>
+<resources>
+    <!-- settings -->
+    <string name="a">A</string>
+    <string name="b">B</string>
+    <string name="c">C</string>
+    <string name="d">D2</string>
+    <string name="e">E</string>
+    <string name="x">X</string>
+</resources>
+'''
+
+
+def test_without_reference_new_keys_are_appended(tmp_path):
+    xml_path = str(tmp_path / 'strings.xml')
+    with open(xml_path, 'w', encoding='utf-8') as f:
+        f.write(EXISTING)
+    write_strings_xml(xml_path, {'c': 'C', 'a': 'A'})
+    assert parse_strings_xml(xml_path)[0] == ['b', 'd', 'c', 'a']
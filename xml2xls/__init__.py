@@ -0,0 +1,37 @@
+"""
+strings2xls 库接口
+
+目录下的脚本既可以直接运行（python3 processor.py ...），也可以作为包导入：
+    from xml2xls import Project
+
+    project = Project('app/src/main/res')
+    project.export_workbook('translations.xlsx')
+"""
+
+from .flutter_sync import android_to_flutter, flutter_to_android
+from .processor import (export_to_excel, import_from_excel, load_resources, parse_string_files, parse_strings_xml,
+                        read_workbook_updates, string_files, write_strings_xml, write_updates)
+from .profiler import NULL_PROFILER, PhaseProfiler
+from .progress import NULL_PROGRESS, JSONLinesEmitter, ProgressReporter, TTYProgressBar
+from .project import Project
+
+__all__ = [
+    'Project',
+    'export_to_excel',
+    'import_from_excel',
+    'load_resources',
+    'parse_strings_xml',
+    'parse_string_files',
+    'string_files',
+    'read_workbook_updates',
+    'write_strings_xml',
+    'write_updates',
+    'android_to_flutter',
+    'flutter_to_android',
+    'PhaseProfiler',
+    'NULL_PROFILER',
+    'ProgressReporter',
+    'TTYProgressBar',
+    'JSONLinesEmitter',
+    'NULL_PROGRESS',
+]
@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    from .processor import NULL_PROFILER
+    from .progress import NULL_PROGRESS
+    from .project import Project
+except ImportError:
+    from processor import NULL_PROFILER
+    from progress import NULL_PROGRESS
+    from project import Project
+
+"""
+批量处理
+
+从一个清单文件读取多个任务，在同一个进程池中执行，省去每个项目重复启动解释器的开销，并让所有核心同时工作。
+清单为 JSON，路径相对于清单文件所在目录：
+    {
+      "jobs": [
+        {"res_dir": "app-a/src/main/res", "workbook": "out/app-a.xlsx", "mode": "export"},
+        {"res_dir": "app-b/src/main/res", "workbook": "in/app-b.xlsx", "mode": "partial"},
+        ["app-c/src/main/res", "out/app-c.csv", "export"]
+      ]
+    }
+mode 为 export（导出）、full 或 partial（按对应模式导入）；导入前校验占位符与标签，--strict 时有问题的任务不写入并记为失败。
+
+不同资源目录的任务并发执行；同一资源目录的任务按清单顺序依次执行（如先导入再导出）。
+单个任务失败只记录错误，不影响其他任务；全部完成后输出汇总。
+
+用法：
+python3 processor.py --batch jobs.json [--workers N] [--batch-summary summary.json] [--strict]
+"""
+
+BATCH_MODES = ('export', 'full', 'partial')
+
+
+def load_manifest(path):
+    """读取清单，返回任务列表 [{'index', 'res_dir', 'workbook', 'mode', 'error'}]"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    entries = manifest['jobs'] if isinstance(manifest, dict) else manifest
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    jobs = []
+    for index, entry in enumerate(entries):
+        if isinstance(entry, (list, tuple)):
+            entry = dict(zip(('res_dir', 'workbook', 'mode'), entry))
+        job = {
+            'index': index,
+            'res_dir': entry.get('res_dir'),
+            'workbook': entry.get('workbook'),
+            'mode': entry.get('mode', 'export'),
+            'error': None,
+        }
+        if not job['res_dir'] or not job['workbook']:
+            job['error'] = "缺少 res_dir 或 workbook"
+        else:
+            job['res_dir'] = os.path.join(base_dir, job['res_dir'])
+            job['workbook'] = os.path.join(base_dir, job['workbook'])
+            if job['mode'] not in BATCH_MODES:
+                job['error'] = f"不支持的模式：{job['mode']}"
+        jobs.append(job)
+    return jobs
+
+
+def run_job(res_dir, workbook, mode, strict=False):
+    """在工作进程中执行单个任务，返回统计信息"""
+    started = time.perf_counter()
+    project = Project(res_dir, auto_refresh=False)
+    if mode == 'export':
+        os.makedirs(os.path.dirname(workbook) or '.', exist_ok=True)
+        output = project.export_workbook(workbook)
+        missing = sum(item['missing'] for item in project.coverage().values())
+        result = {'output': output, 'keys': len(project.keys), 'locales': len(project.locales), 'missing': missing}
+    else:
+        updated = project.import_workbook(workbook, mode, strict)
+        result = {'locales': len(updated), 'updated': sum(updated.values())}
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(manifest_path, workers=None, profiler=NULL_PROFILER, progress=NULL_PROGRESS, strict=False):
+    """执行清单中的全部任务，返回每个任务的结果列表（顺序与清单一致）；strict 见 Project.import_workbook"""
+    jobs = load_manifest(manifest_path)
+    results = [None] * len(jobs)
+
+    # 同一资源目录的任务组成一条队列，队首任务完成后再提交下一个
+    queues = {}
+    for job in jobs:
+        if job['error']:
+            results[job['index']] = _summary(job, 'failed', error=job['error'])
+            continue
+        queues.setdefault(os.path.realpath(job['res_dir']), []).append(job)
+
+    with profiler.phase('batch') as p, progress.task('jobs', total=len(jobs), unit='jobs') as task, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        task.advance(sum(1 for r in results if r is not None))
+        running = {}
+
+        def submit_next(queue):
+            if queue:
+                job = queue.pop(0)
+                future = executor.submit(run_job, job['res_dir'], job['workbook'], job['mode'], strict)
+                running[future] = (job, queue)
+
+        for queue in queues.values():
+            submit_next(queue)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job, queue = running.pop(future)
+                try:
+                    results[job['index']] = _summary(job, 'ok', **future.result())
+                except Exception as e:
+                    # 单个任务失败不影响其他任务
+                    results[job['index']] = _summary(job, 'failed', error=f"{type(e).__name__}: {e}")
+                task.advance(item=os.path.basename(job['workbook'] or ''))
+                submit_next(queue)
+        p.items = len(jobs)
+    return results
+
+
+def _summary(job, status, **fields):
+    summary = {
+        'index': job['index'],
+        'status': status,
+        'mode': job['mode'],
+        'res_dir': job['res_dir'],
+        'workbook': job['workbook'],
+    }
+    summary.update(fields)
+    return summary
+
+
+def format_summary(results):
+    """生成汇总文本"""
+    lines = []
+    for result in results:
+        target = f"{result['res_dir']} -> {result['workbook']}" if result['mode'] == 'export' \
+            else f"{result['workbook']} -> {result['res_dir']}"
+        if result['status'] == 'ok':
+            if result['mode'] == 'export':
+                detail = f"{result['keys']} keys, {result['locales']} locales, 未翻译 {result['missing']}"
+            else:
+                detail = f"{result['locales']} locales, 更新 {result['updated']} 条"
+            lines.append(f"[成功] {result['mode']:<7} {target}（{detail}，{result['seconds']}s）")
+        else:
+            lines.append(f"[失败] {result['mode']:<7} {target}：{result['error']}")
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    lines.append(f"共 {len(results)} 个任务，成功 {len(results) - failed} 个，失败 {failed} 个")
+    return '\n'.join(lines)
+
+
+def write_summary(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'jobs': results}, f, ensure_ascii=False, indent=2)
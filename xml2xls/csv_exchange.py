@@ -0,0 +1,201 @@
+import csv
+import os
+
+try:
+    from .processor import (LONG_HEADERS, NULL_PROFILER, build_untranslated_sheets, dedup_export_rows, dedup_rows,
+                            escape_updates, iter_export_rows, load_resources, split_keys)
+    from .progress import NULL_PROGRESS
+except ImportError:
+    from processor import (LONG_HEADERS, NULL_PROFILER, build_untranslated_sheets, dedup_export_rows, dedup_rows,
+                           escape_updates, iter_export_rows, load_resources, split_keys)
+    from progress import NULL_PROGRESS
+
+"""
+CSV/TSV 交换格式
+
+与 xlsx 的两个工作表对应，导出为两个 UTF-8 文本文件：
+  translations.csv               完整翻译表（All Translations）
+  translations.untranslated.csv  未翻译表（Untranslated）
+扩展名为 .tsv 时使用制表符分隔。
+稀疏布局（--layout）下，long 布局的未翻译表每个缺失单元格一行（key, locale, en, translation）；
+locales 布局每种语言一个文件 translations.untranslated.<语言>.csv（key, en, 语言）。
+
+字段按 RFC 4180 规则加引号，多行文本、引号、分隔符以及内联标签都可以原样往返。
+导出时逐行从解析结果写入文件，导入时逐行读取，不构建工作簿，也不在内存中保留整张表。
+"""
+
+UNTRANSLATED_SUFFIX = '.untranslated'
+
+
+def _dialect(path):
+    return 'excel-tab' if path.lower().endswith('.tsv') else 'excel'
+
+
+def untranslated_path(path):
+    """translations.csv -> translations.untranslated.csv"""
+    base, ext = os.path.splitext(path)
+    if base.endswith(UNTRANSLATED_SUFFIX):
+        return path
+    return base + UNTRANSLATED_SUFFIX + ext
+
+
+def locale_untranslated_path(path, lang_code):
+    """translations.csv -> translations.untranslated.de.csv"""
+    base, ext = os.path.splitext(untranslated_path(path))
+    return f'{base}.{lang_code}{ext}'
+
+
+def export_to_table(res_dir, output_file, profiler=NULL_PROFILER, progress=NULL_PROGRESS, snapshot=None,
+                    layout='rows', stale=None, dedup=False):
+    """导出完整翻译表和未翻译表到 CSV/TSV 文件；snapshot 为已解析的资源时不再读取 res_dir
+
+    stale 为过期的翻译 {语言: key 集合}，这些条目同样列入未翻译表；dedup 为 True 时按源文本合并翻译单元（见 dedup_rows）
+    """
+    default_order, lang_codes, all_langs = snapshot or load_resources(res_dir, profiler, progress)
+    headers = ['key', 'en'] + lang_codes
+    untrans_file = untranslated_path(output_file)
+    dialect = _dialect(output_file)
+    if layout != 'rows':
+        return _export_sparse_table(output_file, headers, default_order, lang_codes, all_langs, layout,
+                                    profiler, progress, stale, dedup)
+
+    with profiler.phase('write_rows') as p, \
+            progress.task('write', total=len(default_order), unit='rows') as task, \
+            open(output_file, 'w', encoding='utf-8', newline='') as main_f, \
+            open(untrans_file, 'w', encoding='utf-8', newline='') as untrans_f:
+        main_writer = csv.writer(main_f, dialect=dialect)
+        untrans_writer = csv.writer(untrans_f, dialect=dialect)
+        main_writer.writerow(headers)
+        untrans_writer.writerow(headers)
+        rows = iter_export_rows(default_order, lang_codes, all_langs, stale)
+        if dedup:
+            # 去重需要先汇总全部行
+            rows = list(rows)
+            main_rows, untrans_rows = dedup_export_rows(headers, [row for row, _ in rows],
+                                                        [row for row, missing in rows if missing], stale)
+            untrans_keys = {row[0] for row in untrans_rows}
+            rows = [(row, row[0] in untrans_keys) for row in main_rows]
+        for row, missing in rows:
+            main_writer.writerow(row)
+            if missing:
+                untrans_writer.writerow(row)
+            p.items += 1
+            task.advance()
+    return output_file, untrans_file
+
+
+def _export_sparse_table(output_file, headers, default_order, lang_codes, all_langs, layout, profiler, progress,
+                         stale=None, dedup=False):
+    """写出完整翻译表和稀疏布局的未翻译表，返回 (主表文件, 第一个未翻译表文件)"""
+    dialect = _dialect(output_file)
+    with profiler.phase('write_rows') as p, progress.task('write', total=len(default_order), unit='rows') as task, \
+            open(output_file, 'w', encoding='utf-8', newline='') as main_f:
+        main_writer = csv.writer(main_f, dialect=dialect)
+        main_writer.writerow(headers)
+        rows = (row for row, _ in iter_export_rows(default_order, lang_codes, all_langs))
+        if dedup:
+            rows = dedup_rows(rows, headers, stale)
+        for row in rows:
+            main_writer.writerow(row)
+            p.items += 1
+            task.advance()
+
+    paths = []
+    with profiler.phase('write_untranslated') as p:
+        for title, sheet_headers, rows in build_untranslated_sheets(default_order, lang_codes, all_langs, layout, stale):
+            path = untranslated_path(output_file) if layout == 'long' \
+                else locale_untranslated_path(output_file, sheet_headers[2])
+            if dedup:
+                rows = dedup_rows(rows, sheet_headers, stale)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, dialect=dialect)
+                writer.writerow(sheet_headers)
+                writer.writerows(rows)
+            p.items += len(rows)
+            paths.append(path)
+    return output_file, paths[0] if paths else untranslated_path(output_file)
+
+
+def _locale_untranslated_files(input_file):
+    """列出 locales 布局的各语言未翻译表文件 [(语言, 路径)]"""
+    base, ext = os.path.splitext(untranslated_path(input_file))
+    folder = os.path.dirname(base) or '.'
+    prefix = os.path.basename(base) + '.'
+    files = []
+    for name in sorted(os.listdir(folder)):
+        if name.startswith(prefix) and name.endswith(ext):
+            lang_code = name[len(prefix):len(name) - len(ext)]
+            if lang_code:
+                files.append((lang_code, os.path.join(folder, name)))
+    return files
+
+
+def _read_sparse_rows(reader, lang_code, lang_data, p, task):
+    """读取 long（lang_code 为 None）或单个语言的稀疏未翻译表，只导入译文列"""
+    for row in reader:
+        task.advance()
+        if not row or not row[0]:
+            continue
+        if lang_code is None:
+            if len(row) < 4 or not row[1]:
+                continue
+            row_lang, value = row[1], row[3]
+        else:
+            if len(row) < 3:
+                continue
+            row_lang, value = lang_code, row[2]
+        if value:
+            value = value.strip()
+            data = lang_data.setdefault(row_lang, {})
+            for key in split_keys(row[0]):
+                data[key] = value
+                p.items += 1
+
+
+def read_table_updates(input_file, mode='full', profiler=NULL_PROFILER, escape=True, progress=NULL_PROGRESS,
+                       lang_data=None):
+    """读取 CSV/TSV 文件，返回 {语言: {key: 值}}；partial 模式读取对应的未翻译表文件（自动识别稀疏布局）
+
+    lang_data 为 spill.SpillPartitions 时读到的值逐个追加到各语言的磁盘分区（见 read_workbook_updates）
+    """
+    if lang_data is None:
+        lang_data = {}
+    path = untranslated_path(input_file) if mode == 'partial' else input_file
+    if mode == 'partial' and not os.path.exists(path):
+        locale_files = _locale_untranslated_files(input_file)
+        if locale_files:
+            with profiler.phase('read_rows') as p, progress.task('read', unit='rows') as task:
+                for lang_code, locale_path in locale_files:
+                    with open(locale_path, 'r', encoding='utf-8-sig', newline='') as f:
+                        reader = csv.reader(f, dialect=_dialect(locale_path))
+                        headers = next(reader, None)
+                        if headers and len(headers) >= 3 and headers[2]:
+                            lang_code = headers[2]
+                        _read_sparse_rows(reader, lang_code, lang_data, p, task)
+            return escape_updates(lang_data, profiler) if escape else lang_data
+    if not os.path.exists(path):
+        raise ValueError("未找到未翻译表文件" if mode == 'partial' else "未找到主表文件")
+
+    with profiler.phase('read_rows') as p, progress.task('read', unit='rows') as task, \
+            open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, dialect=_dialect(path))
+        headers = next(reader, None)
+        if not headers:
+            return lang_data
+        if mode == 'partial' and headers[:4] == LONG_HEADERS:
+            _read_sparse_rows(reader, None, lang_data, p, task)
+        else:
+            lang_codes = headers[1:]  # 跳过key列，包含'en'
+            for row in reader:
+                task.advance()
+                if not row or not row[0]:
+                    continue
+                keys = split_keys(row[0])
+                for lang_code, value in zip(lang_codes, row[1:]):
+                    if value:
+                        value = value.strip()
+                        data = lang_data.setdefault(lang_code, {})
+                        for key in keys:
+                            data[key] = value
+                        p.items += len(keys)
+    return escape_updates(lang_data, profiler) if escape else lang_data
@@ -0,0 +1,300 @@
+import json
+from hashlib import blake2b
+
+from openpyxl import Workbook, load_workbook
+
+try:
+    from .processor import (NULL_PROFILER, build_export_rows, escape_xml_chars, iter_sparse_cells, load_resources,
+                            sparse_layout, split_keys)
+    from .progress import NULL_PROGRESS
+    from .xlsx_writer import save_workbook
+except ImportError:
+    from processor import (NULL_PROFILER, build_export_rows, escape_xml_chars, iter_sparse_cells, load_resources,
+                           sparse_layout, split_keys)
+    from progress import NULL_PROGRESS
+    from xlsx_writer import save_workbook
+
+"""
+工作簿差异比较
+
+比较一份工作簿（通常是供应商返回的翻译表）与当前资源目录，或与另一份导出的工作簿，
+得到按语言划分的变更集：
+  added        旧侧没有翻译，新侧有
+  modified     两侧翻译不同
+  removed      新侧缺少整行（仅 full 模式；partial 模式的未翻译表本来就是子集）
+  conflicting  两侧翻译不同，且两侧的源文本（en）也不同，说明翻译基于另一版源文本
+
+每一行先计算整行摘要，摘要相同直接跳过；不同的行再按单元格摘要定位变化的语言，整体为线性时间。
+工作簿以 read_only 模式流式读取：旧侧只保留每行的摘要，变更行的旧值通过第二次流式读取取回。
+
+用法：
+python3 processor.py --diff res_dir vendor.xlsx [--diff-json changes.json] [--diff-xlsx changes.xlsx]
+python3 processor.py --diff base.xlsx vendor.xlsx
+"""
+
+DIGEST_SIZE = 8
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+SHEET_NAMES = {'full': 'All Translations', 'partial': 'Untranslated'}
+
+
+def normalize_value(value):
+    """按导入时的规则规范化单元格值，保证工作簿与 strings.xml 中的值可以直接比较"""
+    if not value:
+        return ''
+    return escape_xml_chars(str(value).strip())
+
+
+def _digest(value):
+    if not value:
+        return EMPTY_DIGEST
+    return blake2b(value.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def iter_workbook_rows(path, mode='full'):
+    """流式读取工作簿，先产出表头，再逐行产出 (key, [规范化后的各语言值])"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        sheet_name = SHEET_NAMES[mode]
+        if mode == 'partial':
+            first_row = next(wb[sheet_name].iter_rows(max_row=1, values_only=True), None) \
+                if sheet_name in wb.sheetnames else None
+            layout = sparse_layout(wb.sheetnames, first_row)
+            if layout:
+                yield from _iter_sparse_rows(wb, layout)
+                return
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"未找到工作表：{sheet_name}")
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        headers = next(rows, None)
+        if not headers:
+            return
+        lang_codes = [str(h) for h in headers[1:] if h]
+        yield lang_codes
+        width = len(lang_codes)
+        for row in rows:
+            if not row or not row[0]:
+                continue
+            values = [normalize_value(v) for v in row[1:width + 1]]
+            values += [''] * (width - len(values))
+            # 去重导出的翻译单元展开为每个 key 一行
+            for key in split_keys(row[0]):
+                yield key, values
+    finally:
+        wb.close()
+
+
+def _iter_sparse_rows(wb, layout):
+    """把稀疏布局的未翻译表按 key 汇总成行，源文本放在 en 列；只保留有译文的单元格"""
+    lang_codes = ['en']
+    columns = {'en': 0}
+    rows = {}
+    for unit, lang_code, source, value in iter_sparse_cells(wb, layout):
+        if lang_code not in columns:
+            columns[lang_code] = len(lang_codes)
+            lang_codes.append(lang_code)
+        source = normalize_value(source)
+        value = normalize_value(value)
+        for key in split_keys(unit):
+            cells = rows.setdefault(key, {})
+            if source and 'en' not in cells:
+                cells['en'] = source
+            if value:
+                cells[lang_code] = value
+    yield lang_codes
+    width = len(lang_codes)
+    for key, cells in rows.items():
+        values = [''] * width
+        for lang_code, value in cells.items():
+            values[columns[lang_code]] = value
+        yield key, values
+
+
+def iter_snapshot_rows(default_order, lang_codes, all_langs):
+    """以与 iter_workbook_rows() 相同的形式产出已解析资源中的行
+
+    值与导出的单元格相同（反转义后的文本），再与工作簿一侧做相同的规范化，刚导出的工作簿与资源目录没有差异
+    """
+    headers, main_rows, _ = build_export_rows(default_order, lang_codes, all_langs)
+    yield headers[1:]
+    for row in main_rows:
+        yield row[0], [normalize_value(value) for value in row[1:]]
+
+
+class RowIndex:
+    """旧侧的紧凑索引：key -> (整行摘要, 各列单元格摘要拼接成的 bytes)"""
+
+    def __init__(self, rows):
+        rows = iter(rows)
+        self.lang_codes = next(rows, [])
+        self.columns = {lc: i for i, lc in enumerate(self.lang_codes)}
+        self.digest_order = _digest_order(self.lang_codes)
+        self.entries = {}
+        for key, values in rows:
+            cells = b''.join(_digest(v) for v in values)
+            self.entries[key] = (_row_digest(self.digest_order, cells), cells)
+
+    def cell(self, key, lang_code):
+        entry = self.entries.get(key)
+        index = self.columns.get(lang_code)
+        if entry is None or index is None:
+            return EMPTY_DIGEST
+        return entry[1][index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE]
+
+
+def _digest_order(lang_codes):
+    """按语言代码排序的 [(语言代码字节, 列序号)]，使整行摘要与列顺序无关"""
+    return sorted((lc.encode('utf-8'), i) for i, lc in enumerate(lang_codes))
+
+
+def _row_digest(digest_order, cells):
+    """对非空单元格的 (语言, 单元格摘要) 求哈希"""
+    h = blake2b(digest_size=DIGEST_SIZE)
+    for lc, i in digest_order:
+        cell = cells[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+        if cell != EMPTY_DIGEST:
+            h.update(lc)
+            h.update(cell)
+    return h.digest()
+
+
+def compute_changes(old_rows, new_rows, old_values, mode='full'):
+    """计算变更集
+
+    old_rows / new_rows 为 iter_workbook_rows() 形式的行迭代器，
+    old_values(需要的 (key, 语言) 集合) 返回 {(key, 语言): 旧值}，用于按需取回旧值。
+    """
+    old = RowIndex(old_rows)
+    new_rows = iter(new_rows)
+    new_lang_codes = next(new_rows, [])
+    new_digest_order = _digest_order(new_lang_codes)
+    same_layout = new_lang_codes == old.lang_codes
+    en_index = new_lang_codes.index('en') if 'en' in new_lang_codes else None
+
+    # 先只记录需要旧值的位置，新值直接保存
+    pending = []  # (变更类型, 语言, key, 新值)
+    seen_keys = set()
+    for key, values in new_rows:
+        seen_keys.add(key)
+        cells = b''.join(_digest(v) for v in values)
+        entry = old.entries.get(key)
+        if entry is not None:
+            # 列布局相同时直接比较单元格摘要，否则比较与列顺序无关的整行摘要
+            if (entry[1] == cells) if same_layout else (entry[0] == _row_digest(new_digest_order, cells)):
+                continue
+
+        new_source = values[en_index] if en_index is not None else ''
+        source_changed = entry is not None and old.cell(key, 'en') != _digest(new_source)
+        for index, lang_code in enumerate(new_lang_codes):
+            new_cell = cells[index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE]
+            if new_cell == EMPTY_DIGEST:
+                continue
+            old_cell = old.cell(key, lang_code)
+            if old_cell == new_cell:
+                continue
+            if old_cell == EMPTY_DIGEST:
+                pending.append(('added', lang_code, key, values[index]))
+            elif source_changed and lang_code != 'en':
+                pending.append(('conflicting', lang_code, key, values[index]))
+            else:
+                pending.append(('modified', lang_code, key, values[index]))
+
+    removed = []
+    if mode == 'full':
+        for key in old.entries:
+            if key in seen_keys:
+                continue
+            for lang_code in old.lang_codes:
+                if old.cell(key, lang_code) != EMPTY_DIGEST:
+                    removed.append((lang_code, key))
+
+    # 第二遍：只取回变更位置的旧值
+    needed = {(key, lc) for kind, lc, key, _ in pending if kind != 'added'}
+    needed.update((key, lc) for lc, key in removed)
+    needed.update((key, 'en') for kind, lc, key, _ in pending if kind == 'conflicting')
+    lookup = old_values(needed) if needed else {}
+
+    changes = {}
+    for kind, lang_code, key, value in pending:
+        bucket = changes.setdefault(lang_code, _empty_bucket())[kind]
+        if kind == 'added':
+            bucket[key] = value
+        else:
+            item = {'old': lookup.get((key, lang_code), ''), 'new': value}
+            if kind == 'conflicting':
+                item['old_source'] = lookup.get((key, 'en'), '')
+            bucket[key] = item
+    for lang_code, key in removed:
+        changes.setdefault(lang_code, _empty_bucket())['removed'][key] = lookup.get((key, lang_code), '')
+    return changes
+
+
+def _empty_bucket():
+    return {'added': {}, 'modified': {}, 'removed': {}, 'conflicting': {}}
+
+
+def _lookup_from_rows(rows, needed):
+    """流式扫描行，只取回 needed 中的 (key, 语言) 对应的值"""
+    rows = iter(rows)
+    columns = {lc: i for i, lc in enumerate(next(rows, []))}
+    wanted = {}
+    for key, lc in needed:
+        wanted.setdefault(key, []).append(lc)
+    result = {}
+    for key, values in rows:
+        if key not in wanted:
+            continue
+        for lc in wanted[key]:
+            if lc in columns:
+                result[(key, lc)] = values[columns[lc]]
+    return result
+
+
+def diff_workbooks(base_file, new_file, mode='full'):
+    """比较两份工作簿"""
+    return compute_changes(
+        iter_workbook_rows(base_file, mode),
+        iter_workbook_rows(new_file, mode),
+        lambda needed: _lookup_from_rows(iter_workbook_rows(base_file, mode), needed),
+        mode,
+    )
+
+
+def diff_workbook_against_snapshot(snapshot, new_file, mode='full'):
+    """比较工作簿与已解析的资源快照 (默认顺序, 语言代码列表, {语言: 数据})"""
+    default_order, lang_codes, all_langs = snapshot
+
+    def old_values(needed):
+        return {(key, lc): all_langs.get(lc, {}).get(key, '') for key, lc in needed}
+
+    return compute_changes(iter_snapshot_rows(default_order, lang_codes, all_langs),
+                           iter_workbook_rows(new_file, mode), old_values, mode)
+
+
+def diff_workbook_against_resources(res_dir, new_file, mode='full', profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """比较工作簿与资源目录"""
+    return diff_workbook_against_snapshot(load_resources(res_dir, profiler, progress), new_file, mode)
+
+
+def summarize(changes):
+    return {lc: {kind: len(items) for kind, items in bucket.items()} for lc, bucket in changes.items()}
+
+
+def write_changes_json(changes, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summarize(changes), 'changes': changes}, f, ensure_ascii=False, indent=2)
+
+
+def write_changes_xlsx(changes, path, compression='default'):
+    """写出紧凑的变更表：每个变更一行；compression 为 zip 压缩级别（见 xlsx_writer.py）"""
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet(title='Changes')
+    sheet.append(['change', 'locale', 'key', 'old', 'new', 'old_source'])
+    for lang_code, bucket in changes.items():
+        for key, value in bucket['added'].items():
+            sheet.append(['added', lang_code, key, '', value, ''])
+        for kind in ('modified', 'conflicting'):
+            for key, item in bucket[kind].items():
+                sheet.append([kind, lang_code, key, item['old'], item['new'], item.get('old_source', '')])
+        for key, value in bucket['removed'].items():
+            sheet.append(['removed', lang_code, key, value, '', ''])
+    save_workbook(wb, path, compression=compression)
@@ -0,0 +1,245 @@
+import argparse
+import random
+import re
+import sys
+import time
+
+"""
+strings.xml 内容的转义与反转义
+
+导出时 strings.xml 中的原文经 unescape_xml_chars 反转义后写入单元格，导入时单元格文本经 escape_xml_chars 转义后写回，
+不做任何修改的导出再导入不会改变字符串文件。转义规则为：
+  &    未构成实体引用（&amp; &#39; &#x1F; &nbsp; 等）时转为 &amp;
+  <    不是内联标签、注释或 CDATA 的开头时转为 &lt;
+  '    未转义且不在双引号包裹的片段内时加反斜杠
+  @ ?  位于开头且整段不是资源引用（@string/app_name、@android:string/ok、?attr/colorPrimary）时加反斜杠
+双引号在 Android 中是语法（包裹的片段保留空白，引号本身不显示），不论是否转义都原样保留：单元格里的 Say "hi" 写回后
+显示为 Say hi，要显示引号须写成 \\"（导出的单元格中字面量引号本来就是 \\"，flutter_sync.escape_android 也这样写）；
+不把裸引号转为 \\"，是为了让已有的引号片段（"  保留空白  "）导出再导入不变；
+内联标签（含属性中的引号）、注释、CDATA 以及已有的反斜杠转义（\\n \\' \\" \\@）原样保留。
+所以已经是合法 strings.xml 内容的文本转义后不变（旧的、直接写入原文的工作簿照常导入），转义是幂等的。
+反转义只去掉转义会重新加上的部分（引号片段外的 \\'、不像实体的 &amp;、不像标签的 &lt;、不是资源引用的 \\@ \\?），
+保证对任意合法内容 s 都有 escape(unescape(s)) == s。
+
+所有规则由一个预编译正则一次扫描完成，不再使用 ###ENTITY### 之类的临时标记；扫描前先用另一个预编译正则预检，
+已经是合法内容的值（大部分单元格）不做替换直接返回。escape_values / escape_mapping 按列批量转义。
+往返性质的测试见 tests/test_escaping.py。
+
+微基准与往返自检（与旧实现比较）：
+python3 escaping.py --bench [res_dir] [--rounds 5]
+"""
+
+# 转义时原样保留的片段，以及需要处理的单个字符
+ESCAPE_TOKEN = re.compile(
+    r'<!\[CDATA\[.*?\]\]>'
+    r'|<!--.*?-->'
+    r'|</?[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>'
+    r'|\\.'
+    r'|&(?:#x[0-9a-fA-F]+|#\d+|[A-Za-z]\w*);'
+    r'|[&<\'"]',
+    re.DOTALL)
+ESCAPES = {'&': '&amp;', '<': '&lt;', "'": "\\'"}
+# 预检：找不到需要转义的字符时原样返回（大部分已经是合法内容的单元格只扫描这一遍）；
+# 引号片段内的撇号同样算作需要转义，由完整扫描判断
+NEEDS_ESCAPE = re.compile(
+    r'&(?!#x[0-9a-fA-F]+;|#\d+;|[A-Za-z]\w*;)'
+    r'|<(?!/?[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>|!--.*?-->|!\[CDATA\[.*?\]\]>)'
+    r"|(?<!\\)'|\\\\'",
+    re.DOTALL)
+
+# 反转义时只还原转义会重新生成的片段：&amp; 后面不像实体、&lt; 后面不像标签时才还原
+UNESCAPE_TOKEN = re.compile(
+    r'<!\[CDATA\[.*?\]\]>'
+    r'|<!--.*?-->'
+    r'|</?[A-Za-z][\w:.-]*(?:\s[^<>]*)?/?>'
+    r'|\\.'
+    r'|&amp;(?!#x[0-9a-fA-F]+;|#\d+;|[A-Za-z]\w*;)'
+    r'|&lt;(?![A-Za-z/!])'
+    r'|"',
+    re.DOTALL)
+UNESCAPES = {"\\'": "'", '&amp;': '&', '&lt;': '<'}
+NEEDS_UNESCAPE = re.compile(r"\\'|&amp;|&lt;")
+REFERENCE_PREFIXES = ('@', '?')
+# 整段为资源引用或主题属性引用时开头的 @ ? 是语法，不加反斜杠
+REFERENCE = re.compile(r'@(?:null|empty|\+?(?:[\w.]+:)?[A-Za-z]\w*/[\w.]+)'
+                       r'|\?(?:[\w.]+:)?(?:attr/)?[A-Za-z_][\w.]*')
+
+
+def _needs_prefix(text):
+    """开头的 @ ? 需要加反斜杠（不是资源引用）"""
+    return text[0] in REFERENCE_PREFIXES and not REFERENCE.fullmatch(text)
+
+
+def _substitute(pattern, table, text):
+    """按 pattern 扫描并替换 table 中的片段；双引号片段内的撇号（' 与 \\'）保持不变"""
+    parts = []
+    pos = 0
+    quoted = False
+    for match in pattern.finditer(text):
+        token = match.group()
+        if token == '"':
+            quoted = not quoted
+            continue
+        replacement = table.get(token)
+        if replacement is None or quoted and token in ("'", "\\'"):
+            continue
+        parts.append(text[pos:match.start()])
+        parts.append(replacement)
+        pos = match.end()
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def escape_xml_chars(text):
+    """单元格文本转为 strings.xml 中 <string> 的内容（幂等，合法内容原样返回）"""
+    if not text:
+        return text
+    if not _needs_prefix(text) and not NEEDS_ESCAPE.search(text):
+        return text
+    return _escape_full(text)
+
+
+def _escape_full(text):
+    escaped = _substitute(ESCAPE_TOKEN, ESCAPES, text)
+    return '\\' + escaped if _needs_prefix(text) else escaped
+
+
+def unescape_xml_chars(text):
+    """escape_xml_chars 的逆操作：strings.xml 中的内容转为单元格文本，去掉转义会重新加上的反斜杠和实体"""
+    if not text:
+        return text
+    prefix = ''
+    if text[0] == '\\' and text[1:2] in REFERENCE_PREFIXES and not REFERENCE.fullmatch(text[1:]):
+        prefix, text = text[1], text[2:]
+    if NEEDS_UNESCAPE.search(text):
+        text = _substitute(UNESCAPE_TOKEN, UNESCAPES, text)
+    return prefix + text
+
+
+def escape_values(values):
+    """批量转义一列值，返回列表；预检内联在循环中，省去逐个调用的开销"""
+    search = NEEDS_ESCAPE.search
+    return [_escape_full(value) if value and (value[0] in REFERENCE_PREFIXES or search(value)) else value
+            for value in values]
+
+
+def escape_mapping(data):
+    """批量转义 {key: 值}，返回新的 dict"""
+    return dict(zip(data, escape_values(data.values())))
+
+
+def _legacy_escape_xml_chars(text):
+    """旧实现，仅用于 --bench 对比"""
+    if not text:
+        return text
+    text = re.sub(r'&(amp|lt|gt|apos|quot|#\d+);', r'###ENTITY###\1;', text)
+    text = text.replace('&', '&amp;')
+    text = text.replace('###ENTITY###', '&')
+    text = re.sub(r'\\\'', r'###APOS###', text)
+    text = text.replace("'", "\\'")
+    text = text.replace('###APOS###', "\\'")
+    return text
+
+
+# 自检用的随机文本由这些片段拼接而成
+CHECK_FRAGMENTS = ['a', 'Hello', ' ', '\n', '&', '&amp;', '&lt;', '&#39;', '&#x1F600;', '&nbsp;', '&amp;lt;', '<', '>',
+                   '<b>', '</b>', '<xliff:g id="n" example=\'5\'>', '</xliff:g>', '<br/>', '<!-- c -->',
+                   '<![CDATA[<i>&</i>]]>', "'", "\\'", '"', '\\"', '\\', '\\\\', '\\n', '@', '?', '%1$s', '{name}',
+                   '###ENTITY###', '###APOS###', '中文', 'a < b']
+
+
+def _sample_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(CHECK_FRAGMENTS) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+
+def self_check(texts):
+    """往返自检：预检不漏判、escape 幂等；s = escape(文本) 为合法内容，escape(s) == s 且 escape(unescape(s)) == s
+
+    返回失败的 (原文, 说明) 列表；资源目录中的值本身就是合法内容，同样满足这些性质
+    """
+    failures = []
+    for text in texts:
+        escaped = escape_xml_chars(text)
+        if text and escaped != _escape_full(text):
+            failures.append((text, '预检漏判'))
+        elif escape_xml_chars(escaped) != escaped:
+            failures.append((text, '转义不幂等'))
+        elif escape_xml_chars(unescape_xml_chars(escaped)) != escaped:
+            failures.append((text, '反转义后不能还原'))
+    return failures
+
+
+def check_raw(values):
+    """合法的 strings.xml 内容（资源目录中的值）导出再导入不变：escape(s) == s 且 escape(unescape(s)) == s"""
+    failures = []
+    for value in values:
+        if escape_xml_chars(value) != value:
+            failures.append((value, '合法内容被转义'))
+        elif escape_xml_chars(unescape_xml_chars(value)) != value:
+            failures.append((value, '导出再导入后改变'))
+    return failures
+
+
+def _load_corpus(res_dir):
+    """资源目录中所有语言的全部值；作为字符串导入时与导出的单元格内容相同"""
+    try:
+        from .processor import load_resources
+    except ImportError:
+        from processor import load_resources
+    _, lang_codes, all_langs = load_resources(res_dir)
+    return [value for data in all_langs.values() for value in data.values()]
+
+
+def _best_time(func, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench(values, rounds=5):
+    """比较旧实现、逐个转义与批量转义的耗时，返回 {名称: 秒}"""
+    return {
+        'legacy': _best_time(lambda: [_legacy_escape_xml_chars(v) for v in values], rounds),
+        'escape_xml_chars': _best_time(lambda: [escape_xml_chars(v) for v in values], rounds),
+        'escape_values': _best_time(lambda: escape_values(values), rounds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='strings.xml 转义：往返自检与微基准')
+    parser.add_argument('--bench', action='store_true', help='运行往返自检并与旧实现比较耗时')
+    parser.add_argument('res_dir', nargs='?', help='用该资源目录中的全部值作为语料（默认使用随机生成的文本）')
+    parser.add_argument('--rounds', type=int, default=5, help='每种实现重复次数，取最快一次（默认 5）')
+    parser.add_argument('--samples', type=int, default=100000, help='随机文本条数（默认 100000）')
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    values = _load_corpus(args.res_dir) if args.res_dir else _sample_texts(args.samples)
+    failures = self_check(values + _sample_texts(args.samples, seed=1))
+    if args.res_dir:
+        failures += check_raw(values)
+    print(f"往返自检：{len(values) + args.samples} 条，失败 {len(failures)} 条")
+    for text, reason in failures[:10]:
+        print(f"  {reason}：{text!r}")
+    changed = sum(1 for v in values if _legacy_escape_xml_chars(v) != escape_xml_chars(v))
+    print(f"与旧实现结果不同：{changed} 条")
+
+    timings = bench(values, args.rounds)
+    legacy = timings['legacy']
+    for name, seconds in timings.items():
+        print(f"{name:<18} {seconds * 1000:9.1f} ms  {legacy / seconds if seconds else 0:5.2f}x")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
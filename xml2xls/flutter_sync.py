@@ -0,0 +1,404 @@
+import argparse
+import html
+import json
+import os
+import re
+
+try:
+    from .processor import (NULL_PROFILER, default_string_files, discover_locales, parse_string_files, string_files,
+                            write_values_strings)
+    from .qualifiers import normalize_locale, parse_locale
+    from .profiler import add_profile_arguments, profiler_from_args, report
+    from .progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
+    from .validation import FORMAT_SPECIFIER
+except ImportError:
+    from processor import (NULL_PROFILER, default_string_files, discover_locales, parse_string_files, string_files,
+                           write_values_strings)
+    from qualifiers import normalize_locale, parse_locale
+    from profiler import add_profile_arguments, profiler_from_args, report
+    from progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
+    from validation import FORMAT_SPECIFIER
+
+"""
+Android 资源与 Flutter 文案的直接转换
+
+同一功能同时存在于原生 Android 应用和 Flutter 模块时，不再经过 processor.py 导出、
+i18n_manager.py / translations_manager.py 导入两个 xlsx，而是逐个语言直接从解析结果写出目标文件：
+  arb   Flutter gen_l10n 的 app_<语言>.arb（语言代码用下划线，如 zh_CN）
+  json  easy_localization 的 <语言>.json（语言代码用连字符，如 zh-CN）
+
+转换规则：
+  占位符      %1$s / %2$d  <->  {name}；名称取自 Flutter 模板文件（ARB 的 @key.placeholders 或模板文案中出现的顺序），
+              没有时为 {arg1}、{arg2}；转回 Android 时优先沿用默认语言中原有的格式（如 %1$.2f）
+  语言目录    values-zh-rCN <-> zh_CN，values-b+sr+Latn <-> sr_Latn，values <-> 模板语言（默认 en）
+  转义        Android 的 \\' \\" \\n、XML 实体和 CDATA 转为纯文本，反向时重新转义；内联标签原样保留
+
+只更新两侧都有的 key 和新增的 key，目标文件中独有的 key 保留不动；内容没有变化的文件不会重写。
+ICU plural/select 文案和 easy_localization 的嵌套对象无法表示为 <string>，转回 Android 时跳过。
+
+用法：
+python3 flutter_sync.py to-flutter app/src/main/res lib/l10n [--format arb|json] [--template-locale en]
+python3 flutter_sync.py to-android lib/l10n app/src/main/res [--format arb|json] [--template-locale en]
+"""
+
+FORMATS = ('arb', 'json')
+DEFAULT_ARB_PREFIX = 'app_'
+
+# Android 格式说明符：%s、%1$s、%.2f、%,d（与导入校验相同的定义，见 validation.py）；%% 与 %n 为转义
+ANDROID_PLACEHOLDER = re.compile(FORMAT_SPECIFIER + r'|%%|%n')
+# Android 文案中需要还原的片段：CDATA、\uXXXX、反斜杠转义、XML 实体、未转义的双引号
+ANDROID_ESCAPE = re.compile(r'<!\[CDATA\[(.*?)\]\]>|\\u([0-9a-fA-F]{4})|\\(.)|&(?:#x[0-9a-fA-F]+|#\d+|[a-z]+);|"',
+                            re.DOTALL)
+ANDROID_UNESCAPES = {'n': '\n', 't': '\t'}
+XML_ENTITIES = {'&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"', '&apos;': "'"}
+# Flutter 占位符：{name}；easy_localization 的位置参数为 {}
+FLUTTER_PLACEHOLDER = re.compile(r'\{(\w*)\}')
+# ICU plural/select，无法转为单个 <string>
+ICU_MESSAGE = re.compile(r'\{\s*\w+\s*,\s*(?:plural|select|selectordinal)\s*,')
+# 不是标签开头的 <，转为 &lt;
+BARE_LT = re.compile(r'<(?!/?[A-Za-z!?])')
+ARB_TYPES = {'d': 'int', 'f': 'double', 'e': 'double', 'g': 'double'}
+
+
+def android_to_flutter_locale(qualifier, separator='_'):
+    """values 目录的语言限定符转为 Flutter 语言代码：zh-rCN -> zh_CN，b+sr+Latn -> sr_Latn；非语言限定符返回 None"""
+    parsed = parse_locale(qualifier)
+    if parsed is None:
+        return None
+    language, script, region, variants = parsed
+    return separator.join([language] + [subtag for subtag in (script, region) if subtag] + list(variants))
+
+
+def flutter_to_android_locale(locale):
+    """Flutter 语言代码转为 values 目录的限定符：zh_CN / zh-CN -> zh-rCN，sr_Latn -> b+sr+Latn，es_419 -> b+es+419
+
+    结果按 discover_locales 的写法规范化（sr_latn -> b+sr+Latn），才能找到已有的目录
+    """
+    parts = re.split(r'[-_]', locale)
+    language = parts[0].lower()
+    if len(parts) == 1:
+        return language
+    # 旧写法的地区只能是两个字母
+    if len(parts) == 2 and re.fullmatch(r'[A-Za-z]{2}', parts[1]):
+        return normalize_locale(f'{language}-r{parts[1].upper()}')
+    return normalize_locale('b+' + '+'.join([language] + parts[1:]))
+
+
+def unescape_android(value):
+    """strings.xml 中的原始内容转为纯文本（内联标签保留）"""
+
+    def replace(match):
+        group = match.lastindex
+        if group == 3:
+            escaped = match.group(3)
+            return ANDROID_UNESCAPES.get(escaped, escaped)
+        if group == 1:
+            return match.group(1)
+        if group == 2:
+            return chr(int(match.group(2), 16))
+        token = match.group(0)
+        if token == '"':
+            # 未转义的双引号只用于保留空白，Android 运行时会去掉
+            return ''
+        return XML_ENTITIES.get(token) or html.unescape(token)
+
+    return ANDROID_ESCAPE.sub(replace, value)
+
+
+def escape_android(text, has_placeholders=False):
+    """纯文本转为 strings.xml 中的内容；has_placeholders 为 True 时字面量 % 写成 %%
+
+    字面量双引号写成 \\"（裸引号是 Android 语法），与 escaping 的规则一致：结果经 escape_xml_chars 不变
+    """
+    text = (text.replace('\\', '\\\\').replace("'", "\\'").replace('"', '\\"')
+            .replace('\n', '\\n').replace('\t', '\\t'))
+    text = re.sub(r'&(?!(?:#x[0-9a-fA-F]+|#\d+|[a-z]+);)', '&amp;', text)
+    text = BARE_LT.sub('&lt;', text)
+    if has_placeholders:
+        text = text.replace('%', '%%')
+    if text[:1] in ('@', '?'):
+        text = '\\' + text
+    return text
+
+
+def android_placeholders(value):
+    """返回 {序号: 格式说明符}，如 {1: '%1$s', 2: '%2$.2f'}；未写序号的占位符按出现顺序编号"""
+    specs = {}
+    position = 0
+    for match in ANDROID_PLACEHOLDER.finditer(value):
+        if match.group(3) is None:
+            continue
+        position += 1
+        index = int(match.group(1)) if match.group(1) else position
+        specs[index] = f'%{index}${match.group(2)}{match.group(3)}'
+    return specs
+
+
+def android_to_flutter_text(value, names=()):
+    """Android 原始内容转为 Flutter 文案，返回 (文案, [(名称, 转换字符)])"""
+    text = unescape_android(value) if ('\\' in value or '&' in value or '"' in value or '<![' in value) else value
+    placeholders = []
+    position = 0
+
+    def replace(match):
+        nonlocal position
+        explicit, _, conversion = match.groups()
+        if conversion is None:
+            return '%' if match.group(0) == '%%' else '\n'
+        position += 1
+        index = int(explicit) if explicit else position
+        name = names[index - 1] if index - 1 < len(names) else f'arg{index}'
+        placeholders.append((name, conversion))
+        return '{' + name + '}'
+
+    # 没有格式说明符的文案不会经过 String.format，其中的 % 都是字面量（%% 与 %n 也原样显示）
+    if '%' not in text or not any(match.group(3) for match in ANDROID_PLACEHOLDER.finditer(text)):
+        return text, placeholders
+    return ANDROID_PLACEHOLDER.sub(replace, text), placeholders
+
+
+def flutter_to_android_text(text, names=(), specs=None, types=None):
+    """Flutter 文案转为 Android 原始内容
+
+    names 为模板中占位符名称的顺序（决定 %n$ 的序号），specs 为默认语言中原有的 {序号: 格式说明符}，
+    types 为 ARB 元数据中的 {名称: 类型}。ICU plural/select 文案返回 None。
+    """
+    if ICU_MESSAGE.search(text):
+        return None
+    names = list(names)
+    specs = specs or {}
+    types = types or {}
+    pieces = []
+    pos = 0
+    position = 0
+    for match in FLUTTER_PLACEHOLDER.finditer(text):
+        pieces.append((False, text[pos:match.start()]))
+        name = match.group(1)
+        position += 1
+        if not name:
+            index = position
+        else:
+            if name not in names:
+                names.append(name)
+            index = names.index(name) + 1
+        spec = specs.get(index)
+        if spec is None:
+            conversion = {'int': 'd', 'double': 'f', 'num': 'f'}.get(types.get(name), 's')
+            spec = f'%{index}${conversion}'
+        pieces.append((True, spec))
+        pos = match.end()
+    pieces.append((False, text[pos:]))
+    has_placeholders = position > 0
+    return ''.join(piece if is_spec else escape_android(piece, has_placeholders) if piece else ''
+                   for is_spec, piece in pieces)
+
+
+def flutter_file_name(locale, fmt, arb_prefix=DEFAULT_ARB_PREFIX):
+    if fmt == 'arb':
+        return f'{arb_prefix}{locale}.arb'
+    return f'{locale}.json'
+
+
+def discover_flutter_files(l10n_dir, fmt, arb_prefix=DEFAULT_ARB_PREFIX):
+    """返回 [(语言代码, 文件路径)]"""
+    files = []
+    for name in sorted(os.listdir(l10n_dir)):
+        if fmt == 'arb':
+            if name.startswith(arb_prefix) and name.endswith('.arb'):
+                files.append((name[len(arb_prefix):-len('.arb')], os.path.join(l10n_dir, name)))
+        elif name.endswith('.json'):
+            files.append((name[:-len('.json')], os.path.join(l10n_dir, name)))
+    return files
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _placeholder_names(data, key):
+    """Flutter 模板中 key 的占位符名称顺序：ARB 元数据优先，其次为文案中出现的顺序"""
+    metadata = data.get('@' + key)
+    if isinstance(metadata, dict) and isinstance(metadata.get('placeholders'), dict):
+        return list(metadata['placeholders'])
+    value = data.get(key)
+    if not isinstance(value, str):
+        return []
+    names = []
+    for name in FLUTTER_PLACEHOLDER.findall(value):
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _write_if_changed(path, data):
+    """写出 JSON（与 Flutter 管理脚本相同的格式），内容未变化时不写，返回是否写入"""
+    content = json.dumps(data, ensure_ascii=False, indent=2)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def android_to_flutter(res_dir, l10n_dir, fmt='arb', template_locale='en', arb_prefix=DEFAULT_ARB_PREFIX,
+                       profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """把 Android 资源写入 Flutter 文案文件，返回 {'locales': 语言数, 'written': 写入的文件列表, 'skipped': 跳过的目录}"""
+    separator = '_' if fmt == 'arb' else '-'
+    with profiler.phase('scan') as p, progress.task('discover', unit='files') as task:
+        locales = [('', default_string_files(res_dir))] + sorted(discover_locales(res_dir))
+        p.items = len(locales)
+        task.advance(len(locales))
+
+    template_path = os.path.join(l10n_dir, flutter_file_name(template_locale, fmt, arb_prefix))
+    template = _load_json(template_path)
+    names_cache = {}
+    written, skipped = [], []
+    with progress.task('merge', total=len(locales), unit='files') as task:
+        for qualifier, xml_paths in locales:
+            locale = template_locale if not qualifier else android_to_flutter_locale(qualifier, separator)
+            if locale is None:
+                skipped.append(qualifier)
+                task.advance(item=qualifier)
+                continue
+            is_template = locale == template_locale
+            with profiler.phase('convert', locale=locale) as p:
+                order, strings, _ = parse_string_files(xml_paths)
+                path = template_path if is_template else \
+                    os.path.join(l10n_dir, flutter_file_name(locale, fmt, arb_prefix))
+                data = template if is_template else _load_json(path)
+                if fmt == 'arb':
+                    data.setdefault('@@locale', locale)
+                for key in order:
+                    names = names_cache.get(key)
+                    if names is None:
+                        names = names_cache[key] = _placeholder_names(template, key)
+                    text, placeholders = android_to_flutter_text(strings[key], names)
+                    data[key] = text
+                    if is_template and fmt == 'arb' and placeholders:
+                        metadata = data.setdefault('@' + key, {})
+                        declared = metadata.setdefault('placeholders', {})
+                        for name, conversion in placeholders:
+                            declared.setdefault(name, {'type': ARB_TYPES.get(conversion.lower(), 'String')})
+                p.items = len(order)
+                if _write_if_changed(path, data):
+                    written.append(path)
+            task.advance(item=locale)
+    return {'locales': len(locales) - len(skipped), 'written': written, 'skipped': skipped}
+
+
+def flutter_to_android(l10n_dir, res_dir, fmt='arb', template_locale='en', arb_prefix=DEFAULT_ARB_PREFIX,
+                       profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """把 Flutter 文案写入 Android 资源，返回 {'locales': 语言数, 'written': 写入的文件列表, 'skipped': 跳过的条目}"""
+    with profiler.phase('scan') as p, progress.task('discover', unit='files') as task:
+        files = discover_flutter_files(l10n_dir, fmt, arb_prefix)
+        p.items = len(files)
+        task.advance(len(files))
+    # 模板语言先写，其他语言的新条目按默认语言的顺序插入
+    files.sort(key=lambda item: re.split(r'[-_]', item[0]) != re.split(r'[-_]', template_locale))
+
+    default_dir = os.path.join(res_dir, 'values')
+    locale_paths = dict(discover_locales(res_dir)) if os.path.isdir(res_dir) else {}
+    template = _load_json(os.path.join(l10n_dir, flutter_file_name(template_locale, fmt, arb_prefix)))
+    _, default_strings, _ = parse_string_files(string_files(default_dir))
+    key_info = {}
+    reference_order = None
+    default_files = None
+    written = []
+    skipped = []
+    with progress.task('merge', total=len(files), unit='files') as task:
+        for locale, path in files:
+            is_template = re.split(r'[-_]', locale) == re.split(r'[-_]', template_locale)
+            if is_template:
+                values_dir, xml_paths = default_dir, string_files(default_dir)
+            else:
+                qualifier = flutter_to_android_locale(locale)
+                xml_paths = locale_paths.get(qualifier, [])
+                values_dir = os.path.dirname(xml_paths[0]) if xml_paths else \
+                    os.path.join(res_dir, f'values-{qualifier}')
+            with profiler.phase('convert', locale=locale) as p:
+                data = template if is_template else _load_json(path)
+                existing = parse_string_files(xml_paths)[1]
+                updates = {}
+                for key, text in data.items():
+                    if key.startswith('@'):
+                        continue
+                    if not isinstance(text, str):
+                        skipped.append(f'{locale}:{key}')
+                        continue
+                    info = key_info.get(key)
+                    if info is None:
+                        names = _placeholder_names(template, key)
+                        metadata = template.get('@' + key)
+                        placeholders = metadata.get('placeholders') if isinstance(metadata, dict) else None
+                        types = {name: (spec or {}).get('type') for name, spec in placeholders.items()} \
+                            if isinstance(placeholders, dict) else {}
+                        info = key_info[key] = (names, android_placeholders(default_strings.get(key, '')), types)
+                    names, specs, types = info
+                    # 语义相同（仅转义写法不同）的条目不改写，避免无意义的 diff
+                    if key in existing and android_to_flutter_text(existing[key], names)[0] == text:
+                        continue
+                    value = flutter_to_android_text(text, names, specs, types)
+                    if value is None:
+                        skipped.append(f'{locale}:{key}')
+                        continue
+                    updates[key] = value
+                del existing
+                if updates:
+                    if is_template:
+                        order = [k for k in data if not k.startswith('@')]
+                        written.extend(write_values_strings(values_dir, updates, order, xml_paths))
+                    else:
+                        if reference_order is None:
+                            # 新条目写入默认语言中同名的字符串文件
+                            reference_order, _, sources = parse_string_files(string_files(default_dir))
+                            default_files = {key: os.path.basename(xml_path) for key, xml_path in sources.items()}
+                        written.extend(write_values_strings(values_dir, updates, reference_order, xml_paths,
+                                                            default_files))
+                p.items = len(updates)
+            task.advance(item=locale)
+    return {'locales': len(files), 'written': written, 'skipped': skipped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Android strings.xml 与 Flutter ARB / easy_localization JSON 直接互转')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_flutter = subparsers.add_parser('to-flutter', help='Android 资源 -> Flutter 文案文件')
+    parser_flutter.add_argument('res_dir', help='资源目录（包含 values/values-xx 的文件夹）')
+    parser_flutter.add_argument('l10n_dir', help='Flutter 文案目录（如 lib/l10n 或 assets/translations）')
+    parser_android = subparsers.add_parser('to-android', help='Flutter 文案文件 -> Android 资源')
+    parser_android.add_argument('l10n_dir', help='Flutter 文案目录（如 lib/l10n 或 assets/translations）')
+    parser_android.add_argument('res_dir', help='资源目录（包含 values/values-xx 的文件夹）')
+    for sub in (parser_flutter, parser_android):
+        sub.add_argument('--format', choices=FORMATS, default='arb',
+                         help='arb：gen_l10n 的 app_<语言>.arb（默认）；json：easy_localization 的 <语言>.json')
+        sub.add_argument('--template-locale', default='en', help='与默认 values 目录对应的语言（默认 en）')
+        sub.add_argument('--arb-prefix', default=DEFAULT_ARB_PREFIX, help='ARB 文件名前缀（默认 app_）')
+        add_profile_arguments(sub)
+        add_progress_arguments(sub)
+
+    args = parser.parse_args()
+    profiler = profiler_from_args(args)
+    progress = progress_from_args(args)
+    with profiler:
+        convert = android_to_flutter if args.command == 'to-flutter' else flutter_to_android
+        source, target = (args.res_dir, args.l10n_dir) if args.command == 'to-flutter' else (args.l10n_dir, args.res_dir)
+        result = convert(source, target, args.format, args.template_locale, args.arb_prefix, profiler, progress)
+    print(f"转换完成：{result['locales']} 种语言，写入 {len(result['written'])} 个文件")
+    if result['skipped']:
+        skipped = result['skipped']
+        print(f"跳过 {len(skipped)} 项：{', '.join(skipped[:10])}{' ...' if len(skipped) > 10 else ''}")
+    report(profiler, args)
+    progress.close()
+
+
+if __name__ == '__main__':
+    main()
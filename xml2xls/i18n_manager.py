@@ -3,13 +3,29 @@ import json
 import argparse
 import pandas as pd
 
+try:
+    from .processor import dedup_rows
+    from .profiler import NULL_PROFILER, add_profile_arguments, profiler_from_args, report
+    from .progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
+    from .validation import add_validate_arguments, check_updates
+    from .xlsx_writer import add_compression_argument, save_dataframe
+except ImportError:
+    from processor import dedup_rows
+    from profiler import NULL_PROFILER, add_profile_arguments, profiler_from_args, report
+    from progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
+    from validation import add_validate_arguments, check_updates
+    from xlsx_writer import add_compression_argument, save_dataframe
+
 # Flutter 项目中 .arb 文件所在的目录，相对于脚本执行位置
 DEFAULT_L10N_DIR = 'lib/l10n'
 # 默认的模板语言文件名
 DEFAULT_TEMPLATE_LANG_FILE = 'app_en.arb'
+# 校验占位符时作为基准的模板语言代码
+TEMPLATE_LANG_CODE = 'en'
 
 
-def export_translations(l10n_dir, output_file):
+def export_translations(l10n_dir, output_file, profiler=NULL_PROFILER, progress=NULL_PROGRESS, dedup=False,
+                        compression='default'):
     print(f"Exporting translations from {l10n_dir} to {output_file}...")
     all_translations = {}
     languages = []
@@ -21,7 +37,10 @@ def export_translations(l10n_dir, output_file):
         return
 
     # 1. 读取所有 .arb 文件并提取语言代码
-    arb_files = [f for f in os.listdir(l10n_dir) if f.startswith('app_') and f.endswith('.arb')]
+    with profiler.phase('scan') as p, progress.task('discover', unit='files') as task:
+        arb_files = [f for f in os.listdir(l10n_dir) if f.startswith('app_') and f.endswith('.arb')]
+        p.items = len(arb_files)
+        task.advance(len(arb_files))
 
     if not arb_files:
         print(f"No .arb files found in '{l10n_dir}'.")
@@ -42,65 +61,94 @@ def export_translations(l10n_dir, output_file):
     template_lang_code = template_file_name.replace('app_', '').replace('.arb', '')
     languages.append(template_lang_code)  # 模板语言放第一位
 
-    # 读取模板文件以获取所有 key
-    try:
-        with open(os.path.join(l10n_dir, template_file_name), 'r', encoding='utf-8') as f:
-            template_data = json.load(f)
-            master_keys = list(template_data.keys())
-            all_translations[template_lang_code] = template_data
-    except Exception as e:
-        print(f"Error reading template file {template_file_name}: {e}")
-        return
-
-    # 读取其他语言文件
-    for arb_file in arb_files:
-        lang_code = arb_file.replace('app_', '').replace('.arb', '')
-        if lang_code == template_lang_code:  # 跳过已处理的模板文件
-            continue
-        languages.append(lang_code)
+    with progress.task('parse', total=len(arb_files), unit='locales') as parse_task:
+        # 读取模板文件以获取所有 key
         try:
-            with open(os.path.join(l10n_dir, arb_file), 'r', encoding='utf-8') as f:
-                all_translations[lang_code] = json.load(f)
+            with profiler.phase('parse', locale=template_lang_code) as p, \
+                    open(os.path.join(l10n_dir, template_file_name), 'r', encoding='utf-8') as f:
+                template_data = json.load(f)
+                master_keys = list(template_data.keys())
+                all_translations[template_lang_code] = template_data
+                p.items = len(master_keys)
+            parse_task.advance(item=template_lang_code)
         except Exception as e:
-            print(f"Error reading file {arb_file}: {e}")
-            # 即使某个文件读取失败，也继续处理其他文件，但记录错误
-            all_translations[lang_code] = {}
+            print(f"Error reading template file {template_file_name}: {e}")
+            return
+
+        # 读取其他语言文件
+        for arb_file in arb_files:
+            lang_code = arb_file.replace('app_', '').replace('.arb', '')
+            if lang_code == template_lang_code:  # 跳过已处理的模板文件
+                continue
+            languages.append(lang_code)
+            try:
+                with profiler.phase('parse', locale=lang_code) as p, \
+                        open(os.path.join(l10n_dir, arb_file), 'r', encoding='utf-8') as f:
+                    all_translations[lang_code] = json.load(f)
+                    p.items = len(all_translations[lang_code])
+            except Exception as e:
+                print(f"Error reading file {arb_file}: {e}")
+                # 即使某个文件读取失败，也继续处理其他文件，但记录错误
+                all_translations[lang_code] = {}
+            parse_task.advance(item=lang_code)
 
     # 2. 创建 DataFrame
     df_data = {'key': master_keys}
 
     # 3. 填充翻译数据
-    for lang in languages:
-        lang_translations = all_translations.get(lang, {})
-        column_data = []
-        for key in master_keys:
-            value = lang_translations.get(key, '')
-            if isinstance(value, (dict, list)):
-                # 如果值是字典或列表，则将其序列化为 JSON 字符串
-                column_data.append(json.dumps(value, ensure_ascii=False))
-            else:
-                # 其他类型的值，确保转换为字符串
-                column_data.append(str(value))
-        df_data[lang] = column_data
+    with profiler.phase('build_matrix') as p:
+        for lang in languages:
+            lang_translations = all_translations.get(lang, {})
+            column_data = []
+            for key in master_keys:
+                value = lang_translations.get(key, '')
+                if isinstance(value, (dict, list)):
+                    # 如果值是字典或列表，则将其序列化为 JSON 字符串
+                    column_data.append(json.dumps(value, ensure_ascii=False))
+                else:
+                    # 其他类型的值，确保转换为字符串
+                    column_data.append(str(value))
+            df_data[lang] = column_data
+            p.items += len(column_data)
 
-    df = pd.DataFrame(df_data)
+    with profiler.phase('build_workbook') as p:
+        df = pd.DataFrame(df_data)
+        p.items = df.size
+
+    if dedup:
+        # 模板语言文本相同、译文不冲突的行合并为一行（见 processor.dedup_rows），key 列为换行分隔的全部 key，导入时展开；
+        # @key 元数据行（占位符、说明）属于各自的 key，不参与合并
+        with profiler.phase('dedup') as p:
+            key_count = len(df)
+            columns = ['key'] + languages
+            df = pd.DataFrame(dedup_rows(df[columns].values.tolist(), columns, keep=lambda key: key.startswith('@')),
+                              columns=columns)
+            p.items = len(df)
+        print(f"Deduplicated {key_count} keys into {len(df)} translation units")
 
     # 4. 保存到文件
     try:
-        if output_file.endswith('.xlsx'):
-            df.to_excel(output_file, index=False)
-        elif output_file.endswith('.csv'):
-            df.to_csv(output_file, index=False, encoding='utf-8-sig')  # utf-8-sig for Excel compatibility with CSV
-        else:
-            print(f"Error: Unsupported output file format. Please use .xlsx or .csv. Defaulting to .xlsx")
-            df.to_excel(output_file + '.xlsx' if '.' not in output_file else output_file.split('.')[0] + '.xlsx',
-                        index=False)
+        # pandas 一次性写出所有行，行数与字节数在写完后一起报告
+        with profiler.phase('save'), progress.task('write', total=len(df), unit='rows') as rows_task, \
+                progress.task('save', unit='bytes') as task:
+            saved_file = output_file
+            if output_file.endswith('.xlsx'):
+                save_dataframe(df, output_file, compression)
+            elif output_file.endswith('.csv'):
+                df.to_csv(output_file, index=False, encoding='utf-8-sig')  # utf-8-sig for Excel compatibility with CSV
+            else:
+                print(f"Error: Unsupported output file format. Please use .xlsx or .csv. Defaulting to .xlsx")
+                saved_file = output_file + '.xlsx' if '.' not in output_file else output_file.split('.')[0] + '.xlsx'
+                save_dataframe(df, saved_file, compression)
+            rows_task.advance(len(df))
+            task.advance(os.path.getsize(saved_file), item=saved_file)
         print(f"Translations successfully exported to {output_file}")
     except Exception as e:
         print(f"Error writing to output file {output_file}: {e}")
 
 
-def import_translations(input_file, l10n_dir):
+def import_translations(input_file, l10n_dir, profiler=NULL_PROFILER, progress=NULL_PROGRESS, strict=False,
+                        validate_report=None):
     print(f"Importing translations from {input_file} to {l10n_dir}...")
 
     # 确保 l10n_dir 存在，如果不存在则创建
@@ -114,13 +162,16 @@ def import_translations(input_file, l10n_dir):
 
     # 1. 读取表格数据
     try:
-        if input_file.endswith('.xlsx'):
-            df = pd.read_excel(input_file)
-        elif input_file.endswith('.csv'):
-            df = pd.read_csv(input_file)
-        else:
-            print(f"Error: Unsupported input file format. Please use .xlsx or .csv.")
-            return
+        with profiler.phase('load_workbook') as p, progress.task('read', unit='rows') as task:
+            if input_file.endswith('.xlsx'):
+                df = pd.read_excel(input_file)
+            elif input_file.endswith('.csv'):
+                df = pd.read_csv(input_file)
+            else:
+                print(f"Error: Unsupported input file format. Please use .xlsx or .csv.")
+                return
+            p.items = len(df)
+            task.advance(len(df))
     except FileNotFoundError:
         print(f"Error: Input file '{input_file}' not found.")
         return
@@ -133,6 +184,10 @@ def import_translations(input_file, l10n_dir):
         print(f"Error: 'key' column not found in {input_file}.")
         return
 
+    # 去重导出的行中 key 列可能是换行分隔的多个 key，展开为每个 key 一行
+    df['key'] = df['key'].map(lambda key: key.split('\n') if isinstance(key, str) else key)
+    df = df.explode('key', ignore_index=True)
+
     # 2. 获取语言列 (除了 'key' 列之外的所有列)
     language_columns = [col for col in df.columns if col != 'key']
 
@@ -140,54 +195,69 @@ def import_translations(input_file, l10n_dir):
         print(f"No language columns found in {input_file} (expected columns like 'en', 'zh', etc. besides 'key').")
         return
 
+    # 写入前以模板语言为准校验各语言的 {name} 占位符与标签
+    if TEMPLATE_LANG_CODE in language_columns:
+        lang_data = {lang: {key: value for key, value in zip(df['key'], df[lang]) if isinstance(value, str)}
+                     for lang in language_columns}
+        try:
+            check_updates(lang_data[TEMPLATE_LANG_CODE], lang_data, 'flutter', strict, validate_report,
+                          TEMPLATE_LANG_CODE, profiler, progress)
+        except ValueError as e:
+            print(f"Error: {e}")
+            raise
+
     # 3. 遍历每种语言并生成 .arb 文件
-    for lang_code in language_columns:
-        arb_file_path = os.path.join(l10n_dir, f'app_{lang_code}.arb')
-        # 尝试读取现有的 .arb 文件以支持增量更新
-        translations = {}
-        if os.path.exists(arb_file_path):
-            try:
-                with open(arb_file_path, 'r', encoding='utf-8') as f_existing:
-                    translations = json.load(f_existing)
-            except Exception as e:
-                print(
-                    f"Warning: Could not read existing file {arb_file_path} for merging. It will be overwritten. Error: {e}")
-                translations = {}  # 如果读取失败，则重置为空字典，相当于覆盖写入
-        else:
-            translations = {}  # 如果文件不存在，则初始化为空字典
-        for index, row in df.iterrows():
-            key = row['key']
-            # 处理 NaN 或 None 值，转换为空字符串
-            translation_value = row[lang_code]
-            if pd.isna(translation_value):
-                translation_value = ""
-            else:
-                # 尝试将字符串解析为 JSON 对象
-                if isinstance(translation_value, str):
+    with progress.task('merge', total=len(language_columns), unit='files') as task:
+        for lang_code in language_columns:
+            with profiler.phase('merge', locale=lang_code) as p:
+                arb_file_path = os.path.join(l10n_dir, f'app_{lang_code}.arb')
+                # 尝试读取现有的 .arb 文件以支持增量更新
+                translations = {}
+                if os.path.exists(arb_file_path):
                     try:
-                        # 只有当字符串看起来像一个JSON对象或数组时才尝试解析
-                        if (translation_value.strip().startswith('{') and translation_value.strip().endswith('}')) or \
-                                (translation_value.strip().startswith('[') and translation_value.strip().endswith(']')):
-                            parsed_json = json.loads(translation_value)
-                            translations[key] = parsed_json
-                        else:
-                            translations[key] = str(translation_value)
-                    except json.JSONDecodeError:
-                        # 如果解析失败，则保持为字符串
-                        translations[key] = str(translation_value)
+                        with open(arb_file_path, 'r', encoding='utf-8') as f_existing:
+                            translations = json.load(f_existing)
+                    except Exception as e:
+                        print(
+                            f"Warning: Could not read existing file {arb_file_path} for merging. It will be overwritten. Error: {e}")
+                        translations = {}  # 如果读取失败，则重置为空字典，相当于覆盖写入
                 else:
-                    # 如果不是字符串（例如，已经是数字或布尔值），直接使用
-                    translations[key] = translation_value
-            # 对于表格中没有的 key，但存在于原 .arb 文件中的，保留它们
-            # (这一步通过先加载现有 translations 已经隐式完成)
+                    translations = {}  # 如果文件不存在，则初始化为空字典
+                for index, row in df.iterrows():
+                    key = row['key']
+                    # 处理 NaN 或 None 值，转换为空字符串
+                    translation_value = row[lang_code]
+                    if pd.isna(translation_value):
+                        translation_value = ""
+                    else:
+                        # 尝试将字符串解析为 JSON 对象
+                        if isinstance(translation_value, str):
+                            try:
+                                # 只有当字符串看起来像一个JSON对象或数组时才尝试解析
+                                if (translation_value.strip().startswith('{') and translation_value.strip().endswith('}')) or \
+                                        (translation_value.strip().startswith('[') and translation_value.strip().endswith(']')):
+                                    parsed_json = json.loads(translation_value)
+                                    translations[key] = parsed_json
+                                else:
+                                    translations[key] = str(translation_value)
+                            except json.JSONDecodeError:
+                                # 如果解析失败，则保持为字符串
+                                translations[key] = str(translation_value)
+                        else:
+                            # 如果不是字符串（例如，已经是数字或布尔值），直接使用
+                            translations[key] = translation_value
+                    # 对于表格中没有的 key，但存在于原 .arb 文件中的，保留它们
+                    # (这一步通过先加载现有 translations 已经隐式完成)
 
-        # 写入 .arb 文件
-        try:
-            with open(arb_file_path, 'w', encoding='utf-8') as f:
-                json.dump(translations, f, ensure_ascii=False, indent=2)
-            print(f"Successfully imported translations for '{lang_code}' to {arb_file_path}")
-        except Exception as e:
-            print(f"Error writing to {arb_file_path}: {e}")
+                # 写入 .arb 文件
+                try:
+                    with open(arb_file_path, 'w', encoding='utf-8') as f:
+                        json.dump(translations, f, ensure_ascii=False, indent=2)
+                    p.items = len(translations)
+                    print(f"Successfully imported translations for '{lang_code}' to {arb_file_path}")
+                except Exception as e:
+                    print(f"Error writing to {arb_file_path}: {e}")
+            task.advance(item=lang_code)
 
     print("Import process completed.")
 
@@ -202,7 +272,14 @@ def main():
                                help=f'Directory containing .arb files (default: {DEFAULT_L10N_DIR})')
     parser_export.add_argument('--output', type=str, default='translations.xlsx',
                                help='Output spreadsheet file (e.g., translations.xlsx or translations.csv)')
-    parser_export.set_defaults(func=lambda args: export_translations(args.l10n_dir, args.output))
+    parser_export.add_argument('--dedup', action='store_true',
+                               help='Merge rows with the same template text and non-conflicting translations')
+    add_compression_argument(parser_export)
+    add_profile_arguments(parser_export)
+    add_progress_arguments(parser_export)
+    parser_export.set_defaults(func=lambda args, profiler, progress: export_translations(args.l10n_dir, args.output,
+                                                                                          profiler, progress, args.dedup,
+                                                                                          args.compression))
 
     # Import command
     parser_import = subparsers.add_parser('import', help='Import translations from a spreadsheet to .arb files.')
@@ -210,10 +287,20 @@ def main():
                                help=f'Directory to save .arb files (default: {DEFAULT_L10N_DIR})')
     parser_import.add_argument('--input', type=str, required=True,
                                help='Input spreadsheet file (e.g., translations.xlsx or translations.csv)')
-    parser_import.set_defaults(func=lambda args: import_translations(args.input, args.l10n_dir))
+    add_validate_arguments(parser_import)
+    add_profile_arguments(parser_import)
+    add_progress_arguments(parser_import)
+    parser_import.set_defaults(func=lambda args, profiler, progress: import_translations(args.input, args.l10n_dir,
+                                                                                          profiler, progress, args.strict,
+                                                                                          args.validate_report))
 
     args = parser.parse_args()
-    args.func(args)
+    profiler = profiler_from_args(args)
+    progress = progress_from_args(args)
+    with profiler:
+        args.func(args, profiler, progress)
+    report(profiler, args)
+    progress.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,219 @@
+import os
+import queue
+import threading
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+try:
+    from .processor import (NULL_PROFILER, STALE_FILL, default_string_files, discover_locales, iter_export_rows,
+                            parse_strings_content)
+    from .progress import NULL_PROGRESS
+    from .xlsx_writer import save_workbook
+except ImportError:
+    from processor import (NULL_PROFILER, STALE_FILL, default_string_files, discover_locales, iter_export_rows,
+                           parse_strings_content)
+    from progress import NULL_PROGRESS
+    from xlsx_writer import save_workbook
+
+"""
+流水线导出
+
+将导出拆成四个阶段，阶段之间用有界队列连接，各阶段在不同线程中重叠执行：
+  read      多个读取线程并发读取并解码各语言的字符串文件
+  tokenize  主线程按到达顺序解析已读取的文件内容
+  assemble  主线程逐行组装完整翻译表 / 未翻译表的行
+  write     写入线程把行追加到 write_only 工作簿（行在追加时即序列化到临时文件）
+
+在网络挂载的代码目录上，文件读取延迟会被解析过程掩盖；行的序列化也与组装同时进行。
+有界队列保证了读取再快也只会有 queue_size 个文件内容、queue_size 批行在内存中排队。
+"""
+
+_DONE = object()
+# 读取线程放入队列、主线程取出时的等待间隔（秒），期间检查是否需要停止
+_POLL_INTERVAL = 0.05
+
+
+def _read_worker(tasks, raw_queue, stop, failures):
+    """读取线程：出错时记下异常并通知其他线程停止；队列满时定期检查 stop，不会在 put() 上永远阻塞"""
+    while not stop.is_set():
+        try:
+            lang_code, xml_paths = tasks.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            contents = []
+            for xml_path in xml_paths:
+                with open(xml_path, 'r', encoding='utf-8') as f:
+                    contents.append(f.read())
+        except Exception as e:
+            failures.append(e)
+            stop.set()
+            return
+        while not stop.is_set():
+            try:
+                raw_queue.put((lang_code, contents), timeout=_POLL_INTERVAL)
+                break
+            except queue.Full:
+                pass
+
+
+def _next_read(raw_queue, failures):
+    """取出下一份已读取的内容；任一读取线程出错时立即抛出它的异常"""
+    while True:
+        if failures:
+            raise failures[0]
+        try:
+            return raw_queue.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+
+
+def _parse_contents(contents):
+    """解析同一语言的多个字符串文件内容，同名条目以先出现的为准（与 parse_string_files 一致）"""
+    if len(contents) == 1:
+        return parse_strings_content(contents[0])
+    order = []
+    strings = {}
+    for content in contents:
+        file_order, file_strings = parse_strings_content(content)
+        for name in file_order:
+            if name not in strings:
+                order.append(name)
+                strings[name] = file_strings[name]
+    return order, strings
+
+
+def read_and_parse(res_dir, read_workers=8, queue_size=16, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """并发读取、顺序解析，返回与 load_resources() 相同结构的结果"""
+    with profiler.phase('scan') as p, progress.task('discover', unit='files') as task:
+        locales = [('en', default_string_files(res_dir))] + discover_locales(res_dir)
+        p.items = len(locales)
+        task.advance(len(locales))
+
+    tasks = queue.Queue()
+    for item in locales:
+        tasks.put(item)
+    raw_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    failures = []
+    readers = [threading.Thread(target=_read_worker, args=(tasks, raw_queue, stop, failures), daemon=True)
+               for _ in range(max(1, min(read_workers, len(locales))))]
+    for thread in readers:
+        thread.start()
+
+    parsed = {}
+    try:
+        with progress.task('parse', total=len(locales), unit='locales') as task:
+            for _ in range(len(locales)):
+                lang_code, contents = _next_read(raw_queue, failures)
+                with profiler.phase('parse', locale=lang_code) as p:
+                    parsed[lang_code] = _parse_contents(contents)
+                    p.items = len(parsed[lang_code][0])
+                task.advance(item=lang_code)
+    finally:
+        # 出错时（读取或解析）让其余读取线程尽快退出：不再领取任务，丢弃队列中已读取的内容
+        stop.set()
+        while any(thread.is_alive() for thread in readers):
+            try:
+                raw_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        for thread in readers:
+            thread.join()
+
+    default_order = parsed['en'][0]
+    lang_codes = [lang_code for lang_code, _ in locales[1:]]
+    all_langs = {lang_code: parsed[lang_code][1] for lang_code, _ in locales}
+    return default_order, lang_codes, all_langs
+
+
+class _SheetWriter(threading.Thread):
+    """写入线程：从行队列中取出一批 (行, 是否缺少翻译) 追加到两个工作表
+
+    stale 为过期的翻译 {语言: key 集合}，对应单元格以黄色底色标出（write_only 工作簿只能在追加时设置样式）
+    """
+
+    def __init__(self, headers, row_queue, task, stale=None):
+        super().__init__(daemon=True)
+        self.row_queue = row_queue
+        self.task = task
+        self.error = None
+        self.rows = 0
+        self.stale_columns = [(i, stale[lc]) for i, lc in enumerate(headers) if stale and lc in stale]
+        self.wb = Workbook(write_only=True)
+        self.main_sheet = self.wb.create_sheet(title="All Translations")
+        self.untrans_sheet = self.wb.create_sheet(title="Untranslated")
+        self.main_sheet.append(headers)
+        self.untrans_sheet.append(headers)
+
+    def run(self):
+        while True:
+            item = self.row_queue.get()
+            if item is _DONE:
+                return
+            if self.error is not None:
+                # 出错后继续取走队列中的行，避免生产方阻塞
+                continue
+            try:
+                for row, missing in item:
+                    self.main_sheet.append(self._styled(self.main_sheet, row))
+                    if missing:
+                        self.untrans_sheet.append(self._styled(self.untrans_sheet, row))
+                self.rows += len(item)
+                self.task.advance(len(item))
+            except Exception as e:
+                self.error = e
+
+    def _styled(self, sheet, row):
+        columns = [i for i, keys in self.stale_columns if row[0] in keys]
+        if not columns:
+            return row
+        row = list(row)
+        for i in columns:
+            row[i] = cell = WriteOnlyCell(sheet, value=row[i])
+            cell.fill = STALE_FILL
+        return row
+
+
+def export_pipelined(res_dir, output_file, read_workers=8, queue_size=16, batch_size=256, profiler=NULL_PROFILER,
+                     progress=NULL_PROGRESS, deterministic=False, compression='default', find_stale=None):
+    """以流水线方式导出工作簿；行按 batch_size 成批通过队列，降低线程间交接的开销
+
+    find_stale 为函数时以解析结果调用，返回过期的翻译 {语言: key 集合}，这些行同样列入未翻译表并标出；
+    deterministic 为 True 时以确定性方式保存并返回文件的 sha256，否则返回 None；
+    compression 为 zip 压缩级别（见 xlsx_writer.py）
+    """
+    snapshot = read_and_parse(res_dir, read_workers, queue_size, profiler, progress)
+    default_order, lang_codes, all_langs = snapshot
+    stale = find_stale(snapshot) if find_stale else None
+
+    headers = ['key', 'en'] + lang_codes
+    row_queue = queue.Queue(maxsize=queue_size)
+    with profiler.phase('build_workbook') as p, \
+            progress.task('write', total=len(default_order), unit='rows') as task:
+        writer = _SheetWriter(headers, row_queue, task, stale)
+        writer.start()
+        try:
+            batch = []
+            for item in iter_export_rows(default_order, lang_codes, all_langs, stale):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    row_queue.put(batch)
+                    batch = []
+                    if writer.error is not None:
+                        break
+            if batch:
+                row_queue.put(batch)
+        finally:
+            row_queue.put(_DONE)
+            writer.join()
+        if writer.error is not None:
+            raise writer.error
+        p.items = writer.rows
+
+    with profiler.phase('save') as p, progress.task('save', unit='bytes') as task:
+        digest = save_workbook(writer.wb, output_file, deterministic, compression)
+        p.items = size = os.path.getsize(output_file)
+        task.advance(size, item=output_file)
+    return digest
@@ -1,7 +1,26 @@
 import os
 import re
+import importlib
+import mmap
+import time
 import argparse
+from collections.abc import Mapping
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import Workbook, load_workbook
+from openpyxl.styles import PatternFill
+
+try:
+    from .escaping import escape_mapping, escape_xml_chars, unescape_xml_chars
+    from .qualifiers import locale_qualifier, normalize_locale
+    from .profiler import NULL_PROFILER, add_profile_arguments, profiler_from_args, report
+    from .progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
+except ImportError:
+    # 以脚本方式运行（python3 processor.py ...）时没有上级包，按同目录模块导入
+    from escaping import escape_mapping, escape_xml_chars, unescape_xml_chars
+    from qualifiers import locale_qualifier, normalize_locale
+    from profiler import NULL_PROFILER, add_profile_arguments, profiler_from_args, report
+    from progress import NULL_PROGRESS, add_progress_arguments, progress_from_args
 
 """
 Android字符串资源处理器
@@ -36,187 +55,960 @@ python3 processor.py --import app/src/main/res translations.xlsx --mode partial
 """
 
 
-def export_to_excel(res_dir, output_file):
-    """增强版导出功能，包含未翻译统计"""
+def _sibling(name):
+    """按需导入同目录下的模块（避免循环导入；作为包导入或以脚本方式运行均可）"""
+    return importlib.import_module(f'{__package__}.{name}' if __package__ else name)
+
+
+def is_table_file(path):
+    """是否为 CSV/TSV 文本表格（按扩展名判断）"""
+    return os.path.splitext(path)[1].lower() in ('.csv', '.tsv')
+
+
+# 每种语言的默认字符串文件：新条目没有其他去处时写入这里
+STRINGS_FILE = 'strings.xml'
+# lint 约定：donottranslate*.xml 中的字符串不需要翻译，不导出也不写回
+UNTRANSLATABLE_PREFIX = 'donottranslate'
+# 预扫描时查找的开始标签：带其他属性的 <string>（translatable="false"、formatted="false"）不计，
+# 与 STRINGS_PATTERN 能匹配的条目一致
+STRING_TAG_BYTES = re.compile(rb'<string\s+name="[^"]+"\s*>')
+# 并发索引 values 目录的线程数
+INDEX_WORKERS = 8
+
+
+def has_strings(xml_path):
+    """预扫描：文件中是否有可翻译的 <string> 条目（只在映射的字节上查找开始标签，不解析整个文件）"""
     try:
+        with _map_file(xml_path) as buffer:
+            return STRING_TAG_BYTES.search(buffer) is not None
+    except (FileNotFoundError, IsADirectoryError):
+        return False
+
+
+def string_files(values_dir, prescan=has_strings):
+    """values 目录中的字符串文件路径，strings.xml 在前、其余按文件名排序
+
+    strings.xml 存在即列入（可能还没有任何条目）；其他 XML 文件（strings_onboarding.xml、colors.xml ...）
+    经 prescan 确认含有 <string> 条目才列入，donottranslate*.xml 跳过。目录不存在时返回 []。
+    """
+    try:
+        names = os.listdir(values_dir)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    paths = []
+    for name in sorted(names, key=lambda n: (n != STRINGS_FILE, n)):
+        if not name.endswith('.xml') or name.startswith(UNTRANSLATABLE_PREFIX):
+            continue
+        path = os.path.join(values_dir, name)
+        if os.path.isfile(path) if name == STRINGS_FILE else prescan(path):
+            paths.append(path)
+    return paths
+
+
+def discover_locales(res_dir, prescan=has_strings):
+    """扫描资源目录，返回 [(语言代码, [字符串文件路径])]（不含默认 values）
+
+    只有仅含语言限定符的目录是翻译目录，语言代码为规范写法（见 qualifiers.py）；
+    values-night、values-v21、values-de-night 等目录只看目录名就跳过，不访问其中的文件。
+    同一语言有多种写法（values-de-rDE 与 values-b+de+DE）时优先使用规范写法的目录；结果按语言代码排序。
+    各目录中的字符串文件由多个线程并发索引（见 string_files），没有任何字符串文件的目录不列入。
+    """
+    candidates = {}
+    for d in sorted(os.listdir(res_dir)):
+        lang_code = locale_qualifier(d)
+        if lang_code:
+            candidates.setdefault(lang_code, []).append(d)
+    # 语言按规范语言代码排序，与文件系统返回目录的顺序无关，相同的资源在任何机器上都导出相同的列顺序
+    candidates = dict(sorted(candidates.items()))
+    dirs = []
+    for lang_code, names in candidates.items():
+        names.sort(key=lambda d: (d != f'values-{lang_code}', d))
+        dirs.extend(os.path.join(res_dir, d) for d in names)
+
+    with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+        indexed = dict(zip(dirs, executor.map(lambda d: string_files(d, prescan), dirs)))
+    locales = []
+    for lang_code, names in candidates.items():
+        paths = next((indexed[os.path.join(res_dir, d)] for d in names if indexed[os.path.join(res_dir, d)]), None)
+        if paths:
+            locales.append((lang_code, paths))
+    return locales
+
+
+def default_string_files(res_dir):
+    """默认语言 values 目录中的字符串文件"""
+    return string_files(os.path.join(res_dir, 'values'))
+
+
+def load_resources(res_dir, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """解析默认语言及所有其他语言，返回 (默认顺序, 语言代码列表, {语言: {key: value}})"""
+    with profiler.phase('scan') as p, progress.task('discover', unit='files') as task:
+        default_paths = default_string_files(res_dir)
+        locales = discover_locales(res_dir)
+        file_count = len(default_paths) + sum(len(paths) for _, paths in locales)
+        p.items = file_count
+        task.advance(file_count)
+
+    with progress.task('parse', total=len(locales) + 1, unit='locales') as task:
         # 获取默认语言内容
-        default_order, default_data = parse_strings_xml(os.path.join(res_dir, 'values', 'strings.xml'))
+        with profiler.phase('parse', locale='en') as p:
+            default_order, default_data, _ = parse_string_files(default_paths)
+            p.items = len(default_order)
         all_langs = {'en': default_data}
+        task.advance(item='en')
 
         # 收集其他语言数据
         lang_codes = []
-        for d in os.listdir(res_dir):
-            if d.startswith('values-'):
-                potential_strings_xml_path = os.path.join(res_dir, d, 'strings.xml')
-                if os.path.exists(potential_strings_xml_path):
-                    lang_code = d.replace('values-', '', 1)
-                    _, lang_data = parse_strings_xml(potential_strings_xml_path)
-                    all_langs[lang_code] = lang_data
-                    lang_codes.append(lang_code)
-
+        for lang_code, paths in locales:
+            with profiler.phase('parse', locale=lang_code) as p:
+                _, lang_data, _ = parse_string_files(paths)
+                p.items = len(lang_data)
+            all_langs[lang_code] = lang_data
+            lang_codes.append(lang_code)
+            task.advance(item=lang_code)
+
+    return default_order, lang_codes, all_langs
+
+
+def iter_export_rows(default_order, lang_codes, all_langs, stale=None, unescape=True):
+    """逐行产出 (完整翻译表的行, 该行是否缺少翻译)
+
+    stale 为过期的翻译 {语言: key 集合}（见 staleness.py），含过期翻译的行同样视为需要翻译。
+    单元格中是反转义后的文本（见 escaping.py），导入时再转义回 strings.xml 的写法；unescape 为 False 时原样写出
+    """
+    text = unescape_xml_chars if unescape else str
+    default_data = all_langs['en']
+    lang_tables = [all_langs[lc] for lc in lang_codes]
+    stale_keys = set().union(*stale.values()) if stale else ()
+    for key in default_order:
+        row = [key, text(default_data.get(key, ''))]
+        missing = key in stale_keys
+        for data in lang_tables:
+            value = data.get(key)
+            if value is None:
+                missing = True
+                value = ''
+            row.append(text(value))
+        yield row, missing
+
+
+def build_export_rows(default_order, lang_codes, all_langs, stale=None, unescape=True):
+    """构建导出矩阵，返回 (表头, 完整翻译表行, 未翻译表行)"""
+    headers = ['key', 'en'] + lang_codes
+
+    # 完整翻译表；未翻译表仅包含缺少（或过期）翻译的条目，已存在的翻译原样保留
+    main_rows = []
+    untrans_rows = []
+    for row, missing in iter_export_rows(default_order, lang_codes, all_langs, stale, unescape):
+        main_rows.append(row)
+        if missing:
+            untrans_rows.append(row)
+
+    return headers, main_rows, untrans_rows
+
+
+# 去重导出时，共用同一翻译单元的多个 key 在 key 列中以换行分隔（Android 的 key 不会包含换行）
+KEY_SEPARATOR = '\n'
+
+
+def split_keys(cell):
+    """key 单元格 -> key 列表；去重导出的翻译单元包含多个 key"""
+    return [key.strip() for key in str(cell).split(KEY_SEPARATOR) if key.strip()]
+
+
+def dedup_rows(rows, headers, stale=None, keep=None):
+    """按源文本合并翻译单元：源文本相同、各语言译文不冲突的行合并为一行，key 列列出共用它的全部 key，按首次出现的顺序排列
+
+    headers 为这些行的表头，long 布局（见 LONG_HEADERS）按 (语言, 源文本) 分组，其他布局按源文本分组；
+    同一语言的译文相同，或一方为空而另一方不是过期译文（stale 为 {语言: key 集合}）时不冲突，合并后取非空的译文，
+    导入时把单元的译文写回其中每个 key：已有的翻译不会改变，缺少的翻译由同一源文本的现有译文补上；
+    译文冲突的行各自保留为单独的单元。单元格中的文本经过驻留，相同的文本只保留一份；
+    keep 为函数时 keep(key) 为真的行（如 ARB 的 @key 元数据）不参与合并，原样保留在原来的位置
+    """
+    if headers == LONG_HEADERS:
+        fixed, locales = 3, None
+    else:
+        fixed, locales = 2, headers[2:]
+    stale = stale or {}
+    pool = {}
+    groups = {}
+    units = []
+    for row in rows:
+        row = [pool.setdefault(value, value) if isinstance(value, str) else value for value in row]
+        key, cells = row[0], row[fixed:]
+        row_locales = locales or [row[1]] * len(cells)
+        flags = [key in stale.get(lc, ()) for lc in row_locales]
+        if keep is not None and keep(key):
+            units.append(([key], row[1:fixed], list(cells), flags))
+            continue
+        for unit in groups.setdefault(tuple(row[1:fixed]), []):
+            if all(a == b or (not a and not stale_b) or (not b and not stale_a)
+                   for a, b, stale_a, stale_b in zip(unit[2], cells, unit[3], flags)):
+                unit[0].append(key)
+                for i, value in enumerate(cells):
+                    if value and not unit[2][i]:
+                        unit[2][i] = value
+                    unit[3][i] = unit[3][i] or flags[i]
+                break
+        else:
+            unit = ([key], row[1:fixed], list(cells), flags)
+            groups[tuple(row[1:fixed])].append(unit)
+            units.append(unit)
+    return [[KEY_SEPARATOR.join(keys), *source, *cells] for keys, source, cells, _ in units]
+
+
+def dedup_export_rows(headers, main_rows, untrans_rows, stale=None):
+    """去重 build_export_rows() 的结果，返回 (完整翻译表的单元行, 未翻译表的单元行)
+
+    单元中任一 key 缺少（或有过期的）翻译时整个单元列入未翻译表，只导入未翻译表也能把补上的译文写回这些 key
+    """
+    missing_keys = {row[0] for row in untrans_rows}
+    main_rows = dedup_rows(main_rows, headers, stale)
+    untrans_rows = [row for row in main_rows if any(key in missing_keys for key in split_keys(row[0]))]
+    return main_rows, untrans_rows
+
+
+# 未翻译表的布局：
+#   rows     Untranslated 工作表包含缺少任一语言翻译的整行（默认）
+#   locales  每种语言一个工作表 Untranslated-<语言>，只有该语言缺少翻译的 key（key, en, 语言）
+#   long     Untranslated 工作表每个缺失单元格一行（key, locale, en, translation）
+# 后两种为稀疏布局，大小只与缺失单元格数有关
+UNTRANSLATED_LAYOUTS = ('rows', 'locales', 'long')
+UNTRANSLATED_SHEET = 'Untranslated'
+LOCALE_SHEET_PREFIX = 'Untranslated-'
+LONG_HEADERS = ['key', 'locale', 'en', 'translation']
+
+
+def build_untranslated_sheets(default_order, lang_codes, all_langs, layout, stale=None):
+    """构建稀疏布局的未翻译表，返回 [(工作表名, 表头, 行)]；缺少翻译的单元格留空，过期的翻译保留原译文
+
+    与完整翻译表相同，单元格中是反转义后的文本
+    """
+    text = unescape_xml_chars
+    default_data = all_langs['en']
+    stale = stale or {}
+    if layout == 'long':
+        rows = []
+        lang_tables = [(lc, all_langs[lc], stale.get(lc, ())) for lc in lang_codes]
+        for key in default_order:
+            for lang_code, data, stale_keys in lang_tables:
+                if key not in data or key in stale_keys:
+                    rows.append([key, lang_code, text(default_data.get(key, '')), text(data.get(key, ''))])
+        return [(UNTRANSLATED_SHEET, LONG_HEADERS, rows)]
+    if layout == 'locales':
+        sheets = []
+        for lang_code in lang_codes:
+            data = all_langs[lang_code]
+            stale_keys = stale.get(lang_code, ())
+            rows = [[key, text(default_data.get(key, '')), text(data.get(key, ''))] for key in default_order
+                    if key not in data or key in stale_keys]
+            sheets.append((LOCALE_SHEET_PREFIX + lang_code, ['key', 'en', lang_code], rows))
+        return sheets
+    raise ValueError(f"不支持的未翻译表布局：{layout}")
+
+
+def sparse_layout(sheetnames, first_row):
+    """根据工作表名和 Untranslated 表头判断稀疏布局，返回 'locales'、'long' 或 None（rows 布局）"""
+    if any(name.startswith(LOCALE_SHEET_PREFIX) for name in sheetnames):
+        return 'locales'
+    if first_row is not None and [str(v) if v is not None else '' for v in first_row[:4]] == LONG_HEADERS:
+        return 'long'
+    return None
+
+
+def iter_sparse_cells(wb, layout):
+    """读取稀疏布局的未翻译表，逐个产出 (key, 语言, 源文本, 译文)；wb 可以是 read_only 工作簿"""
+    if layout == 'long':
+        rows = wb[UNTRANSLATED_SHEET].iter_rows(min_row=2, values_only=True)
+        for row in rows:
+            if row and row[0] and len(row) >= 4 and row[1]:
+                yield str(row[0]), str(row[1]), row[2], row[3]
+        return
+    for name in wb.sheetnames:
+        if not name.startswith(LOCALE_SHEET_PREFIX):
+            continue
+        rows = wb[name].iter_rows(values_only=True)
+        headers = next(rows, None)
+        # 表头第三列为语言代码；工作表名可能因长度限制被截断
+        lang_code = str(headers[2]) if headers and len(headers) >= 3 and headers[2] else name[len(LOCALE_SHEET_PREFIX):]
+        for row in rows:
+            if row and row[0] and len(row) >= 3:
+                yield str(row[0]), lang_code, row[1], row[2]
+
+
+def compute_coverage(default_order, lang_codes, all_langs):
+    """统计各语言的翻译覆盖率，返回 {语言: {total, translated, missing, coverage}}"""
+    total = len(default_order)
+    result = {}
+    for lang_code in lang_codes:
+        data = all_langs[lang_code]
+        translated = sum(1 for key in default_order if key in data)
+        result[lang_code] = {
+            'total': total,
+            'translated': translated,
+            'missing': total - translated,
+            'coverage': round(translated / total, 4) if total else 1.0,
+        }
+    return result
+
+
+def write_workbook(output_file, headers, main_rows, untrans_rows, profiler=NULL_PROFILER, progress=NULL_PROGRESS,
+                   untranslated_sheets=None, stale=None, deterministic=False, compression='default'):
+    """生成并保存包含完整翻译表和未翻译表的工作簿
+
+    untranslated_sheets 为 build_untranslated_sheets() 的结果时，以稀疏布局的工作表代替 Untranslated 整行表；
+    stale 为过期的翻译 {语言: key 集合}，对应单元格以黄色底色标出；
+    deterministic 为 True 时以确定性方式保存并返回文件的 sha256；compression 为 zip 压缩级别（见 xlsx_writer.py）
+    """
+    if untranslated_sheets is not None:
+        untrans_rows = []
+    sparse_rows = sum(len(rows) for _, _, rows in untranslated_sheets or ())
+    with profiler.phase('build_workbook') as p, \
+            progress.task('write', total=len(main_rows) + len(untrans_rows) + sparse_rows, unit='rows') as task:
         # 创建Excel文件
         wb = Workbook()
 
         # Sheet1: 完整翻译表
         main_sheet = wb.create_sheet(title="All Translations", index=0)
-        headers = ['key', 'en'] + lang_codes
         main_sheet.append(headers)
-
-        # 填充主表数据
-        for key in default_order:
-            row = [key, default_data.get(key, '')]
-            for lc in lang_codes:
-                row.append(all_langs[lc].get(key, ''))
+        for row in main_rows:
             main_sheet.append(row)
+            task.advance()
 
-        # Sheet2: 合并未翻译项（仅显示缺少翻译的条目）
-        untrans_sheet = wb.create_sheet(title="Untranslated")
-        untrans_sheet.append(headers)  # 保持相同表头
-
-        # 构建未翻译数据（仅记录存在的翻译）
-        for key in default_order:
-            has_untranslated = False
-            row_data = {'key': key, 'en': default_data.get(key, '')}
-
-            # 检查每个语言的翻译状态
-            for lc in lang_codes:
-                translated_value = all_langs[lc].get(key, None)
-                if translated_value is None:
-                    has_untranslated = True
-                    row_data[lc] = ''
-                else:
-                    row_data[lc] = translated_value
-
-            # 仅添加有未翻译项的行
-            if has_untranslated:
-                row = [row_data['key'], row_data['en']]
-                row += [row_data[lc] for lc in lang_codes]
+        if untranslated_sheets is None:
+            # Sheet2: 合并未翻译项（保持相同表头）
+            untrans_sheet = wb.create_sheet(title="Untranslated")
+            untrans_sheet.append(headers)
+            for row in untrans_rows:
                 untrans_sheet.append(row)
+                task.advance()
+        else:
+            # 稀疏布局：只写缺少翻译的单元格
+            for title, sheet_headers, rows in untranslated_sheets:
+                sheet = wb.create_sheet(title=title[:31])
+                sheet.append(sheet_headers)
+                for row in rows:
+                    sheet.append(row)
+                    task.advance()
+
+        if stale:
+            highlight_stale(wb, headers, stale)
 
         # 删除默认Sheet（如果存在）
         if 'Sheet' in wb.sheetnames:
             del wb['Sheet']
-
-        wb.save(output_file)
-        print(f"导出成功：{output_file}")
+        p.items = (len(main_rows) + len(untrans_rows)) * len(headers) + sparse_rows
+
+    with profiler.phase('save') as p, progress.task('save', unit='bytes') as task:
+        digest = _sibling('xlsx_writer').save_workbook(wb, output_file, deterministic, compression)
+        p.items = size = os.path.getsize(output_file)
+        task.advance(size, item=output_file)
+    return digest
+
+
+STALE_FILL = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+
+
+def highlight_stale(wb, headers, stale):
+    """标出工作簿中过期翻译的单元格"""
+    columns = {lc: i + 1 for i, lc in enumerate(headers)}
+    for sheet in wb.worksheets:
+        if sheet.title.startswith(LOCALE_SHEET_PREFIX):
+            # locales 布局：第三列为该语言的译文
+            keys = stale.get(sheet.cell(row=1, column=3).value, ())
+            for (cell,) in sheet.iter_rows(min_row=2, max_col=1):
+                if any(key in keys for key in split_keys(cell.value)):
+                    sheet.cell(row=cell.row, column=3).fill = STALE_FILL
+        elif sheet.cell(row=1, column=2).value == 'locale':
+            # long 布局：每行一个单元格
+            for key_cell, locale_cell in sheet.iter_rows(min_row=2, max_col=2):
+                keys = stale.get(locale_cell.value, ())
+                if any(key in keys for key in split_keys(key_cell.value)):
+                    sheet.cell(row=key_cell.row, column=4).fill = STALE_FILL
+        else:
+            # 整行布局：按 key 所在行和语言所在列定位
+            rows = {key: cell.row for (cell,) in sheet.iter_rows(min_row=2, max_col=1) for key in split_keys(cell.value)}
+            for lang_code, keys in stale.items():
+                for key in keys:
+                    if key in rows:
+                        sheet.cell(row=rows[key], column=columns[lang_code]).fill = STALE_FILL
+
+
+def export_to_excel(res_dir, output_file, profiler=NULL_PROFILER, shards=None, shard_by='keys', max_cells=None,
+                    pipeline=False, read_workers=8, progress=NULL_PROGRESS, layout='rows', stale='flag',
+                    stale_extract=None, dedup=False, deterministic=False, skip_unchanged=False, compression='default'):
+    """增强版导出功能，包含未翻译统计；输出文件扩展名为 .csv/.tsv 时导出为文本表格
+
+    指定 shards（分片数）或 max_cells（每片最大单元格数）时拆分为多个工作簿并行写出，详见 sharding.py；
+    pipeline 为 True 时读取、解析与写入在不同线程中重叠执行，详见 pipeline.py；
+    layout 为未翻译表的布局（rows/locales/long，见 UNTRANSLATED_LAYOUTS）；
+    stale 为 'flag' 时源文本已变化的过期翻译（见 staleness.py）也列入未翻译表并标出，为 'ignore' 时不检查；
+    stale_extract 指定时另外把过期条目单独写到该文件；
+    dedup 为 True 时源文本相同、译文不冲突的行合并为一个翻译单元（见 dedup_rows），导入时自动展开到每个 key；
+    deterministic 为 True 时相同内容总是写出相同字节的 xlsx 并打印内容哈希；
+    skip_unchanged 为 True 时（隐含 deterministic）按输入清单判断，输入与选项都没变时跳过导出；
+    compression 为 xlsx 的 zip 压缩级别 store/fast/default/max（见 xlsx_writer.py）
+    """
+    try:
+        if layout not in UNTRANSLATED_LAYOUTS:
+            raise ValueError(f"不支持的未翻译表布局：{layout}")
+        if (layout != 'rows' or dedup) and (shards or max_cells or pipeline):
+            raise ValueError("分片导出和流水线导出仅支持 rows 布局，且不支持去重")
+        if skip_unchanged and (shards or max_cells or is_table_file(output_file)):
+            raise ValueError("--skip-unchanged 仅支持导出单个 xlsx 工作簿")
+
+        inputs = options = None
+        if skip_unchanged:
+            xlsx_writer = _sibling('xlsx_writer')
+            deterministic = True
+            options = {'layout': layout, 'stale': stale, 'dedup': dedup, 'pipeline': pipeline,
+                       'compression': compression,
+                       'stale_extract': os.path.basename(stale_extract) if stale_extract else None}
+            with profiler.phase('hash_inputs') as p:
+                paths = default_string_files(res_dir) + [path for _, paths in discover_locales(res_dir)
+                                                          for path in paths]
+                # 过期翻译取决于旁路文件中记录的源文本哈希
+                sidecar = _sibling('staleness').sidecar_path(res_dir)
+                if (stale != 'ignore' or stale_extract) and os.path.exists(sidecar):
+                    paths.append(sidecar)
+                inputs = xlsx_writer.input_digests(res_dir, paths)
+                p.items = len(inputs)
+                outputs = xlsx_writer.unchanged_outputs(output_file, inputs, options)
+            if outputs is not None:
+                print(f"输入未变化，跳过导出：{output_file}")
+                print(f"内容哈希：sha256:{outputs[os.path.basename(output_file)]}")
+                return
+
+        outputs = {}
+
+        def find_stale(snapshot):
+            return _find_stale(res_dir, snapshot, stale, stale_extract, outputs, profiler, deterministic, compression)
+
+        if shards or max_cells:
+            export_shards = _sibling('sharding').export_shards
+            if max_cells:
+                shard_by = 'cells'
+            snapshot = load_resources(res_dir, profiler, progress)
+            path = export_shards(res_dir, output_file, shards, shard_by, max_cells, profiler=profiler,
+                                 progress=progress, snapshot=snapshot, deterministic=deterministic,
+                                 compression=compression, stale=find_stale(snapshot))
+            print(f"导出成功：{path}")
+            return
+
+        if pipeline:
+            export_pipelined = _sibling('pipeline').export_pipelined
+            outputs[output_file] = export_pipelined(res_dir, output_file, read_workers, profiler=profiler,
+                                                    progress=progress, deterministic=deterministic,
+                                                    compression=compression, find_stale=find_stale)
+            _finish_export(output_file, outputs, inputs, options)
+            return
+
+        snapshot = load_resources(res_dir, profiler, progress)
+        default_order, lang_codes, all_langs = snapshot
+        stale_entries = find_stale(snapshot)
+
+        if is_table_file(output_file):
+            export_to_table = _sibling('csv_exchange').export_to_table
+            main_file, untrans_file = export_to_table(res_dir, output_file, profiler, progress, snapshot, layout,
+                                                      stale_entries, dedup)
+            print(f"导出成功：{main_file}，{untrans_file}")
+            return
+
+        with profiler.phase('build_matrix') as p:
+            headers, main_rows, untrans_rows = build_export_rows(default_order, lang_codes, all_langs, stale_entries)
+            untranslated_sheets = None
+            if layout != 'rows':
+                untranslated_sheets = build_untranslated_sheets(default_order, lang_codes, all_langs, layout,
+                                                                stale_entries)
+            if dedup:
+                row_count = len(main_rows)
+                main_rows, untrans_rows = dedup_export_rows(headers, main_rows, untrans_rows, stale_entries)
+                if untranslated_sheets is not None:
+                    untranslated_sheets = [(title, sheet_headers, dedup_rows(rows, sheet_headers, stale_entries))
+                                           for title, sheet_headers, rows in untranslated_sheets]
+                print(f"去重：{row_count} 个 key 合并为 {len(main_rows)} 个翻译单元")
+            p.items = len(main_rows) + len(untrans_rows)
+
+        outputs[output_file] = write_workbook(output_file, headers, main_rows, untrans_rows, profiler, progress,
+                                              untranslated_sheets, stale_entries, deterministic, compression)
+        _finish_export(output_file, outputs, inputs, options)
 
     except Exception as e:
         print(f"导出失败：{str(e)}")
         raise
 
 
-def import_from_excel(res_dir, input_file, mode='full'):
-    """智能导入，支持选择数据源"""
+def _find_stale(res_dir, snapshot, stale, stale_extract, outputs, profiler=NULL_PROFILER, deterministic=False,
+                compression='default'):
+    """查找过期翻译（见 staleness.py），stale_extract 指定时写出过期条目并记入 outputs
+
+    返回需要标出的 {语言: key 集合}；stale 为 'ignore' 时返回 None
+    """
+    if stale == 'ignore' and not stale_extract:
+        return None
+    staleness = _sibling('staleness')
+    with profiler.phase('find_stale') as p:
+        stale_entries = staleness.find_stale(res_dir, snapshot)
+        p.items = stale_count = sum(len(keys) for keys in stale_entries.values())
+    if stale_entries:
+        print(f"过期翻译：{stale_count} 条，{len(stale_entries)} 种语言")
+    if stale_extract:
+        extract_file, digest = staleness.write_stale_extract(stale_extract, snapshot, stale_entries, deterministic,
+                                                             compression)
+        outputs[extract_file] = digest
+        print(f"过期条目已写出：{extract_file}")
+    return None if stale == 'ignore' else stale_entries
+
+
+def _finish_export(output_file, outputs, inputs=None, options=None):
+    """打印导出结果与内容哈希；inputs 不为 None 时写入输入清单"""
+    print(f"导出成功：{output_file}")
+    if outputs.get(output_file):
+        print(f"内容哈希：sha256:{outputs[output_file]}")
+    if inputs is not None:
+        _sibling('xlsx_writer').write_inputs_manifest(output_file, inputs, options, outputs)
+
+
+class ResourceCache:
+    """常驻内存的资源解析缓存
+
+    按语言记录各字符串文件的 (mtime, size)，refresh() 时只重新解析文件发生变化的语言，
+    未变化的语言直接复用上次的解析结果。其他 XML 文件的预扫描结果同样按文件戳缓存，未变化时不再读取。
+    """
+
+    def __init__(self, res_dir):
+        self.res_dir = res_dir
+        # 语言代码 -> (文件路径元组, 文件戳元组, 顺序, 数据)
+        self._entries = {}
+        self._lang_codes = []
+        # 文件路径 -> (文件戳, 是否含 <string> 条目)
+        self._prescanned = {}
+
+    def _prescan(self, xml_path):
+        stamp = self._stamp(xml_path)
+        cached = self._prescanned.get(xml_path)
+        if cached is None or cached[0] != stamp:
+            cached = self._prescanned[xml_path] = (stamp, has_strings(xml_path))
+        return cached[1]
+
+    def _scan(self):
+        """返回 [(语言代码, 字符串文件路径元组)]，默认语言 en 排在第一位"""
+        locales = [('en', string_files(os.path.join(self.res_dir, 'values'), self._prescan))]
+        locales += discover_locales(self.res_dir, self._prescan)
+        return [(lang_code, tuple(paths)) for lang_code, paths in locales]
+
+    @staticmethod
+    def _stamp(xml_path):
+        try:
+            st = os.stat(xml_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _stamps(self, paths):
+        return tuple(self._stamp(path) for path in paths)
+
+    def fingerprint(self):
+        """返回当前磁盘上所有语言文件的 (语言, 路径元组, 文件戳元组) 元组，仅使用 stat（以及新文件的预扫描）"""
+        return tuple((lang_code, paths, self._stamps(paths)) for lang_code, paths in self._scan())
+
+    def changed(self):
+        """仅通过 stat 检查，返回新增、修改或删除的语言代码集合"""
+        changed = set()
+        seen = set()
+        for lang_code, paths, stamps in self.fingerprint():
+            seen.add(lang_code)
+            entry = self._entries.get(lang_code)
+            if entry is None or entry[0] != paths or entry[1] != stamps:
+                changed.add(lang_code)
+        changed.update(set(self._entries) - seen)
+        return changed
+
+    def refresh(self, profiler=NULL_PROFILER):
+        """重新解析发生变化的文件，返回受影响的语言代码集合"""
+        with profiler.phase('scan') as p:
+            locales = self._scan()
+            p.items = len(locales)
+
+        changed = set()
+        seen = set()
+        for lang_code, paths in locales:
+            seen.add(lang_code)
+            stamps = self._stamps(paths)
+            entry = self._entries.get(lang_code)
+            if entry is not None and entry[0] == paths and entry[1] == stamps:
+                continue
+            with profiler.phase('parse', locale=lang_code) as p:
+                order, data, _ = parse_string_files(paths)
+                p.items = len(order)
+            # 长期持有的缓存不引用文件映射，避免文件被原地截断后访问出错
+            self._entries[lang_code] = (paths, stamps, order, data.copy())
+            changed.add(lang_code)
+
+        for lang_code in set(self._entries) - seen:
+            del self._entries[lang_code]
+            changed.add(lang_code)
+
+        self._lang_codes = [lang_code for lang_code, _ in locales if lang_code != 'en']
+        return changed
+
+    def invalidate(self, lang_code=None):
+        """丢弃指定语言（默认全部）的缓存，下次 refresh() 时重新解析"""
+        if lang_code is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(lang_code, None)
+
+    def snapshot(self):
+        """返回与 load_resources() 相同结构的 (默认顺序, 语言代码列表, {语言: 数据})"""
+        default_order = self._entries['en'][2] if 'en' in self._entries else []
+        all_langs = {lang_code: entry[3] for lang_code, entry in self._entries.items()}
+        all_langs.setdefault('en', {})
+        return default_order, list(self._lang_codes), all_langs
+
+
+def watch_and_export(res_dir, output_file, interval=1.0, debounce=0.5, profiler=NULL_PROFILER,
+                     compression='default', stale='flag'):
+    """监听模式：常驻内存保留解析结果，轮询资源目录，文件变化后仅重新解析变动的语言并重新生成工作簿
+
+    stale 为 'flag' 时每次重新生成都标出过期翻译（见 staleness.py）
+    """
+    cache = ResourceCache(res_dir)
+
+    def regenerate(changed):
+        started = time.perf_counter()
+        snapshot = cache.snapshot()
+        stale_entries = _find_stale(res_dir, snapshot, stale, None, {}, profiler)
+        with profiler.phase('build_matrix') as p:
+            headers, main_rows, untrans_rows = build_export_rows(*snapshot, stale_entries)
+            p.items = len(main_rows) + len(untrans_rows)
+        # 先写临时文件再替换，保证读取方不会读到写了一半的工作簿
+        tmp_file = output_file + '.tmp'
+        write_workbook(tmp_file, headers, main_rows, untrans_rows, profiler, stale=stale_entries,
+                       compression=compression)
+        os.replace(tmp_file, output_file)
+        elapsed = time.perf_counter() - started
+        print(f"导出成功：{output_file}（变更语言：{sorted(changed)}，耗时 {elapsed:.3f}s）")
+
+    regenerate(cache.refresh(profiler))
+    print(f"正在监听 {res_dir} 的变化（Ctrl+C 退出）...")
+    try:
+        while True:
+            time.sleep(interval)
+            if not cache.changed():
+                continue
+            # 去抖：等待文件在 debounce 时间内不再变化后再处理，避免编辑器多次保存触发多次导出
+            fingerprint = cache.fingerprint()
+            while True:
+                time.sleep(debounce)
+                current = cache.fingerprint()
+                if current == fingerprint:
+                    break
+                fingerprint = current
+            try:
+                changed = cache.refresh(profiler)
+                if changed:
+                    regenerate(changed)
+            except Exception as e:
+                # 监听模式下单次失败（如文件写了一半）不退出，等待下一次变化
+                print(f"导出失败：{str(e)}")
+    except KeyboardInterrupt:
+        print("已停止监听")
+
+
+def read_workbook_updates(input_file, mode='full', profiler=NULL_PROFILER, escape=True, progress=NULL_PROGRESS,
+                          lang_data=None):
+    """读取工作簿，返回 {语言: {key: 值}}；escape 为 True 时按 strings.xml 的规则转义
+
+    lang_data 为 spill.SpillPartitions 时读到的值不在内存中汇总，而是逐个追加到各语言的磁盘分区，
+    此时工作簿以只读模式流式读取
+    """
+    if os.path.isdir(input_file) or input_file.endswith('.manifest.json'):
+        read_shard_updates = _sibling('sharding').read_shard_updates
+        return read_shard_updates(input_file, mode, profiler=profiler, escape=escape, progress=progress,
+                                  lang_data=lang_data)
+
+    if is_table_file(input_file):
+        read_table_updates = _sibling('csv_exchange').read_table_updates
+        return read_table_updates(input_file, mode, profiler, escape, progress, lang_data)
+
+    with profiler.phase('load_workbook') as p:
+        wb = load_workbook(input_file, read_only=lang_data is not None)
+        p.items = len(wb.sheetnames)
     try:
-        wb = load_workbook(input_file)
+        return _read_sheet_updates(wb, mode, profiler, escape, progress, {} if lang_data is None else lang_data)
+    finally:
+        wb.close()
+
+
+def _read_sheet_updates(wb, mode, profiler, escape, progress, lang_data):
+    if mode == 'partial':
+        sheet_name = 'Untranslated'
+        first_row = next(wb[sheet_name].iter_rows(max_row=1, values_only=True), None) \
+            if sheet_name in wb.sheetnames else None
+        layout = sparse_layout(wb.sheetnames, first_row)
+        if layout:
+            return read_sparse_updates(wb, layout, profiler, escape, progress, lang_data)
+        if sheet_name not in wb.sheetnames:
+            raise ValueError("未找到未翻译工作表")
+    else:
+        sheet_name = 'All Translations'
+        if sheet_name not in wb.sheetnames:
+            raise ValueError("未找到主工作表")
+
+    sheet = wb[sheet_name]
+    # 只读工作簿缺少尺寸信息时 max_row 为 None
+    total = sheet.max_row - 1 if sheet.max_row else None
+    with profiler.phase('read_rows') as p, progress.task('read', total=total, unit='rows') as task:
+        rows = sheet.iter_rows(values_only=True)
+        headers = next(rows, None) or ()
+        lang_codes = headers[1:]  # 跳过key列，包含'en'
+
+        for row in rows:
+            task.advance()
+            if not row or not row[0]:
+                continue
+            keys = split_keys(row[0])
+
+            # 遍历所有语言列（从第2列开始）
+            for lang_code, value in zip(lang_codes, row[1:]):
+                if value:
+                    value = str(value).strip()
+                    # 翻译单元展开到共用它的每个 key
+                    data = lang_data.setdefault(lang_code, {})
+                    for key in keys:
+                        data[key] = value
+                    p.items += len(keys)
+    # 读完后按列批量进行XML特殊字符处理
+    return escape_updates(lang_data, profiler) if escape else lang_data
+
+
+def read_sparse_updates(wb, layout, profiler=NULL_PROFILER, escape=True, progress=NULL_PROGRESS, lang_data=None):
+    """读取稀疏布局的未翻译表，只导入译文列"""
+    if lang_data is None:
         lang_data = {}
-
-        if mode == 'partial':
-            if 'Untranslated' not in wb.sheetnames:
-                raise ValueError("未找到未翻译工作表")
-
-            sheet = wb['Untranslated']
-            headers = [cell.value for cell in sheet[1]]
-            all_lang_codes = headers[1:]  # 包含'en'
-
-            # 处理所有语言列（包括en）
-            for row in sheet.iter_rows(min_row=2):
-                key = row[0].value
-                if not key:
-                    continue
-
-                # 遍历所有语言列（从第2列开始）
-                for idx, lang_code in enumerate(all_lang_codes, start=1):
-                    cell = row[idx]
-                    if cell.value:
-                        value = str(cell.value).strip()
-                        # 进行XML特殊字符处理
-                        value = escape_xml_chars(value)
-                        lang_data.setdefault(lang_code, {})[key] = value
+    with profiler.phase('read_rows') as p, progress.task('read', unit='rows') as task:
+        for key, lang_code, _, value in iter_sparse_cells(wb, layout):
+            task.advance()
+            if value:
+                value = str(value).strip()
+                data = lang_data.setdefault(lang_code, {})
+                for key in split_keys(key):
+                    data[key] = value
+                    p.items += 1
+    return escape_updates(lang_data, profiler) if escape else lang_data
+
+
+def write_values_strings(values_dir, data, reference_order=None, paths=None, default_files=None):
+    """把一种语言的 {key: value} 合并写回 values 目录，返回 {文件路径: [写入的 key]}
+
+    已有条目写回它所在的字符串文件；新条目写入默认语言中同名的文件（default_files 为 {key: 文件名}），
+    没有对应文件时写入 strings.xml。只改写包含值发生变化的条目的文件，其他文件不动。
+    """
+    if paths is None:
+        paths = string_files(values_dir)
+    _, previous, sources = parse_string_files(paths)
+    default_files = default_files or {}
+    by_file = {}
+    for key, value in data.items():
+        if previous.get(key) == value:
+            continue
+        path = sources.get(key) or os.path.join(values_dir, default_files.get(key, STRINGS_FILE))
+        by_file.setdefault(path, {})[key] = value
+    del previous
+    for path, updates in by_file.items():
+        write_strings_xml(path, updates, reference_order)
+    return {path: list(updates) for path, updates in by_file.items()}
+
+
+def write_updates(res_dir, lang_data, profiler=NULL_PROFILER, progress=NULL_PROGRESS, based_on=None):
+    """将 {语言: {key: value}} 合并写入各语言的字符串文件
+
+    先写默认语言，其他语言的新条目写入与默认语言相同的文件，并按默认语言中的顺序插入到相邻 key 旁边；
+    只改写包含值发生变化的条目的文件（见 write_values_strings）。
+    写回后更新源文本哈希旁路文件（见 staleness.py），记录值发生变化的翻译所依据的源文本；
+    based_on 为 {语言: {key: 源文本哈希}} 时，这些翻译依据的是指定的（而不是当前的）源文本。
+    """
+    default_dir = os.path.join(res_dir, 'values')
+    # 已有的翻译目录可能用别的写法（values-b+de+DE），按规范语言代码找到原目录写回
+    locale_paths = dict(discover_locales(res_dir)) if os.path.isdir(res_dir) else {}
+    reference_order = None
+    default_files = None
+    changed = {}
+    with progress.task('merge', total=len(lang_data), unit='files') as task:
+        for lang_code in sorted(lang_data, key=lambda lc: lc != 'en'):
+            data = lang_data[lang_code]
+            with profiler.phase('write', locale=lang_code) as p:
+                if lang_code == 'en':
+                    # 表格的行顺序即默认语言的顺序
+                    written = write_values_strings(default_dir, data, list(data))
+                else:
+                    paths = locale_paths.get(normalize_locale(lang_code), [])
+                    values_dir = os.path.dirname(paths[0]) if paths else \
+                        os.path.join(res_dir, f'values-{lang_code}')
+                    if reference_order is None:
+                        reference_order, _, sources = parse_string_files(string_files(default_dir))
+                        default_files = {key: os.path.basename(path) for key, path in sources.items()}
+                        del sources
+                    written = write_values_strings(values_dir, data, reference_order, paths, default_files)
+                changed[lang_code] = {key for keys in written.values() for key in keys}
+                p.items = len(data)
+            task.advance(item=lang_code)
+
+    if lang_data and string_files(default_dir):
+        with profiler.phase('record_sources'):
+            _sibling('staleness').record_import(res_dir, changed, based_on)
+
+
+def check_import(res_dir, lang_data, strict=False, validate_report=None, profiler=NULL_PROFILER,
+                 progress=NULL_PROGRESS):
+    """以资源目录的默认语言（及本次导入的 en）为准校验各语言译文的占位符与标签（见 validation.py），返回问题列表
+
+    打印摘要，validate_report 指定时写出报告；strict 为 True 且有问题时抛出 ValueError，调用方不应写入任何文件
+    """
+    _, source, _ = parse_string_files(default_string_files(res_dir))
+    if 'en' in lang_data:
+        source = {**source, **lang_data['en']}
+    return _sibling('validation').check_updates(source, lang_data, 'android', strict, validate_report,
+                                                profiler=profiler, progress=progress)
+
+
+def import_updates(res_dir, lang_data, profiler=NULL_PROFILER, progress=NULL_PROGRESS, strict=False,
+                   validate_report=None):
+    """校验（见 check_import）通过后将 {语言: {key: value}} 写入资源目录，返回问题列表；各导入入口共用"""
+    issues = check_import(res_dir, lang_data, strict, validate_report, profiler, progress)
+    write_updates(res_dir, lang_data, profiler, progress)
+    return issues
+
+
+def import_from_excel(res_dir, input_file, mode='full', profiler=NULL_PROFILER, progress=NULL_PROGRESS, strict=False,
+                      validate_report=None, out_of_core=False, spill_dir=None):
+    """智能导入，支持选择数据源
+
+    写入前校验各语言译文的占位符与标签（见 validation.py）；strict 为 True 时有问题则不写入并抛出 ValueError。
+    out_of_core 为 True 时读到的数据按语言暂存到 spill_dir 下的临时分区，逐个语言合并写入（见 spill.py）
+    """
+    try:
+        if out_of_core:
+            lang_codes = _sibling('spill').import_out_of_core(res_dir, input_file, mode, profiler, progress, strict,
+                                                              validate_report, spill_dir)
         else:
-            # 处理主表
-            if 'All Translations' not in wb.sheetnames:
-                raise ValueError("未找到主工作表")
-
-            sheet = wb['All Translations']
-            headers = [cell.value for cell in sheet[1]]
-            lang_codes = headers[1:]  # 跳过key列
-
-            for row in sheet.iter_rows(min_row=2):
-                key = row[0].value
-                if not key:
-                    continue
-
-                for idx, lc in enumerate(lang_codes, start=1):
-                    value = row[idx].value
-                    if value:
-                        value = str(value).strip()
-                        # 进行XML特殊字符处理
-                        value = escape_xml_chars(value)
-                        lang_data.setdefault(lc, {})[key] = value
-
-        # 写入各语言文件
-        for lang_code, data in lang_data.items():
-            dir_name = 'values' if lang_code == 'en' else f'values-{lang_code}'
-            xml_path = os.path.join(res_dir, dir_name, 'strings.xml')
-
-            # 合并数据并写入
-            existing_order, existing_data = parse_strings_xml(xml_path)
-            merged_data = existing_data.copy()
-            merged_data.update(data)
-
-            write_strings_xml(xml_path, merged_data)
-
-        print(f"导入成功！\n模式：{mode} \n更新语言：{list(lang_data.keys())}")
+            lang_data = read_workbook_updates(input_file, mode, profiler, progress=progress)
+            import_updates(res_dir, lang_data, profiler, progress, strict, validate_report)
+            lang_codes = list(lang_data.keys())
+        print(f"导入成功！\n模式：{mode} \n更新语言：{lang_codes}")
     except Exception as e:
         print(f"导入失败：{str(e)}")
         raise
 
 
-def escape_xml_chars(text):
-    """处理XML特殊字符，如单引号和&符号"""
-    if not text:
-        return text
-    
-    # 处理&字符（仅处理未转义的&）
-    # 先替换已有的实体引用以避免重复转义
-    # 临时标记已有的实体引用
-    text = re.sub(r'&(amp|lt|gt|apos|quot|#\d+);', r'###ENTITY###\1;', text)
-    # 转义其余的&
-    text = text.replace('&', '&amp;')
-    # 还原已有的实体引用
-    text = text.replace('###ENTITY###', '&')
-    
-    # 处理单引号（如果未被转义）
-    # 查找已经转义的单引号（\'）并临时替换
-    text = re.sub(r'\\\'', r'###APOS###', text)
-    # 转义未转义的单引号
-    text = text.replace("'", "\\'")
-    # 还原临时替换的已转义单引号
-    text = text.replace('###APOS###', "\\'")
-    
-    return text
+def escape_updates(lang_data, profiler=NULL_PROFILER):
+    """按 strings.xml 的规则批量转义 {语言: {key: 值}}（见 escaping.py）"""
+    with profiler.phase('escape') as p:
+        lang_data = {lang_code: escape_mapping(data) for lang_code, data in lang_data.items()}
+        p.items = sum(len(data) for data in lang_data.values())
+    return lang_data
 
 
-def parse_strings_xml(xml_path):
-    """解析XML获取原始内容（保留CDATA等特殊格式）"""
+# 增强型正则表达式，匹配完整字符串定义
+STRINGS_PATTERN = re.compile(
+    r'<!--(.*?)-->|'  # 匹配注释
+    r'<string\s+name="([^"]+)"\s*>(.*?)</string>|'
+    r'(</?resources>)',  # 匹配根标签
+    re.DOTALL
+)
+# 同一正则的字节版本，直接在 mmap 上扫描 UTF-8 字节
+STRINGS_PATTERN_BYTES = re.compile(STRINGS_PATTERN.pattern.encode('ascii'), re.DOTALL)
+
+
+class LazyStrings(Mapping):
+    """name -> 原始内容 的只读映射
+
+    只保存各条目内容的 UTF-8 字节（扫描时从文件映射中复制，映射随即关闭），值在首次访问时才解码（并 strip），
+    未被访问的条目不会产生任何 str 对象。同一语言的多个字符串文件共用一个映射表。
+    """
+
+    __slots__ = ('_spans', '_decoded')
+
+    def __init__(self, spans):
+        # name -> 原始内容的字节
+        self._spans = spans
+        self._decoded = {}
+
+    def __getitem__(self, name):
+        value = self._decoded.get(name)
+        if value is None:
+            value = self._decoded[name] = str(self._spans[name], 'utf-8').strip()
+        return value
+
+    def __contains__(self, name):
+        return name in self._spans
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __reduce__(self):
+        # 跨进程传递时转换为普通 dict，接收方不必再解码
+        return dict, (self.copy(),)
+
+
+@contextmanager
+def _map_file(xml_path):
+    """以只读方式映射文件，退出时关闭映射和文件；空文件为 b''"""
+    with open(xml_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def parse_string_files(xml_paths):
+    """解析同一语言的多个字符串文件，返回 (顺序, {name: 原始内容}, {name: 所在文件路径})
+
+    文件以 mmap 方式映射，直接在 UTF-8 字节上扫描；name 立即解码，值复制为字节、按需解码（见 LazyStrings），
+    每个文件扫描完即关闭映射，不会同时占用大量文件描述符。
+    只匹配不带其他属性的 <string name="...">，translatable="false" 的条目不会被读出。
+    同名条目以先出现的为准（文件按 xml_paths 的顺序）。
+    """
     order = []
-    strings = {}
-    if not os.path.exists(xml_path):
-        return order, strings
+    spans = {}
+    sources = {}
+    for xml_path in xml_paths:
+        if not os.path.exists(xml_path):
+            continue
+        with _map_file(xml_path) as buffer:
+            for match in STRINGS_PATTERN_BYTES.finditer(buffer):
+                if match.group(2):  # string标签（注释和根标签不处理）
+                    name = match.group(2).decode('utf-8')
+                    if name in spans:
+                        continue
+                    order.append(name)
+                    spans[name] = match.group(3)
+                    sources[name] = xml_path
 
-    with open(xml_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    return order, LazyStrings(spans), sources
 
-    # 增强型正则表达式，匹配完整字符串定义
-    pattern = re.compile(
-        r'<!--(.*?)-->|'  # 匹配注释
-        r'<string\s+name="([^"]+)"\s*>(.*?)</string>|'
-        r'(</?resources>)',  # 匹配根标签
-        re.DOTALL
-    )
 
-    for match in re.finditer(pattern, content):
+def parse_strings_xml(xml_path):
+    """解析XML获取原始内容（保留CDATA等特殊格式），返回 (顺序, {name: 原始内容})"""
+    if not os.path.exists(xml_path):
+        return [], {}
+    order, data, _ = parse_string_files([xml_path])
+    return order, data
+
+
+def parse_strings_content(content):
+    """从 strings.xml 文本中解析出 (顺序, {name: 原始内容})"""
+    order = []
+    strings = {}
+    for match in STRINGS_PATTERN.finditer(content):
         if match.group(1):  # 注释
             continue
         elif match.group(2):  # string标签
@@ -230,82 +1022,134 @@ def parse_strings_xml(xml_path):
     return order, strings
 
 
-def write_strings_xml(xml_path, data):
-    """智能合并写入XML（保留注释等其他内容）"""
-    # 读取原始文件内容
+def _line_indent(content, pos):
+    """返回 pos 所在行中位于 pos 之前的缩进空白（content 为 bytes 或 mmap）"""
+    line_start = content.rfind(b'\n', 0, pos) + 1
+    indent = content[line_start:pos]
+    return indent if not indent.strip() else b'    '
+
+
+def plan_new_entries(existing, new_keys, reference_order=None):
+    """为新增 key 确定插入位置（线性时间）
+
+    按参考顺序（默认语言 values/strings.xml 的顺序）遍历，新 key 插在参考顺序中离它最近的、
+    文件中已存在的前一个 key 之后；前面没有已存在的 key 时插在后一个已存在的 key 之前；
+    不在参考顺序中的 key 追加到末尾。
+    返回 (after: {锚点: [key]}, before: {锚点: [key]}, tail: [key])
+    """
+    after = {}
+    before = {}
+    placed = set()
+    new_key_set = set(new_keys)
+    if reference_order:
+        pending_leading = []
+        anchor = None
+        for key in reference_order:
+            if key in existing:
+                anchor = key
+                if pending_leading:
+                    before[key] = pending_leading
+                    pending_leading = []
+            elif key in new_key_set and key not in placed:
+                placed.add(key)
+                if anchor is None:
+                    pending_leading.append(key)
+                else:
+                    after.setdefault(anchor, []).append(key)
+        tail = pending_leading
+    else:
+        tail = []
+    # placed 同时记录已加入 tail 的 key，new_keys 中重复的 key 只追加一次
+    for key in new_keys:
+        if key not in placed:
+            placed.add(key)
+            tail.append(key)
+    return after, before, tail
+
+
+def write_strings_xml(xml_path, data, reference_order=None):
+    """智能合并写入XML（保留注释等其他内容）
+
+    只替换 data 中出现的条目，其余内容原样保留；新条目按 reference_order 插到相邻 key 旁边，
+    使生成的文件与默认语言保持相同顺序，diff 尽量小。
+    原文件以 mmap 方式映射并一次扫描，输出由未修改的原文字节片段和新片段依次写出，不在内存中拼接整份文档；
+    先写临时文件再替换原文件，已映射原文件的读取方不受影响。
+    """
+    # 映射原始文件内容，写完后关闭映射
     if os.path.exists(xml_path):
-        with open(xml_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with _map_file(xml_path) as content:
+            _merge_strings_xml(xml_path, content, data, reference_order)
     else:
-        content = '<?xml version="1.0" encoding="utf-8"?>\n<resources>\n</resources>'
-
-    # 获取现有字符串和顺序
-    existing_order, existing_data = parse_strings_xml(xml_path)
-
-    # 合并数据：更新现有值，保留未修改内容
-    merged_data = existing_data.copy()
-    merged_data.update(data)
-    new_order = existing_order + [k for k in data if k not in existing_order]
-
-    # 构建替换字典（包含原始格式）
-    replace_dict = {}
-    for match in re.finditer(r'<string\s+name="([^"]+)"\s*>(.*?)</string>', content, re.DOTALL):
-        name = match.group(1)
-        if name in merged_data:
-            old_content = match.group(0)
-            new_content = f'<string name="{name}">{merged_data[name]}</string>'
-            replace_dict[old_content] = new_content
-
-    # 执行替换
-    for old, new in replace_dict.items():
-        content = content.replace(old, new, 1)
-
-    # 添加新条目（追加到文件末尾前）
-    new_entries = []
-    for name in new_order:
-        if name not in existing_data:
-            new_entries.append(f'    <string name="{name}">{data[name]}</string>')
-
-    if new_entries:
-        # 在最后一个</string>后或</resources>前插入
-        # 查找最后一个</string>的结束位置
-        last_string_end = 0
-        last_string_pos = content.rfind('</string>')
-        if last_string_pos != -1:
-            last_string_end = last_string_pos + len('</string>')
-
-        # 查找</resources>的位置
-        resources_end_pos = content.find('</resources>')
-
-        # 确定插入位置（优先插入在最后一个</string>之后）
-        insert_pos = last_string_end if last_string_end > 0 else resources_end_pos
-
-        # 构建要插入的文本块
-        # new_entries 中的每个条目已经包含了用于缩进的前导空格
-        insert_block = '\n'.join(new_entries) + '\n'
-
-        # 确定在插入新文本块之前是否需要添加换行符
-        prefix_for_new_block = "\n" # 默认情况下，在新块前添加换行符
-        if insert_pos == 0:
-            # 如果插入点在文件开头 (此逻辑中不太可能，但作为一种保护措施)
-            prefix_for_new_block = ""
-        elif content[insert_pos-1] == '\n':
-            # 如果插入点的前一个字符已经是换行符，则不需要额外的换行符
-            prefix_for_new_block = ""
-        # 其他情况 (insert_pos > 0 且 content[insert_pos-1] != '\n')，prefix_for_new_block 保持为 "\n"
-
-        # 执行插入
-        content = content[:insert_pos] + prefix_for_new_block + insert_block + content[insert_pos:]
-
-    # 处理xliff命名空间
-    if 'xliff:' in content and 'xmlns:xliff' not in content:
-        content = content.replace('<resources>',
-                                  '<resources xmlns:xliff="urn:oasis:names:tc:xliff:document:1.2">', 1)
-
-    # 写入文件（保留原始格式）
+        _merge_strings_xml(xml_path, b'', data, reference_order)
+
+
+def _merge_strings_xml(xml_path, content, data, reference_order):
+    if not content:
+        content = b'<?xml version="1.0" encoding="utf-8"?>\n<resources>\n</resources>'
+
+    def element(name):
+        return f'<string name="{name}">{data[name]}</string>'.encode('utf-8')
+
+    # 一次扫描找出所有现有条目（跳过注释中的内容）
+    matches = [m for m in STRINGS_PATTERN_BYTES.finditer(content) if m.group(2)]
+    names = [m.group(2).decode('utf-8') for m in matches]
+    existing = set(names)
+    new_keys = [k for k in data if k not in existing]
+    after, before, tail = plan_new_entries(existing, new_keys, reference_order)
+
+    # 处理xliff命名空间：需要时替换第一个<resources>标签
+    namespace_pos = -1
+    if b'xmlns:xliff' not in content and (
+            content.find(b'xliff:') != -1 or any('xliff:' in str(v) for v in data.values())):
+        namespace_pos = content.find(b'<resources>')
+
+    view = memoryview(content)
+    pieces = []
+    pos = 0
+    if namespace_pos != -1:
+        pieces.append(view[:namespace_pos])
+        pieces.append(b'<resources xmlns:xliff="urn:oasis:names:tc:xliff:document:1.2">')
+        pos = namespace_pos + len(b'<resources>')
+
+    # 由未修改的原文片段和新片段拼接输出
+    for match, name in zip(matches, names):
+        start, end = match.span()
+        pieces.append(view[pos:start])
+        indent = _line_indent(content, start)
+        if name in before:
+            pieces.extend(element(k) + b'\n' + indent for k in before.pop(name))
+        pieces.append(element(name) if name in data else view[start:end])
+        if name in after:
+            pieces.extend(b'\n' + indent + element(k) for k in after.pop(name))
+        pos = end
+
+    if tail:
+        if matches:
+            # 追加在最后一个条目之后
+            indent = _line_indent(content, matches[-1].start())
+            pieces.extend(b'\n' + indent + element(k) for k in tail)
+        else:
+            # 没有任何条目时插入到</resources>之前
+            resources_end_pos = content.find(b'</resources>', pos)
+            if resources_end_pos == -1:
+                resources_end_pos = len(content)
+            pieces.append(view[pos:resources_end_pos])
+            if resources_end_pos > 0 and content[resources_end_pos - 1:resources_end_pos] != b'\n':
+                pieces.append(b'\n')
+            pos = resources_end_pos
+            pieces.extend(b'    ' + element(k) + b'\n' for k in tail)
+    pieces.append(view[pos:])
+
+    # 写入临时文件后替换（保留原始格式）
     os.makedirs(os.path.dirname(xml_path), exist_ok=True)
-    with open(xml_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    tmp_path = xml_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.writelines(pieces)
+    finally:
+        del pieces
+        view.release()
+    os.replace(tmp_path, xml_path)
 
 
 if __name__ == "__main__":
@@ -336,20 +1180,145 @@ Android字符串资源处理器
                         help='导出到Excel（生成完整翻译表和未翻译项表）')
     parser.add_argument('--import', action='store_true', dest='import_',
                         help='从Excel导入（需配合 --mode 选择数据源, 支持两种模式）')
+    parser.add_argument('--layout', choices=UNTRANSLATED_LAYOUTS, default='rows',
+                        help='未翻译表布局：rows 整行（默认），locales 每种语言一个工作表，long 每个缺失单元格一行；'
+                             '--mode partial 导入时自动识别')
+    parser.add_argument('--stale', choices=['flag', 'ignore'], default='flag',
+                        help='过期翻译（导入后源文本又被修改的条目，见 staleness.py）：flag 列入未翻译表并以黄色标出（默认），'
+                             'ignore 不检查')
+    parser.add_argument('--stale-extract', default=None, metavar='FILE',
+                        help='导出时另外把过期条目单独写到该文件（long 布局，可直接用 --mode partial 导入）')
+    parser.add_argument('--dedup', action='store_true',
+                        help='去重导出：源文本相同、现有翻译不冲突的 key 合并为一个翻译单元（key 列中换行分隔），导入时自动展开')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='确定性导出：固定 zip 时间戳与文档属性，相同内容总是得到相同字节的 xlsx，并打印内容哈希')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='记录输入文件哈希到 <name>.inputs.json，输入与选项都没变时跳过导出（隐含 --deterministic）')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='导出时拆分为 N 个工作簿并行写出，并生成 <name>.manifest.json 清单；'
+                             '导入时 excel_file 可以是清单文件或分片目录')
+    parser.add_argument('--shard-by', choices=['keys', 'locales', 'cells'], default='keys',
+                        help='分片方式：keys 按 key 范围（默认），locales 按语言分组，cells 按单元格数')
+    parser.add_argument('--max-cells', type=int, default=None,
+                        help='每个分片的最大单元格数（指定后按 cells 方式分片）')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='流水线导出：并发读取文件，解析、组装行与写入工作簿在不同线程中重叠执行')
+    parser.add_argument('--read-workers', type=int, default=8,
+                        help='流水线导出时的文件读取线程数（默认 8）')
+    parser.add_argument('--rename-base', default=None, metavar='XLSX|DIR',
+                        help='导出时与上一版本（上次导出的工作簿或旧的资源目录）比较，检测重命名的 key，详见 renames.py')
+    parser.add_argument('--rename-apply', choices=['exact', 'all'], default=None,
+                        help='把旧 key 的翻译带到新 key 上后再导出：exact 仅源文本完全相同的匹配，all 包含近似匹配')
+    parser.add_argument('--rename-threshold', type=float, default=0.8,
+                        help='近似匹配的最低相似度（三元组 Dice 系数，默认 0.8）')
+    parser.add_argument('--rename-json', default=None, metavar='JSON',
+                        help='重命名检测结果额外写入 JSON 文件')
+    parser.add_argument('--diff', action='store_true',
+                        help='比较 excel_file 与资源目录（或另一份导出的工作簿）的差异，res_dir 可以是 .xlsx 文件')
+    parser.add_argument('--diff-json', default=None, metavar='JSON',
+                        help='差异结果写入的 JSON 文件（默认 changes.json）')
+    parser.add_argument('--diff-xlsx', default=None, metavar='XLSX',
+                        help='差异结果额外写入紧凑的 xlsx 文件')
+    parser.add_argument('--batch', action='store_true',
+                        help='批量模式：res_dir 为任务清单（JSON），所有项目的导出/导入任务在同一个进程池中执行，详见 batch.py')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='批量模式的进程数（默认 CPU 核数）')
+    parser.add_argument('--batch-summary', default=None, metavar='JSON',
+                        help='批量模式的汇总结果额外写入 JSON 文件')
+    parser.add_argument('--serve', action='store_true',
+                        help='服务模式：在本地启动 HTTP 服务，常驻缓存解析结果，提供 export/import/diff/coverage 接口')
+    parser.add_argument('--host', default='127.0.0.1', help='服务模式监听地址（默认 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8765, help='服务模式监听端口（默认 8765）')
+    parser.add_argument('--watch', action='store_true',
+                        help='监听模式：导出后常驻内存，资源文件变化时仅重新解析变动的文件并重新生成工作簿')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='监听模式下轮询资源目录的间隔秒数（默认 1.0）')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='监听模式下文件停止变化多少秒后才重新导出（默认 0.5）')
     parser.add_argument('--mode', choices=['full', 'partial'], default='full',
                         help='''
 导入模式选择：                      
   full - 从主表(All Translations)导入（默认）
   partial - 仅从未翻译表(Untranslated)导入
     ''')
-    parser.add_argument('res_dir', help='资源目录路径（包含 values/values-xx 的文件夹）')
-    parser.add_argument('excel_file', help='Excel文件路径（输入/输出）')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='外存导入：读取时按语言把数据暂存到磁盘分区，再逐个语言合并写入，峰值内存只取决于最大的单个语言')
+    parser.add_argument('--spill-dir', default=None, metavar='DIR',
+                        help='外存导入的临时分区所在目录（默认系统临时目录）')
+    _sibling('validation').add_validate_arguments(parser)
+    _sibling('xlsx_writer').add_compression_argument(parser)
+    add_profile_arguments(parser)
+    add_progress_arguments(parser)
+    parser.add_argument('res_dir', help='资源目录路径（包含 values/values-xx 的文件夹）；批量模式下为任务清单文件')
+    parser.add_argument('excel_file', nargs='?', help='Excel文件路径（输入/输出，服务模式下不需要）')
 
     args = parser.parse_args()
-
-    if args.export:
-        export_to_excel(args.res_dir, args.excel_file)
+    profiler = profiler_from_args(args)
+    progress = progress_from_args(args)
+
+    if not args.serve and not args.batch and not args.excel_file:
+        parser.error('缺少 excel_file 参数')
+
+    failed = False
+    if args.serve:
+        server = _sibling('server')
+        server.run(args.res_dir, args.host, args.port)
+    elif args.batch:
+        batch = _sibling('batch')
+        with profiler:
+            results = batch.run_batch(args.res_dir, args.workers, profiler, progress, args.strict)
+        report(profiler, args)
+        print(batch.format_summary(results))
+        if args.batch_summary:
+            batch.write_summary(results, args.batch_summary)
+        failed = any(result['status'] != 'ok' for result in results)
+    elif args.diff:
+        differ = _sibling('differ')
+        with profiler:
+            if args.res_dir.endswith('.xlsx'):
+                changes = differ.diff_workbooks(args.res_dir, args.excel_file, args.mode)
+            else:
+                changes = differ.diff_workbook_against_resources(args.res_dir, args.excel_file, args.mode, profiler,
+                                                            progress)
+        report(profiler, args)
+        json_path = args.diff_json or 'changes.json'
+        differ.write_changes_json(changes, json_path)
+        if args.diff_xlsx:
+            differ.write_changes_xlsx(changes, args.diff_xlsx, args.compression)
+        for lang_code, counts in differ.summarize(changes).items():
+            print(f"{lang_code}: " + ', '.join(f"{kind} {count}" for kind, count in counts.items()))
+        print(f"差异比较完成：{json_path}" + (f"，{args.diff_xlsx}" if args.diff_xlsx else ''))
+    elif args.watch:
+        with profiler:
+            watch_and_export(args.res_dir, args.excel_file, args.interval, args.debounce, profiler, args.compression,
+                             args.stale)
+        report(profiler, args)
+    elif args.export:
+        with profiler:
+            if args.rename_base:
+                renames = _sibling('renames')
+                found = renames.detect_renames(load_resources(args.res_dir, profiler), args.rename_base,
+                                               args.rename_threshold, profiler, progress)
+                if found:
+                    print(renames.format_renames(found))
+                print(f"检测到 {len(found)} 个重命名的 key")
+                if args.rename_json:
+                    renames.write_renames_json(found, args.rename_json)
+                if args.rename_apply:
+                    kinds = ('exact',) if args.rename_apply == 'exact' else ('exact', 'near')
+                    applied = renames.apply_renames(args.res_dir, found, kinds, profiler, progress)
+                    print(f"已带入翻译：{sum(applied.values())} 条，{len(applied)} 种语言")
+            export_to_excel(args.res_dir, args.excel_file, profiler, args.shards, args.shard_by, args.max_cells,
+                            args.pipeline, args.read_workers, progress, args.layout, args.stale, args.stale_extract,
+                            args.dedup, args.deterministic, args.skip_unchanged, args.compression)
+        report(profiler, args)
     elif args.import_:
-        import_from_excel(args.res_dir, args.excel_file, args.mode)
+        with profiler:
+            import_from_excel(args.res_dir, args.excel_file, args.mode, profiler, progress, args.strict,
+                              args.validate_report, args.out_of_core, args.spill_dir)
+        report(profiler, args)
     else:
         print("请使用--export或--import参数")
+    progress.close()
+    if failed:
+        raise SystemExit(1)
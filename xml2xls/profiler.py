@@ -0,0 +1,256 @@
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+"""
+分阶段性能剖析
+
+为 processor.py 及 Flutter 管理脚本提供统一的阶段钩子，记录每个阶段（可按语言细分）的：
+  wall   墙钟时间
+  cpu    进程 CPU 时间
+  peak   tracemalloc 统计的峰值内存增量
+  items  阶段内处理的条目数（文件、字符串、行、字节等）
+
+结果可输出为文本表格和 JSON 文件，另可选导出 cProfile 数据（用 pstats/snakeviz 查看）。
+
+用法：
+    profiler = PhaseProfiler(cprofile_path='export.prof')
+    with profiler:
+        with profiler.phase('parse', locale='de') as p:
+            ...
+            p.items += len(strings)
+    print(profiler.format_table())
+    profiler.write_json('profile.json')
+"""
+
+
+class PhaseRecord:
+    """单个阶段的统计结果"""
+
+    def __init__(self, name, locale=None, items=0):
+        self.name = name
+        self.locale = locale
+        self.items = items
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = 0
+        # 以下为内部计量字段
+        self._base_mem = 0
+        self._peak_abs = 0
+
+    def to_dict(self):
+        return {
+            'phase': self.name,
+            'locale': self.locale,
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'peak_bytes': self.peak,
+            'items': self.items,
+        }
+
+
+class PhaseProfiler:
+    """阶段剖析器，支持嵌套阶段；作为上下文管理器使用时负责启停内存/cProfile 追踪"""
+
+    enabled = True
+
+    def __init__(self, trace_memory=True, cprofile_path=None):
+        self.trace_memory = trace_memory
+        self.cprofile_path = cprofile_path
+        self.records = []
+        self._stack = []
+        self._cprofile = None
+        self._owns_tracemalloc = False
+        self._started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self):
+        self._started = (time.perf_counter(), time.process_time())
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @contextmanager
+    def phase(self, name, locale=None, items=0):
+        """记录一个阶段；yield 出的 PhaseRecord 可在阶段内累加 items"""
+        record = PhaseRecord(name, locale, items)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # 先把目前为止的峰值记到外层阶段，再重置峰值用于本阶段
+            if self._stack:
+                parent = self._stack[-1]
+                parent._peak_abs = max(parent._peak_abs, peak)
+            tracemalloc.reset_peak()
+            record._base_mem = current
+            record._peak_abs = current
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - wall_start
+            record.cpu = time.process_time() - cpu_start
+            self._stack.pop()
+            if tracing and tracemalloc.is_tracing():
+                record._peak_abs = max(record._peak_abs, tracemalloc.get_traced_memory()[1])
+                record.peak = record._peak_abs - record._base_mem
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent._peak_abs = max(parent._peak_abs, record._peak_abs)
+            self.records.append(record)
+
+    def totals(self):
+        """按阶段名汇总（忽略语言维度）"""
+        summary = {}
+        for record in self.records:
+            total = summary.setdefault(record.name, PhaseRecord(record.name))
+            total.wall += record.wall
+            total.cpu += record.cpu
+            total.peak = max(total.peak, record.peak)
+            total.items += record.items
+        return list(summary.values())
+
+    def to_dict(self):
+        data = {
+            'phases': [r.to_dict() for r in self.records],
+            'totals': [r.to_dict() for r in self.totals()],
+        }
+        if self._started:
+            data['wall_s'] = round(time.perf_counter() - self._started[0], 6)
+            data['cpu_s'] = round(time.process_time() - self._started[1], 6)
+        return data
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_table(self):
+        headers = ('phase', 'locale', 'wall(s)', 'cpu(s)', 'peak(KiB)', 'items')
+        rows = []
+        for record in self.records + [None] + self.totals():
+            if record is None:
+                rows.append(None)
+                continue
+            rows.append((
+                record.name,
+                record.locale or '-',
+                f'{record.wall:.4f}',
+                f'{record.cpu:.4f}',
+                f'{record.peak / 1024:.1f}',
+                str(record.items),
+            ))
+        widths = [len(h) for h in headers]
+        for row in rows:
+            if row:
+                widths = [max(w, len(c)) for w, c in zip(widths, row)]
+
+        def fmt(cells):
+            return '  '.join(c.ljust(w) if i < 2 else c.rjust(w)
+                             for i, (c, w) in enumerate(zip(cells, widths)))
+
+        separator = '  '.join('-' * w for w in widths)
+        lines = [fmt(headers), separator]
+        for row in rows:
+            lines.append(separator if row is None else fmt(row))
+        return '\n'.join(lines)
+
+
+class _NullRecord:
+    """禁用剖析时使用的空记录，items 的累加会被直接丢弃"""
+
+    __slots__ = ()
+
+    @property
+    def items(self):
+        return 0
+
+    @items.setter
+    def items(self, value):
+        pass
+
+
+class _NullPhase:
+    __slots__ = ()
+    _record = _NullRecord()
+
+    def __enter__(self):
+        return self._record
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullProfiler:
+    """默认的空剖析器，所有钩子均为无操作，开销接近于零"""
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name, locale=None, items=0):
+        return self._phase
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def add_profile_arguments(parser):
+    """为命令行解析器添加 --profile / --cprofile 选项"""
+    parser.add_argument('--profile', nargs='?', const='profile.json', default=None, metavar='JSON',
+                        help='输出各阶段耗时、CPU、峰值内存与条目数（表格打印到终端，并写入 JSON，默认 profile.json）')
+    parser.add_argument('--cprofile', default=None, metavar='FILE',
+                        help='配合 --profile 使用，额外导出 cProfile 数据到指定文件')
+
+
+def profiler_from_args(args):
+    """根据命令行参数创建剖析器，未开启时返回 NULL_PROFILER"""
+    if getattr(args, 'profile', None) is None and getattr(args, 'cprofile', None) is None:
+        return NULL_PROFILER
+    return PhaseProfiler(cprofile_path=getattr(args, 'cprofile', None))
+
+
+def report(profiler, args):
+    """打印表格并写出 JSON 报告（仅在启用剖析时）；只给了 --cprofile 时不写 JSON"""
+    if not profiler.enabled:
+        return
+    print(profiler.format_table())
+    json_path = getattr(args, 'profile', None)
+    if json_path:
+        profiler.write_json(json_path)
+        print(f"Profile report written to {json_path}")
+    if profiler.cprofile_path:
+        print(f"cProfile data written to {profiler.cprofile_path}")
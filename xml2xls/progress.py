@@ -0,0 +1,246 @@
+import json
+import sys
+import time
+
+"""
+进度与吞吐量事件
+
+为 processor.py、xml2xls.py、xls2xml.py 及 Flutter 管理脚本提供统一的进度钩子。
+每个耗时步骤是一个任务（task），常用任务名：
+  discover  发现的资源文件数（files）
+  parse     已解析的语言数（locales）
+  write     已写入的行数（rows）
+  read      已读取的行数（rows）
+  merge     已写回的语言文件数（files）
+  save      保存的字节数（bytes）
+
+任务的开始、推进和结束都会生成一个事件（dict），交给一个或多个接收方（任意可调用对象）：
+  {'event': 'start' | 'progress' | 'end', 'task': 'parse', 'unit': 'locales', 'item': 'de',
+   'done': 3, 'total': 9, 'elapsed_s': 0.42, 'rate': 7.1, 'eta_s': 0.84, 'time': 1700000000.0}
+progress 事件按 min_interval 限流，start/end 事件总是发送。
+
+自带两种接收方：TTYProgressBar（终端进度条）和 JSONLinesEmitter（每个事件一行 JSON，供 CI 解析）。
+未启用时使用 NULL_PROGRESS，所有钩子均为无操作，开销接近于零。
+
+用法：
+    progress = ProgressReporter(TTYProgressBar())
+    with progress.task('parse', total=len(locales), unit='locales') as task:
+        for lang_code, path in locales:
+            ...
+            task.advance(item=lang_code)
+"""
+
+
+class ProgressTask:
+    """单个任务的进度状态"""
+
+    def __init__(self, reporter, name, total=None, unit='items'):
+        self.reporter = reporter
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.item = None
+        self.started = time.perf_counter()
+        self._last_emit = self.started
+
+    def advance(self, n=1, item=None):
+        """推进 n 个单位；item 为当前处理的对象（如语言代码、文件名）"""
+        self.done += n
+        if item is not None:
+            self.item = item
+        now = time.perf_counter()
+        if now - self._last_emit >= self.reporter.min_interval or self.done == self.total:
+            self._last_emit = now
+            self.reporter.emit(self.event('progress', now))
+
+    def event(self, kind, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else None
+        eta = None
+        if rate and self.total is not None:
+            eta = max(0.0, (self.total - self.done) / rate)
+        return {
+            'event': kind,
+            'task': self.name,
+            'unit': self.unit,
+            'item': self.item,
+            'done': self.done,
+            'total': self.total,
+            'elapsed_s': round(elapsed, 6),
+            'rate': round(rate, 3) if rate is not None else None,
+            'eta_s': round(eta, 3) if eta is not None else None,
+            'time': time.time(),
+        }
+
+    def __enter__(self):
+        self.reporter.emit(self.event('start', self.started))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event = self.event('end')
+        if exc_type is not None:
+            event['error'] = str(exc)
+        self.reporter.emit(event)
+        return False
+
+
+class ProgressReporter:
+    """把任务事件分发给各接收方"""
+
+    enabled = True
+
+    def __init__(self, *sinks, min_interval=0.2):
+        self.sinks = list(sinks)
+        self.min_interval = min_interval
+
+    def task(self, name, total=None, unit='items'):
+        """创建任务，作为上下文管理器使用时自动发送 start/end 事件"""
+        return ProgressTask(self, name, total, unit)
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink(event)
+
+    def close(self):
+        for sink in self.sinks:
+            close = getattr(sink, 'close', None)
+            if close is not None:
+                close()
+
+
+def _format_count(value, unit):
+    """格式化数量；字节数换算为 B/KiB/MiB/GiB，其他单位附在数字后面"""
+    if unit == 'bytes':
+        for suffix in ('B', 'KiB', 'MiB'):
+            if value < 1024:
+                return f'{value:.0f}{suffix}' if suffix == 'B' else f'{value:.1f}{suffix}'
+            value /= 1024
+        return f'{value:.1f}GiB'
+    return f'{value:.0f} {unit}' if value == int(value) else f'{value:.1f} {unit}'
+
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    return f'{minutes}:{seconds:02d}'
+
+
+class TTYProgressBar:
+    """终端进度条；输出不是终端时只在任务结束时打印一行"""
+
+    def __init__(self, stream=None, width=30):
+        self.stream = stream or sys.stderr
+        self.width = width
+        self.is_tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+
+    def format(self, event):
+        done, total, unit = event['done'], event['total'], event['unit']
+        if total:
+            filled = int(self.width * min(done, total) / total)
+            bar = '[' + '#' * filled + '-' * (self.width - filled) + '] '
+            done_text = _format_count(done, unit) if unit == 'bytes' else done
+            count = f'{done_text}/{_format_count(total, unit)}'
+        else:
+            bar = ''
+            count = _format_count(done, unit)
+        line = f'{event["task"]:<8} {bar}{count}'
+        if event['rate']:
+            line += f'  {_format_count(event["rate"], unit)}/s'
+        if event['event'] == 'end':
+            line += f'  {event["elapsed_s"]:.2f}s'
+        elif event['eta_s'] is not None:
+            line += f'  ETA {_format_seconds(event["eta_s"])}'
+        if event['item'] is not None and event['event'] != 'end':
+            line += f'  {event["item"]}'
+        return line
+
+    def __call__(self, event):
+        if event['event'] == 'start':
+            return
+        if event['event'] == 'end':
+            self.stream.write(('\r\033[K' if self.is_tty else '') + self.format(event) + '\n')
+        elif self.is_tty:
+            self.stream.write('\r\033[K' + self.format(event))
+        self.stream.flush()
+
+
+class JSONLinesEmitter:
+    """每个事件写一行 JSON；path 为 None 时写到标准错误"""
+
+    def __init__(self, path=None, stream=None):
+        self._owns_stream = stream is None and path is not None
+        self.stream = stream or (open(path, 'w', encoding='utf-8') if path else sys.stderr)
+
+    def __call__(self, event):
+        self.stream.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+
+
+class _NullTask:
+    """禁用进度时使用的空任务"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def advance(self, n=1, item=None):
+        pass
+
+
+class NullProgress:
+    """默认的空进度报告器，所有钩子均为无操作"""
+
+    enabled = False
+    _task = _NullTask()
+
+    def task(self, name, total=None, unit='items'):
+        return self._task
+
+    def emit(self, event):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROGRESS = NullProgress()
+
+
+def add_progress_arguments(parser):
+    """为 argparse 解析器添加 --progress / --progress-file 选项"""
+    parser.add_argument('--progress', nargs='?', const='bar', default=None, choices=['bar', 'json'],
+                        help='显示进度：bar 为终端进度条（默认），json 为每行一个 JSON 事件（输出到标准错误）')
+    parser.add_argument('--progress-file', default=None, metavar='FILE',
+                        help='把进度事件以 JSON lines 格式写入指定文件')
+
+
+def add_progress_options(parser):
+    """为 optparse 解析器（xml2xls.py / xls2xml.py）添加相同的选项"""
+    parser.add_option('--progress', type='choice', choices=['bar', 'json'], default=None, metavar='bar|json',
+                      help='Show progress as a terminal bar (bar) or JSON lines on stderr (json).')
+    parser.add_option('--progress-file', default=None, metavar='FILE',
+                      help='Write progress events as JSON lines to FILE.')
+
+
+def progress_from_args(args):
+    """根据命令行参数创建进度报告器，未开启时返回 NULL_PROGRESS"""
+    kind = getattr(args, 'progress', None)
+    path = getattr(args, 'progress_file', None)
+    sinks = []
+    if kind == 'bar':
+        sinks.append(TTYProgressBar())
+    elif kind == 'json':
+        sinks.append(JSONLinesEmitter())
+    if path:
+        sinks.append(JSONLinesEmitter(path))
+    if not sinks:
+        return NULL_PROGRESS
+    return ProgressReporter(*sinks)
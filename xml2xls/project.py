@@ -0,0 +1,144 @@
+import os
+
+try:
+    from .csv_exchange import export_to_table
+    from .differ import diff_workbook_against_snapshot
+    from .processor import (NULL_PROFILER, ResourceCache, build_export_rows, build_untranslated_sheets,
+                            compute_coverage, dedup_export_rows, dedup_rows, import_updates, is_table_file,
+                            read_workbook_updates, write_workbook)
+    from .progress import NULL_PROGRESS
+    from .sharding import export_shards
+    from .staleness import find_stale
+except ImportError:
+    from csv_exchange import export_to_table
+    from differ import diff_workbook_against_snapshot
+    from processor import (NULL_PROFILER, ResourceCache, build_export_rows, build_untranslated_sheets,
+                           compute_coverage, dedup_export_rows, dedup_rows, import_updates, is_table_file,
+                           read_workbook_updates, write_workbook)
+    from progress import NULL_PROGRESS
+    from sharding import export_shards
+    from staleness import find_stale
+
+"""
+库接口：Project
+
+供常驻进程（构建插件、其他 Python 工具）直接调用，避免每次操作都启动一个 processor.py 子进程并重新解析全部资源。
+Project 在首次使用时解析各语言的字符串文件并缓存，之后只重新解析发生变化的语言。
+
+用法：
+    from xml2xls import Project
+
+    project = Project('app/src/main/res')
+    project.export_workbook('translations.xlsx')
+    changes = project.diff('vendor.xlsx', mode='partial')
+    project.import_workbook('vendor.xlsx', mode='partial')
+    print(project.coverage())
+
+    # 文件由其他工具修改后，显式丢弃缓存
+    project.invalidate('de')
+"""
+
+
+class Project:
+    """一个 Android 资源目录（包含 values/values-xx 的文件夹）
+
+    auto_refresh 为 True（默认）时，每次访问前用 stat 检查文件的 (mtime, size)，只重新解析变化的语言；
+    为 False 时完全使用缓存，文件变化后需由调用方调用 invalidate()。
+    返回的数据由缓存持有，调用方不应修改。
+    """
+
+    def __init__(self, res_dir, auto_refresh=True, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+        if not os.path.isdir(res_dir):
+            raise ValueError(f"资源目录不存在：{res_dir}")
+        self.res_dir = res_dir
+        self.auto_refresh = auto_refresh
+        self.profiler = profiler
+        self.progress = progress
+        self._cache = ResourceCache(res_dir)
+        self._loaded = False
+
+    def refresh(self):
+        """检查资源文件并重新解析变化的语言，返回重新解析（或已删除）的语言集合"""
+        changed = self._cache.refresh(self.profiler)
+        self._loaded = True
+        return changed
+
+    def invalidate(self, lang_code=None):
+        """丢弃指定语言（默认全部）的缓存，下次访问时重新解析"""
+        self._cache.invalidate(lang_code)
+        self._loaded = False
+
+    def snapshot(self):
+        """返回 (默认顺序, 语言代码列表, {语言: {key: value}})，结构与 load_resources() 相同"""
+        if self.auto_refresh or not self._loaded:
+            self.refresh()
+        return self._cache.snapshot()
+
+    @property
+    def locales(self):
+        """全部语言代码，默认语言 en 在第一位"""
+        return ['en'] + self.snapshot()[1]
+
+    @property
+    def keys(self):
+        """默认语言中的 key，按文件中的顺序"""
+        return self.snapshot()[0]
+
+    def strings(self, lang_code='en'):
+        """返回指定语言的 {key: 原始内容}"""
+        all_langs = self.snapshot()[2]
+        if lang_code not in all_langs:
+            raise KeyError(f"未找到语言：{lang_code}")
+        return all_langs[lang_code]
+
+    def coverage(self):
+        """各语言的翻译覆盖率 {语言: {total, translated, missing, coverage}}"""
+        return compute_coverage(*self.snapshot())
+
+    def export_workbook(self, output_file, shards=None, shard_by='keys', max_cells=None, layout='rows', dedup=False,
+                        stale='flag'):
+        """导出工作簿（.csv/.tsv 扩展名时导出文本表格；指定 shards/max_cells 时分片），返回写出的主文件路径
+
+        layout 为未翻译表布局（rows/locales/long），dedup 为 True 时按源文本合并翻译单元（见 dedup_rows）；分片导出仅支持 rows 且不支持去重；
+        stale 为 'flag' 时过期翻译（见 staleness.py）也列入未翻译表并标出，为 'ignore' 时不检查
+        """
+        snapshot = self.snapshot()
+        if (layout != 'rows' or dedup) and (shards or max_cells):
+            raise ValueError("分片导出和流水线导出仅支持 rows 布局，且不支持去重")
+        stale_entries = find_stale(self.res_dir, snapshot) if stale != 'ignore' else None
+        if shards or max_cells:
+            return export_shards(self.res_dir, output_file, shards, 'cells' if max_cells else shard_by, max_cells,
+                                 profiler=self.profiler, progress=self.progress, snapshot=snapshot,
+                                 stale=stale_entries)
+        if is_table_file(output_file):
+            return export_to_table(self.res_dir, output_file, self.profiler, self.progress, snapshot, layout,
+                                   stale_entries, dedup)[0]
+        with self.profiler.phase('build_matrix') as p:
+            headers, main_rows, untrans_rows = build_export_rows(*snapshot, stale_entries)
+            untranslated_sheets = (build_untranslated_sheets(*snapshot, layout, stale_entries) if layout != 'rows'
+                                   else None)
+            if dedup:
+                main_rows, untrans_rows = dedup_export_rows(headers, main_rows, untrans_rows, stale_entries)
+                if untranslated_sheets is not None:
+                    untranslated_sheets = [(title, sheet_headers, dedup_rows(rows, sheet_headers, stale_entries))
+                                           for title, sheet_headers, rows in untranslated_sheets]
+            p.items = len(main_rows) + len(untrans_rows)
+        write_workbook(output_file, headers, main_rows, untrans_rows, self.profiler, self.progress,
+                       untranslated_sheets, stale_entries)
+        return output_file
+
+    def import_workbook(self, input_file, mode='full', strict=False, validate_report=None):
+        """从工作簿（或 CSV/TSV、分片清单）导入到资源目录，返回 {语言: 写入的条目数}
+
+        写入前校验占位符与标签（见 validation.py）；strict 为 True 时有问题则不写入并抛出 ValueError
+        """
+        lang_data = read_workbook_updates(input_file, mode, self.profiler, progress=self.progress)
+        import_updates(self.res_dir, lang_data, self.profiler, self.progress, strict, validate_report)
+        # 写回的文件可能在同一时间戳内被多次修改，直接丢弃这些语言的缓存
+        for lang_code in lang_data:
+            self.invalidate(lang_code)
+        return {lang_code: len(data) for lang_code, data in lang_data.items()}
+
+    def diff(self, input_file, mode='full'):
+        """比较工作簿与当前资源，返回按语言划分的变更集（见 differ.py），不修改任何文件"""
+        return diff_workbook_against_snapshot(self.snapshot(), input_file, mode)
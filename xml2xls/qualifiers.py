@@ -0,0 +1,110 @@
+import re
+
+"""
+Android 资源目录限定符解析
+
+values 目录名由 '-' 连接的限定符组成，顺序与 Android 的规定一致：
+  values-mcc310-mnc004-de-rDE-ldrtl-sw600dp-w720dp-h720dp-large-long-round-widecg-highdr-land-car-night-hdpi-...-v21
+只有“语言”限定符表示翻译；其余限定符（夜间模式、屏幕方向、尺寸、密度、API 版本等）是同一语言在特定设备配置下的变体。
+
+翻译目录只包含语言限定符：values-de、values-zh-rCN、values-b+sr+Latn；默认目录 values 对应默认语言。
+values-night、values-v21、values-sw600dp、values-land 等不含语言的目录，以及 values-de-night 这类
+语言加其他限定符的变体目录都不是翻译目录，只按目录名判断，不打开其中的任何文件。
+
+语言限定符统一为 Android 的写法作为列名：语言小写、地区大写（zh-rcn -> zh-rCN），
+只有语言和字母地区的 BCP-47 写法转为旧写法（b+de+DE -> de-rDE）；带文字、变体或数字地区（UN M.49，如 419）的
+保留 b+ 写法（b+sr+Latn、b+es+419），旧写法不支持这些子标签，aapt2 会拒绝 values-es-r419 这样的目录。
+"""
+
+# 非语言限定符（不区分大小写）
+OTHER_QUALIFIER = re.compile(
+    r'mcc\d+|mnc\d+|ldrtl|ldltr|sw\d+dp|[wh]\d+dp|small|normal|large|xlarge|long|notlong|round|notround'
+    r'|widecg|nowidecg|highdr|lowdr|port|land|square|car|desk|television|appliance|watch|vrheadset'
+    r'|night|notnight|feminine|masculine|neuter|[lmh]dpi|x{1,3}hdpi|nodpi|tvdpi|anydpi|\d+dpi'
+    r'|notouch|stylus|finger|keysexposed|keyshidden|keyssoft|nokeys|qwerty|12key|navexposed|navhidden'
+    r'|nonav|dpad|trackball|wheel|v\d+',
+    re.IGNORECASE)
+MCC_MNC = re.compile(r'(?:mcc|mnc)\d+', re.IGNORECASE)
+LANGUAGE = re.compile(r'[a-zA-Z]{2,3}')
+REGION = re.compile(r'r([a-zA-Z]{2}|\d{3})')
+BCP47_REGION = re.compile(r'[a-zA-Z]{2}|\d{3}')
+BCP47_SCRIPT = re.compile(r'[a-zA-Z]{4}')
+
+
+def parse_locale(qualifier):
+    """解析单个语言限定符（de、zh-rCN、b+sr+Latn），返回 (语言, 文字, 地区, 变体元组)；不是语言时返回 None"""
+    if qualifier[:2].lower() == 'b+':
+        subtags = qualifier[2:].split('+')
+        if not LANGUAGE.fullmatch(subtags[0]):
+            return None
+        language, script, region, variants = subtags[0].lower(), None, None, []
+        for subtag in subtags[1:]:
+            if script is None and region is None and not variants and BCP47_SCRIPT.fullmatch(subtag):
+                script = subtag.title()
+            elif region is None and not variants and BCP47_REGION.fullmatch(subtag):
+                region = subtag.upper()
+            elif subtag:
+                variants.append(subtag.lower())
+            else:
+                return None
+        return language, script, region, tuple(variants)
+    parts = qualifier.split('-')
+    if len(parts) > 2 or not LANGUAGE.fullmatch(parts[0]) or OTHER_QUALIFIER.fullmatch(parts[0]):
+        return None
+    region = None
+    if len(parts) == 2:
+        match = REGION.fullmatch(parts[1])
+        if not match:
+            return None
+        region = match.group(1).upper()
+    return parts[0].lower(), None, region, ()
+
+
+def format_locale(language, script=None, region=None, variants=()):
+    """(语言, 文字, 地区, 变体) -> 规范的 Android 语言限定符"""
+    if script or variants or (region and region.isdigit()):
+        return 'b+' + '+'.join([language] + [s for s in (script, region) if s] + list(variants))
+    return f'{language}-r{region}' if region else language
+
+
+def normalize_locale(qualifier):
+    """规范语言限定符的写法（zh-rcn -> zh-rCN）；不是语言限定符时原样返回"""
+    parsed = parse_locale(qualifier)
+    return format_locale(*parsed) if parsed else qualifier
+
+
+def parse_values_dir(dir_name):
+    """解析 values 目录名，返回 (语言四元组或 None, [其他限定符])；不是 values 目录或有无法识别的限定符时返回 None"""
+    parts = dir_name.split('-')
+    if parts[0] != 'values':
+        return None
+    parts = parts[1:]
+    index = 0
+    # 语言之前只可能是 MCC/MNC
+    while index < len(parts) and MCC_MNC.fullmatch(parts[index]):
+        index += 1
+    locale = None
+    if index < len(parts) and not OTHER_QUALIFIER.fullmatch(parts[index]):
+        # 旧写法的地区是下一个限定符（zh-rCN）
+        if index + 1 < len(parts) and REGION.fullmatch(parts[index + 1]):
+            locale = parse_locale(parts[index] + '-' + parts[index + 1])
+            consumed = 2
+        else:
+            locale = parse_locale(parts[index])
+            consumed = 1
+        if locale is None:
+            return None
+        parts = parts[:index] + parts[index + consumed:]
+    if not all(OTHER_QUALIFIER.fullmatch(part) for part in parts):
+        return None
+    return locale, parts
+
+
+def locale_qualifier(dir_name):
+    """翻译目录的规范语言限定符（values-zh-rcn -> zh-rCN）；默认 values 目录返回 ''，其他目录返回 None"""
+    if dir_name == 'values':
+        return ''
+    parsed = parse_values_dir(dir_name)
+    if parsed is None or parsed[0] is None or parsed[1]:
+        return None
+    return format_locale(*parsed[0])
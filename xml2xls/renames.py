@@ -0,0 +1,183 @@
+import json
+import os
+from hashlib import blake2b
+
+try:
+    from .differ import iter_snapshot_rows, iter_workbook_rows
+    from .processor import NULL_PROFILER, load_resources, write_updates
+    from .progress import NULL_PROGRESS
+    from .staleness import source_digest
+except ImportError:
+    from differ import iter_snapshot_rows, iter_workbook_rows
+    from processor import NULL_PROFILER, load_resources, write_updates
+    from progress import NULL_PROGRESS
+    from staleness import source_digest
+
+"""
+重命名检测
+
+开发者在 values/strings.xml 中重命名（或移动）key 后，各语言的翻译仍挂在旧 key 上，新 key 在下一次导出时变成未翻译。
+导出时与上一版本（上次导出的工作簿，或旧版本的资源目录）比较：
+  旧侧有、当前默认语言没有的 key 为“移除”，当前有、旧侧没有的 key 为“新增”；
+  新增 key 的源文本先在移除 key 源文本的精确哈希索引中查找（exact），
+  找不到时用字符三元组倒排索引取候选，按 Dice 系数打分，超过阈值的为近似匹配（near）。
+两种索引都只访问共享哈希或三元组的候选，不做两两比较；出现在过多源文本中的三元组不参与取候选。
+
+匹配结果可以只列出，也可以把旧 key 的翻译带到新 key 上（仅填补新 key 尚未翻译的语言）。
+旧 key 的翻译优先取各语言文件中残留的旧条目，其次取上一版本工作簿中的值。
+
+用法：
+python3 processor.py --export res_dir translations.xlsx --rename-base last.xlsx [--rename-apply exact|all]
+"""
+
+NGRAM = 3
+DEFAULT_THRESHOLD = 0.8
+# 三元组出现在超过这么多移除 key 的源文本中时不用于取候选（类似停用词）
+MAX_POSTINGS = 200
+
+
+def _hash(text):
+    return blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def _ngrams(text):
+    text = ' '.join(text.lower().split())
+    if len(text) < NGRAM:
+        return {text} if text else set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def load_base(base, current_keys, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """读取上一版本，返回 (全部旧 key 集合, {移除的 key: {语言: 值}})；base 为工作簿路径或资源目录"""
+    with profiler.phase('load_base') as p:
+        if os.path.isdir(base):
+            rows = iter_snapshot_rows(*load_resources(base, profiler, progress))
+        else:
+            rows = iter_workbook_rows(base, 'full')
+        rows = iter(rows)
+        lang_codes = next(rows, [])
+        base_keys = set()
+        removed = {}
+        for key, values in rows:
+            base_keys.add(key)
+            if key not in current_keys:
+                removed[key] = {lc: v for lc, v in zip(lang_codes, values) if v}
+        p.items = len(base_keys)
+    return base_keys, removed
+
+
+def detect_renames(snapshot, base, threshold=DEFAULT_THRESHOLD, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """检测重命名，返回 [{'old', 'new', 'kind', 'score', 'source', 'translations'}]，按新 key 在默认语言中的顺序排列
+
+    source 为旧 key 的源文本；translations 为可以带到新 key 上的 {语言: 旧 key 的翻译}（只含新 key 尚未翻译的语言）
+    """
+    default_order, lang_codes, all_langs = snapshot
+    default_data = all_langs['en']
+    base_keys, removed = load_base(base, default_data, profiler, progress)
+    added = [key for key in default_order if key not in base_keys]
+    if not added or not removed:
+        return []
+
+    with profiler.phase('match_renames') as p:
+        # 精确索引：源文本哈希 -> 移除的 key
+        exact = {}
+        for key, values in removed.items():
+            source = values.get('en')
+            if source:
+                exact.setdefault(_hash(source), []).append(key)
+
+        matches = {}
+        used = set()
+        unmatched = []
+        for key in added:
+            candidates = [k for k in exact.get(_hash(default_data[key]), ()) if k not in used]
+            if candidates:
+                # 同一源文本对应多个旧 key 时，选 key 名最接近的
+                old = max(candidates, key=lambda k: _dice(_ngrams(k), _ngrams(key)))
+                used.add(old)
+                matches[key] = (old, 'exact', 1.0)
+            else:
+                unmatched.append(key)
+
+        # 近似索引：三元组 -> 移除的 key
+        grams = {}
+        postings = {}
+        for key, values in removed.items():
+            if key in used or not values.get('en'):
+                continue
+            grams[key] = _ngrams(values['en'])
+            for gram in grams[key]:
+                postings.setdefault(gram, []).append(key)
+
+        pairs = []
+        for key in unmatched:
+            target = _ngrams(default_data[key])
+            shared = {}
+            for gram in target:
+                keys = postings.get(gram)
+                if keys and len(keys) <= MAX_POSTINGS:
+                    for old in keys:
+                        shared[old] = shared.get(old, 0) + 1
+            for old, count in shared.items():
+                score = 2 * count / (len(target) + len(grams[old]))
+                if score >= threshold:
+                    pairs.append((score, key, old))
+        # 分数从高到低一对一分配
+        for score, key, old in sorted(pairs, key=lambda item: -item[0]):
+            if key not in matches and old not in used:
+                used.add(old)
+                matches[key] = (old, 'near', round(score, 3))
+
+        results = []
+        for key in added:
+            if key not in matches:
+                continue
+            old, kind, score = matches[key]
+            translations = {}
+            for lang_code in lang_codes:
+                data = all_langs[lang_code]
+                value = data.get(old) or removed[old].get(lang_code)
+                if value and key not in data:
+                    translations[lang_code] = value
+            results.append({'old': old, 'new': key, 'kind': kind, 'score': score, 'source': removed[old]['en'],
+                            'translations': translations})
+        p.items = len(results)
+    return results
+
+
+def _dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def apply_renames(res_dir, renames, kinds=('exact',), profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """把旧 key 的翻译写到新 key 上，返回 {语言: 写入的条目数}
+
+    带过来的翻译依据的是旧 key 的源文本，在旁路文件中按旧源文本的哈希记录（见 staleness.py）：
+    近似匹配的源文本与新 key 不同，这些翻译在之后的导出中仍标为过期，等待译者确认
+    """
+    lang_data = {}
+    based_on = {}
+    for item in renames:
+        if item['kind'] in kinds:
+            digest = source_digest(item['source'])
+            for lang_code, value in item['translations'].items():
+                lang_data.setdefault(lang_code, {})[item['new']] = value
+                based_on.setdefault(lang_code, {})[item['new']] = digest
+    if lang_data:
+        write_updates(res_dir, lang_data, profiler, progress, based_on)
+    return {lang_code: len(data) for lang_code, data in lang_data.items()}
+
+
+def format_renames(renames):
+    lines = []
+    for item in renames:
+        label = '精确' if item['kind'] == 'exact' else f"近似 {item['score']}"
+        lines.append(f"[{label}] {item['old']} -> {item['new']}（可带入 {len(item['translations'])} 种语言的翻译）")
+    return '\n'.join(lines)
+
+
+def write_renames_json(renames, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'renames': renames}, f, ensure_ascii=False, indent=2)
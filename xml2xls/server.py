@@ -0,0 +1,272 @@
+import asyncio
+import functools
+import json
+import os
+import tempfile
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from .differ import diff_workbook_against_snapshot, summarize
+    from .processor import (ResourceCache, build_export_rows, compute_coverage, import_updates, read_workbook_updates,
+                            write_workbook)
+    from .qualifiers import normalize_locale
+    from .staleness import find_stale
+except ImportError:
+    from differ import diff_workbook_against_snapshot, summarize
+    from processor import (ResourceCache, build_export_rows, compute_coverage, import_updates, read_workbook_updates,
+                           write_workbook)
+    from qualifiers import normalize_locale
+    from staleness import find_stale
+
+"""
+本地 asyncio HTTP 服务
+
+常驻进程内保留 ResourceCache（已解析的资源）和最近一次导出的工作簿，
+调用方无需为每次操作付出解释器启动、openpyxl 导入和全量解析的开销。
+
+启动命令：
+python3 processor.py --serve res_dir [--host 127.0.0.1] [--port 8765]
+
+接口：
+  GET  /coverage                      各语言翻译覆盖率（JSON）
+  GET  /export                        返回 xlsx 工作簿内容（过期翻译列入未翻译表并标出，见 staleness.py）
+  POST /import?mode=full|partial      请求体为 xlsx 文件内容，导入到资源目录；写入前校验占位符与标签，
+                                      返回的 issues 为校验问题，加 &strict=1 时有问题则不写入并返回 400
+  POST /diff?mode=full|partial        请求体为 xlsx 文件内容，返回与当前资源的差异（JSON）
+
+工作簿生成等 CPU 密集操作在线程池中执行，不阻塞事件循环；
+同一时刻对同一操作的并发请求共享同一个正在进行的计算结果。
+"""
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAX_BODY_SIZE = 512 * 1024 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TranslationService:
+    """单个资源目录的服务状态：解析缓存、导出结果缓存和进行中的计算"""
+
+    def __init__(self, res_dir):
+        self.res_dir = res_dir
+        self.cache = ResourceCache(res_dir)
+        # 资源目录的读写互斥：导入写文件期间不做刷新/快照
+        self._lock = asyncio.Lock()
+        # 进行中的计算：key -> Future
+        self._inflight = {}
+        # 最近一次导出：(资源指纹, xlsx 字节)
+        self._export_result = None
+        # 每次导入加一，计入资源指纹：导入前开始的导出不会在导入后被当作最新结果
+        self._generation = 0
+
+    async def _single_flight(self, key, func):
+        """相同 key 的并发调用只执行一次 func，其余调用等待同一结果"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except Exception as e:
+            future.set_exception(e)
+            # 避免无人等待时出现 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _snapshot(self):
+        """在线程池中刷新缓存（只解析变动的文件），返回 (资源指纹, 快照)"""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            fingerprint = await loop.run_in_executor(None, self.cache.fingerprint)
+            await loop.run_in_executor(None, self.cache.refresh)
+            return (self._generation, fingerprint), self.cache.snapshot()
+
+    async def coverage(self):
+        async def compute():
+            _, snapshot = await self._snapshot()
+            return compute_coverage(*snapshot)
+
+        return await self._single_flight('coverage', compute)
+
+    async def export(self):
+        async def compute():
+            fingerprint, snapshot = await self._snapshot()
+            if self._export_result and self._export_result[0] == fingerprint:
+                return self._export_result[1]
+            content = await asyncio.get_running_loop().run_in_executor(None, _render_workbook, self.res_dir, snapshot)
+            self._export_result = (fingerprint, content)
+            return content
+
+        return await self._single_flight('export', compute)
+
+    async def import_(self, body, mode, strict=False):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            path = await loop.run_in_executor(None, _write_temp_workbook, body)
+            try:
+                lang_data = await loop.run_in_executor(None, read_workbook_updates, path, mode)
+                issues = await loop.run_in_executor(None, functools.partial(
+                    import_updates, self.res_dir, lang_data, strict=strict))
+            except ValueError as e:
+                raise HttpError(400, str(e))
+            finally:
+                os.remove(path)
+            # 写回的文件可能在同一时间戳内被改写且大小不变，不能只靠 stat 发现，直接丢弃这些语言的缓存和导出结果
+            for lang_code in lang_data:
+                self.cache.invalidate(normalize_locale(lang_code))
+            self._export_result = None
+            self._generation += 1
+        return {'mode': mode, 'updated': sorted(lang_data), 'issues': issues}
+
+    async def diff(self, body, mode):
+        loop = asyncio.get_running_loop()
+        _, snapshot = await self._snapshot()
+        path = await loop.run_in_executor(None, _write_temp_workbook, body)
+        try:
+            changes = await loop.run_in_executor(None, diff_workbook_against_snapshot, snapshot, path, mode)
+        finally:
+            os.remove(path)
+        return {'summary': summarize(changes), 'changes': changes}
+
+
+def _render_workbook(res_dir, snapshot):
+    """生成工作簿并返回 xlsx 字节内容"""
+    stale = find_stale(res_dir, snapshot)
+    headers, main_rows, untrans_rows = build_export_rows(*snapshot, stale)
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_workbook(path, headers, main_rows, untrans_rows, stale=stale)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def _write_temp_workbook(body):
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(body)
+    return path
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HttpError(400, 'malformed request line')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, 'request body too large')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, body
+
+
+def _write_response(writer, status, body, content_type):
+    head = (
+        f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        'Connection: close\r\n'
+        '\r\n'
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+async def _dispatch(service, method, target, body):
+    url = urlsplit(target)
+    query = parse_qs(url.query)
+    mode = query.get('mode', ['full'])[0]
+    if mode not in ('full', 'partial'):
+        raise HttpError(400, f'invalid mode: {mode}')
+
+    routes = {
+        '/coverage': ('GET',),
+        '/export': ('GET',),
+        '/import': ('POST',),
+        '/diff': ('POST',),
+    }
+    if url.path not in routes:
+        raise HttpError(404, f'unknown endpoint: {url.path}')
+    if method not in routes[url.path]:
+        raise HttpError(405, f'{method} not allowed for {url.path}')
+
+    if url.path == '/coverage':
+        return 200, _json_body(await service.coverage()), 'application/json; charset=utf-8'
+    if url.path == '/export':
+        return 200, await service.export(), XLSX_CONTENT_TYPE
+    if not body:
+        raise HttpError(400, 'request body must contain an xlsx workbook')
+    if url.path == '/import':
+        strict = query.get('strict', ['0'])[0] not in ('0', 'false', '')
+        return 200, _json_body(await service.import_(body, mode, strict)), 'application/json; charset=utf-8'
+    return 200, _json_body(await service.diff(body, mode)), 'application/json; charset=utf-8'
+
+
+async def _handle(service, reader, writer):
+    try:
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            status, body, content_type = await _dispatch(service, *request)
+        except HttpError as e:
+            status, body, content_type = e.status, _json_body({'error': str(e)}), 'application/json; charset=utf-8'
+        except Exception as e:
+            status, body, content_type = 500, _json_body({'error': str(e)}), 'application/json; charset=utf-8'
+        _write_response(writer, status, body, content_type)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(res_dir, host='127.0.0.1', port=8765):
+    service = TranslationService(res_dir)
+    # 启动时预热缓存
+    await service._snapshot()
+    server = await asyncio.start_server(lambda r, w: _handle(service, r, w), host, port)
+    print(f"服务已启动：http://{host}:{port}（资源目录：{res_dir}，Ctrl+C 退出）")
+    async with server:
+        await server.serve_forever()
+
+
+def run(res_dir, host='127.0.0.1', port=8765):
+    try:
+        asyncio.run(serve(res_dir, host, port))
+    except KeyboardInterrupt:
+        print("服务已停止")
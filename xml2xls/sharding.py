@@ -0,0 +1,168 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .processor import NULL_PROFILER, build_export_rows, load_resources, read_workbook_updates, write_workbook
+    from .progress import NULL_PROGRESS
+except ImportError:
+    from processor import NULL_PROFILER, build_export_rows, load_resources, read_workbook_updates, write_workbook
+    from progress import NULL_PROGRESS
+
+"""
+分片导出 / 并发分片导入
+
+大项目的单个工作簿打开和 load_workbook 都很慢，供应商也希望按语种分工，因此导出时可以拆成多个分片：
+  keys     按 key 范围均分为 N 片，每片包含全部语言列
+  locales  按语言分组为 N 片，每片包含 key、en 和本组语言列
+  cells    按 key 范围切分，保证每片的单元格数不超过 max_cells
+
+各分片在进程池中并行写出，并生成清单文件 <name>.manifest.json。
+导入时可以指定清单文件或分片所在目录，分片并发读取后合并为一个变更集，每个 strings.xml 只写一次。
+"""
+
+SHARD_STRATEGIES = ('keys', 'locales', 'cells')
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+def manifest_path(output_file):
+    return os.path.splitext(output_file)[0] + MANIFEST_SUFFIX
+
+
+def _shard_file(output_file, index, count):
+    base, ext = os.path.splitext(output_file)
+    return f"{base}.part{index + 1:0{len(str(count))}d}{ext}"
+
+
+def _chunks(items, count):
+    """把 items 尽量均匀地切成 count 段（保持顺序，不产生空段）"""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def plan_shards(default_order, lang_codes, shards=None, shard_by='keys', max_cells=None):
+    """返回分片计划 [(key 列表, 语言代码列表)]"""
+    if shard_by not in SHARD_STRATEGIES:
+        raise ValueError(f"不支持的分片方式：{shard_by}")
+    if shard_by == 'locales':
+        return [(default_order, group) for group in _chunks(lang_codes, shards or 1)]
+    if shard_by == 'cells':
+        if not max_cells:
+            raise ValueError("按单元格数分片需要指定 max_cells")
+        # 每行单元格数 = key + en + 其他语言
+        rows_per_shard = max(1, max_cells // (len(lang_codes) + 2))
+        return [(default_order[i:i + rows_per_shard], lang_codes)
+                for i in range(0, len(default_order), rows_per_shard)] or [([], lang_codes)]
+    return [(keys, lang_codes) for keys in _chunks(default_order, shards or 1)] or [([], lang_codes)]
+
+
+def _write_shard(path, headers, main_rows, untrans_rows, stale=None, deterministic=False, compression='default'):
+    digest = write_workbook(path, headers, main_rows, untrans_rows, stale=stale, deterministic=deterministic,
+                            compression=compression)
+    return os.path.getsize(path), digest
+
+
+def export_shards(res_dir, output_file, shards=None, shard_by='keys', max_cells=None, workers=None,
+                  profiler=NULL_PROFILER, progress=NULL_PROGRESS, snapshot=None, deterministic=False,
+                  compression='default', stale=None):
+    """按计划拆分并在进程池中并行写出分片，返回清单文件路径；snapshot 为已解析的资源时不再读取 res_dir
+
+    stale 为过期的翻译 {语言: key 集合}（见 staleness.py），各分片中对应的行列入未翻译表并标出；
+    deterministic 为 True 时各分片以确定性方式保存，清单中记录每个分片的 sha256；compression 为 zip 压缩级别
+    """
+    default_order, lang_codes, all_langs = snapshot or load_resources(res_dir, profiler, progress)
+
+    with profiler.phase('build_matrix') as p:
+        jobs = []
+        plan = plan_shards(default_order, lang_codes, shards, shard_by, max_cells)
+        for index, (keys, group) in enumerate(plan):
+            # 按语言分片时只保留本分片语言的过期翻译
+            shard_stale = {lc: stale[lc] for lc in group if lc in stale} if stale else None
+            headers, main_rows, untrans_rows = build_export_rows(keys, group, all_langs, shard_stale)
+            jobs.append((_shard_file(output_file, index, len(plan)), headers, main_rows, untrans_rows, shard_stale))
+            p.items += len(main_rows)
+
+    manifest = {
+        'version': 1,
+        'shard_by': shard_by,
+        'locales': ['en'] + lang_codes,
+        'shards': [],
+    }
+    with profiler.phase('write_shards') as p, progress.task('save', unit='bytes') as task, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_write_shard, *job, deterministic, compression) for job in jobs]
+        for (path, headers, main_rows, untrans_rows, _), future in zip(jobs, futures):
+            size, digest = future.result()
+            manifest['shards'].append({
+                'file': os.path.basename(path),
+                'locales': headers[1:],
+                'first_key': main_rows[0][0] if main_rows else None,
+                'last_key': main_rows[-1][0] if main_rows else None,
+                'rows': len(main_rows),
+                'untranslated_rows': len(untrans_rows),
+                'bytes': size,
+            })
+            if digest:
+                manifest['shards'][-1]['sha256'] = digest
+            p.items += size
+            task.advance(size, item=os.path.basename(path))
+
+    path = manifest_path(output_file)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def is_sharded_input(input_file):
+    return os.path.isdir(input_file) or input_file.endswith(MANIFEST_SUFFIX)
+
+
+def list_shard_files(input_file):
+    """根据清单文件或分片目录返回分片文件列表"""
+    if os.path.isdir(input_file):
+        return sorted(os.path.join(input_file, name) for name in os.listdir(input_file)
+                      if name.endswith(('.xlsx', '.csv', '.tsv')) and not name.startswith('~$')
+                      and '.untranslated.' not in name)
+    with open(input_file, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(input_file)
+    return [os.path.join(base_dir, shard['file']) for shard in manifest['shards']]
+
+
+def read_shard_updates(input_file, mode='full', workers=None, profiler=NULL_PROFILER, escape=True,
+                       progress=NULL_PROGRESS, lang_data=None):
+    """并发读取全部分片并合并为 {语言: {key: 值}}；lang_data 为 spill.SpillPartitions 时逐个分片追加到磁盘分区"""
+    files = list_shard_files(input_file)
+    if not files:
+        raise ValueError(f"未找到分片文件：{input_file}")
+
+    if lang_data is None:
+        lang_data = {}
+    workers = workers or os.cpu_count() or 1
+    with profiler.phase('read_shards') as p, progress.task('read', total=len(files), unit='files') as task, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def merge(path, future):
+            # 按分片顺序合并，同一 (语言, key) 出现在多个分片时以后面的分片为准
+            for lang_code, data in future.result().items():
+                lang_data.setdefault(lang_code, {}).update(data)
+                p.items += len(data)
+            task.advance(item=os.path.basename(path))
+
+        # 最多 2 * workers 个分片在读取或等待合并，合并后的分片结果随即释放
+        futures = deque()
+        for path in files:
+            futures.append((path, executor.submit(read_workbook_updates, path, mode, NULL_PROFILER, escape)))
+            if len(futures) >= 2 * workers:
+                merge(*futures.popleft())
+        while futures:
+            merge(*futures.popleft())
+    return lang_data
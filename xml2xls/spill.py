@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+from collections.abc import Mapping
+
+try:
+    from .escaping import escape_mapping
+    from .processor import (NULL_PROFILER, default_string_files, parse_string_files, read_workbook_updates,
+                            write_updates)
+    from .progress import NULL_PROGRESS
+    from .validation import build_signatures, report_issues, validate_locale
+except ImportError:
+    from escaping import escape_mapping
+    from processor import (NULL_PROFILER, default_string_files, parse_string_files, read_workbook_updates,
+                           write_updates)
+    from progress import NULL_PROGRESS
+    from validation import build_signatures, report_issues, validate_locale
+
+"""
+超大工作簿的外存导入（--out-of-core）
+
+普通导入先把整张表读成一个 {语言: {key: 值}}，再校验、写回；几十种语言、大段 HTML 文案的工作簿会占用大量内存。
+外存导入分两步：
+  spill  以只读模式流式读取工作簿（CSV/TSV、分片同样支持），读到的 (key, 值) 不在内存中汇总，
+         而是按语言追加到临时目录中的分区文件（每种语言一个文件，每行一条 [key, 值]）
+  merge  逐个语言从分区读回、转义、校验，再合并写入该语言的字符串文件；同一时刻只有一种语言的数据在内存中
+所以峰值内存取决于最大的单个语言，而不是整个工作簿。校验在写回读分区时顺带完成，每个分区只读一遍；
+--strict 时所有语言都校验通过才会写入，必须先单独读一遍分区校验，分区会被读两遍。
+临时目录默认在系统临时目录下，可用 --spill-dir 指定（例如空间更大的磁盘），导入结束后删除。
+
+用法：
+python3 processor.py --import res_dir translations.xlsx --out-of-core [--spill-dir /mnt/scratch]
+"""
+
+# 每个分区文件的写缓冲区大小
+PARTITION_BUFFER = 1 << 16
+
+
+class _Partition:
+    """一种语言的分区文件：每行一条 [key, 值]，读回时同一 key 以后写入的为准"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', buffering=PARTITION_BUFFER)
+
+    def __setitem__(self, key, value):
+        self._file.write(json.dumps([key, value], ensure_ascii=False) + '\n')
+
+    def update(self, data):
+        for key, value in data.items():
+            self[key] = value
+
+    def close(self):
+        self._file.close()
+
+    def load(self):
+        self.close()
+        data = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, value = json.loads(line)
+                data[key] = value
+        return data
+
+
+class SpillPartitions(Mapping):
+    """按语言分区存放在磁盘上的导入数据 {语言: {key: 值}}
+
+    读取时作为 lang_data 传给 read_workbook_updates（escape=False）：setdefault 返回该语言的分区，
+    读到的值直接追加到分区文件。读取完成后 partitions[语言] 从磁盘读回该语言的数据并转义，不做缓存。
+    作为上下文管理器使用，退出时删除临时目录。
+    """
+
+    def __init__(self, spill_dir=None):
+        self._tmp = tempfile.TemporaryDirectory(prefix='strings2xls-spill-', dir=spill_dir)
+        self._partitions = {}
+
+    def setdefault(self, lang_code, default=None):
+        partition = self._partitions.get(lang_code)
+        if partition is None:
+            # 语言代码可能含有 +（b+sr+Latn），文件名只用序号
+            path = os.path.join(self._tmp.name, f'{len(self._partitions):04d}.jsonl')
+            partition = self._partitions[lang_code] = _Partition(path)
+        return partition
+
+    def __getitem__(self, lang_code):
+        return escape_mapping(self._partitions[lang_code].load())
+
+    def __contains__(self, lang_code):
+        return lang_code in self._partitions
+
+    def __iter__(self):
+        return iter(self._partitions)
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def close(self):
+        for partition in self._partitions.values():
+            partition.close()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def validate_partitions(source, partitions, profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """逐个语言读回分区并校验占位符与标签（见 validation.py），返回问题列表"""
+    with profiler.phase('validate') as p, progress.task('validate', total=len(partitions), unit='locales') as task:
+        signatures = build_signatures(source)
+        issues = []
+        value_count = 0
+        for lang_code in partitions:
+            if lang_code != 'en':
+                data = partitions[lang_code]
+                issues.extend(validate_locale(lang_code, data, signatures))
+                value_count += len(data)
+            task.advance(item=lang_code)
+        p.items = value_count
+    return issues
+
+
+class _ValidatingPartitions(Mapping):
+    """写回时顺带校验的分区（不是 --strict 时使用）：write_updates 读回每种语言时校验，问题收集到 issues
+
+    write_updates 先读 en，据此更新源文本后再校验其他语言，与先校验再写入的结果相同
+    """
+
+    def __init__(self, partitions, source):
+        self._partitions = partitions
+        self._source = source
+        self._signatures = None
+        self.issues = []
+
+    def __getitem__(self, lang_code):
+        data = self._partitions[lang_code]
+        if lang_code == 'en':
+            self._source = {**self._source, **data}
+        else:
+            if self._signatures is None:
+                self._signatures = build_signatures(self._source)
+                self._source = None
+            self.issues.extend(validate_locale(lang_code, data, self._signatures))
+        return data
+
+    def __contains__(self, lang_code):
+        return lang_code in self._partitions
+
+    def __iter__(self):
+        return iter(self._partitions)
+
+    def __len__(self):
+        return len(self._partitions)
+
+
+def import_out_of_core(res_dir, input_file, mode='full', profiler=NULL_PROFILER, progress=NULL_PROGRESS,
+                       strict=False, validate_report=None, spill_dir=None):
+    """按语言分区导入（见模块说明），返回导入的语言列表"""
+    with SpillPartitions(spill_dir) as partitions:
+        read_workbook_updates(input_file, mode, profiler, escape=False, progress=progress, lang_data=partitions)
+        _, source, _ = parse_string_files(default_string_files(res_dir))
+        if not strict:
+            checked = _ValidatingPartitions(partitions, source)
+            del source
+            write_updates(res_dir, checked, profiler, progress)
+            report_issues(checked.issues, report_path=validate_report)
+            return list(partitions)
+        if 'en' in partitions:
+            source = {**source, **partitions['en']}
+        report_issues(validate_partitions(source, partitions, profiler, progress), strict, validate_report)
+        del source
+        write_updates(res_dir, partitions, profiler, progress)
+        return list(partitions)
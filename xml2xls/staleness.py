@@ -0,0 +1,159 @@
+import csv
+import json
+import os
+from hashlib import blake2b
+
+from openpyxl import Workbook
+
+try:
+    from .csv_exchange import untranslated_path
+    from .escaping import unescape_xml_chars
+    from .xlsx_writer import file_digest, save_workbook
+    from .processor import (LONG_HEADERS, UNTRANSLATED_SHEET, default_string_files, discover_locales,
+                            is_table_file, parse_string_files)
+except ImportError:
+    from csv_exchange import untranslated_path
+    from escaping import unescape_xml_chars
+    from xlsx_writer import file_digest, save_workbook
+    from processor import (LONG_HEADERS, UNTRANSLATED_SHEET, default_string_files, discover_locales,
+                           is_table_file, parse_string_files)
+
+"""
+过期翻译跟踪
+
+导入时把每条翻译所依据的源文本（默认语言 en）哈希记录在资源目录下的旁路文件 .strings2xls-sources.json 中，
+导出时与当前源文本的哈希比较，源文本改过而翻译没有更新的条目即为过期（stale）。
+
+旁路文件只保存：
+  sources   每个 key 在最近一次导入时的源文本哈希
+  locales   各语言中与 sources 不同的记录（即导入后源文本又变化、而该语言没有重新翻译的条目）
+所以大小与 key 数和过期条目数成正比，与语言数无关。哈希为 blake2b 的前 4 字节（十六进制）。
+
+规则：
+  - 导入时值发生变化（或新增）的翻译记为依据当前源文本；值未变化的翻译保留原来的记录，
+    所以把带着旧译文的未翻译表原样导回，不会让过期条目变成最新
+  - 首次导入时，已有的翻译都视为依据当前源文本
+
+用法：
+python3 processor.py --export res_dir translations.xlsx [--stale flag|ignore] [--stale-extract stale.xlsx]
+"""
+
+SIDECAR_NAME = '.strings2xls-sources.json'
+DIGEST_SIZE = 4
+
+
+def source_digest(value):
+    return blake2b(value.encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def sidecar_path(res_dir):
+    return os.path.join(res_dir, SIDECAR_NAME)
+
+
+def load_sidecar(res_dir):
+    """读取旁路文件，返回 {'sources': {key: 哈希}, 'locales': {语言: {key: 哈希}}}；不存在时返回 None"""
+    path = sidecar_path(res_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_import(res_dir, changed, based_on=None):
+    """导入写回之后更新旁路文件；changed 为 {语言: 本次值发生变化的 key 集合}
+
+    based_on 为 {语言: {key: 源文本哈希}} 时，这些翻译按指定的哈希记录（例如重命名时从旧 key 带过来的翻译），
+    与当前源文本不同的仍为过期
+    """
+    _, default_data, _ = parse_string_files(default_string_files(res_dir))
+    sources = {key: source_digest(value) for key, value in default_data.items()}
+    previous = load_sidecar(res_dir) or {'sources': {}, 'locales': {}}
+    old_sources = previous['sources']
+    locales = {lc: dict(entries) for lc, entries in previous['locales'].items()}
+
+    # 上次记录之后源文本变化的 key：各语言中未重新翻译的条目需要显式记下旧哈希
+    moved = {key: digest for key, digest in old_sources.items() if key in sources and sources[key] != digest}
+    if moved:
+        for lang_code, paths in discover_locales(res_dir):
+            _, data, _ = parse_string_files(paths)
+            entries = locales.setdefault(lang_code, {})
+            for key, digest in moved.items():
+                if key in data and key not in entries:
+                    entries[key] = digest
+
+    for lang_code, keys in changed.items():
+        if lang_code == 'en':
+            continue
+        entries = locales.setdefault(lang_code, {})
+        for key in keys:
+            entries.pop(key, None)
+    for lang_code, digests in (based_on or {}).items():
+        if lang_code != 'en':
+            locales.setdefault(lang_code, {}).update(digests)
+
+    # 只保留与当前 sources 不同的记录
+    locales = {lc: {key: digest for key, digest in entries.items() if key in sources and sources[key] != digest}
+               for lc, entries in locales.items()}
+    locales = {lc: entries for lc, entries in locales.items() if entries}
+
+    tmp_path = sidecar_path(res_dir) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'sources': sources, 'locales': locales}, f, ensure_ascii=False,
+                  separators=(',', ':'))
+    os.replace(tmp_path, sidecar_path(res_dir))
+
+
+def find_stale(res_dir, snapshot):
+    """返回过期的翻译 {语言: key 集合}；没有旁路文件时返回空 dict"""
+    sidecar = load_sidecar(res_dir)
+    if not sidecar:
+        return {}
+    default_order, lang_codes, all_langs = snapshot
+    default_data = all_langs['en']
+    sources = sidecar['sources']
+    current = {}
+    # 源文本相对 sources 变化的 key，所有没有单独记录的翻译都过期
+    changed_keys = []
+    for key in default_order:
+        digest = current[key] = source_digest(default_data[key])
+        if key in sources and sources[key] != digest:
+            changed_keys.append(key)
+
+    stale = {}
+    for lang_code in lang_codes:
+        data = all_langs[lang_code]
+        entries = sidecar['locales'].get(lang_code, {})
+        keys = {key for key in changed_keys if key in data and key not in entries}
+        keys.update(key for key, digest in entries.items() if key in data and key in current and current[key] != digest)
+        if keys:
+            stale[lang_code] = keys
+    return stale
+
+
+def write_stale_extract(output_file, snapshot, stale, deterministic=False, compression='default'):
+    """只写出过期条目（long 布局：key, locale, en, translation, previous），可直接用 --mode partial 导入
+
+    单元格与导出的工作簿相同，是反转义后的文本；返回 (写出的文件路径, sha256)；CSV/TSV 写到对应的 .untranslated 文件；
+    deterministic 为 False 时 sha256 为 None（见 xlsx_writer.py）
+    """
+    default_order, lang_codes, all_langs = snapshot
+    default_data = all_langs['en']
+    headers = LONG_HEADERS + ['previous']
+    rows = [[key, lc, unescape_xml_chars(default_data[key]), '', unescape_xml_chars(all_langs[lc][key])]
+            for key in default_order for lc in lang_codes if key in stale.get(lc, ())]
+    if is_table_file(output_file):
+        output_file = untranslated_path(output_file)
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, dialect='excel-tab' if output_file.lower().endswith('.tsv') else 'excel')
+            writer.writerow(headers)
+            writer.writerows(rows)
+        # 文本表格本身就是确定性的
+        digest = file_digest(output_file) if deterministic else None
+    else:
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet(title=UNTRANSLATED_SHEET)
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+        digest = save_workbook(wb, output_file, deterministic, compression)
+    return output_file, digest
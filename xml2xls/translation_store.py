@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+
+try:
+    from .processor import (build_export_rows, check_import, default_string_files, discover_locales,
+                            parse_string_files, read_workbook_updates, write_updates, write_workbook)
+    from .validation import add_validate_arguments, check_updates
+    from .xlsx_writer import add_compression_argument
+except ImportError:
+    from processor import (build_export_rows, check_import, default_string_files, discover_locales,
+                           parse_string_files, read_workbook_updates, write_updates, write_workbook)
+    from validation import add_validate_arguments, check_updates
+    from xlsx_writer import add_compression_argument
+
+"""
+基于 SQLite 的翻译存储
+
+将解析后的资源（Android strings.xml、Flutter .arb 或 easy_localization .json）加载到本地 SQLite 数据库，
+按文件 (mtime, size) 增量同步，值发生变化时记录更新时间。之后可以直接在数据库上查询缺失翻译、
+最近变更和覆盖率，或按语言/缺失项导出筛选后的工作簿，无需重新扫描资源目录。
+
+命令：
+  python3 translation_store.py --db store.db sync --root app/src/main/res --format android
+  python3 translation_store.py --db store.db missing --locales de,fr
+  python3 translation_store.py --db store.db changed --since 2025-06-01
+  python3 translation_store.py --db store.db coverage
+  python3 translation_store.py --db store.db export translations.xlsx [--locales de,fr] [--missing-only]
+  python3 translation_store.py --db store.db import translations.xlsx [--mode full|partial] [--write-back] [--strict]
+"""
+
+FORMATS = ('android', 'arb', 'json')
+DEFAULT_LOCALE = 'en'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    locale   TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strings (
+    key        TEXT NOT NULL,
+    locale     TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    position   INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (key, locale)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_strings_locale_key ON strings (locale, key);
+CREATE INDEX IF NOT EXISTS idx_strings_updated_at ON strings (updated_at);
+'''
+
+
+def discover_files(root, fmt):
+    """返回 [(语言代码, [文件路径])]，默认语言排在第一位；Android 的一种语言可能有多个字符串文件"""
+    if fmt == 'android':
+        return [(DEFAULT_LOCALE, default_string_files(root))] + discover_locales(root)
+
+    files = []
+    for name in sorted(os.listdir(root)):
+        if fmt == 'arb' and name.startswith('app_') and name.endswith('.arb'):
+            files.append((name[len('app_'):-len('.arb')], [os.path.join(root, name)]))
+        elif fmt == 'json' and name.endswith('.json'):
+            files.append((name[:-len('.json')], [os.path.join(root, name)]))
+    files.sort(key=lambda item: item[0] != DEFAULT_LOCALE)
+    return files
+
+
+def load_files(paths, fmt):
+    """解析一种语言的资源文件，返回 (顺序, {key: value})"""
+    if fmt == 'android':
+        return parse_string_files(paths)[:2]
+
+    with open(paths[0], 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    order = []
+    strings = {}
+    for key, value in data.items():
+        # .arb 中以 @ 开头的是元数据，不是翻译内容
+        if fmt == 'arb' and key.startswith('@'):
+            continue
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        order.append(key)
+        strings[key] = str(value)
+    return order, strings
+
+
+def locale_file_path(root, fmt, locale):
+    if fmt == 'android':
+        dir_name = 'values' if locale == DEFAULT_LOCALE else f'values-{locale}'
+        return os.path.join(root, dir_name, 'strings.xml')
+    if fmt == 'arb':
+        return os.path.join(root, f'app_{locale}.arb')
+    return os.path.join(root, f'{locale}.json')
+
+
+class TranslationStore:
+    """SQLite 翻译存储；(key, locale) 为主键，另有 (locale, key) 与 updated_at 索引"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _get_meta(self, name):
+        row = self.conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    @property
+    def root(self):
+        return self._get_meta('root')
+
+    @property
+    def format(self):
+        return self._get_meta('format')
+
+    def sync(self, root=None, fmt=None):
+        """增量同步：只重新解析文件 (mtime, size) 或文件列表发生变化的语言，返回 {语言: 变更条数}"""
+        root = root or self.root
+        fmt = fmt or self.format or 'android'
+        if not root:
+            raise ValueError("未指定资源目录，请使用 --root")
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的格式：{fmt}")
+
+        now = time.time()
+        changes = {}
+        with self.conn:
+            self._set_meta('root', os.path.abspath(root))
+            self._set_meta('format', fmt)
+            known = {path: (locale, mtime_ns, size) for path, locale, mtime_ns, size
+                     in self.conn.execute('SELECT path, locale, mtime_ns, size FROM files')}
+
+            known_paths = {}
+            for path, (locale, _, _) in known.items():
+                known_paths.setdefault(locale, set()).add(path)
+
+            seen = set()
+            seen_locales = set()
+            for locale, paths in discover_files(root, fmt):
+                paths = [os.path.abspath(path) for path in paths if os.path.exists(path)]
+                if not paths:
+                    continue
+                seen.update(paths)
+                seen_locales.add(locale)
+                stats = [(path, os.stat(path)) for path in paths]
+                if set(paths) == known_paths.get(locale) and \
+                        all(known[path] == (locale, st.st_mtime_ns, st.st_size) for path, st in stats):
+                    continue
+                # 同一语言的任一文件变化时整体重新解析，条目可能在文件之间移动
+                order, strings = load_files(paths, fmt)
+                changes[locale] = self._replace_locale(locale, order, strings, now)
+                self.conn.executemany('INSERT OR REPLACE INTO files (path, locale, mtime_ns, size) VALUES (?, ?, ?, ?)',
+                                      [(path, locale, st.st_mtime_ns, st.st_size) for path, st in stats])
+
+            # 文件被删除时移除记录；语言的文件全部删除时清除该语言的数据
+            for path in set(known) - seen:
+                locale = known[path][0]
+                self.conn.execute('DELETE FROM files WHERE path = ?', (path,))
+                if locale not in seen_locales:
+                    cursor = self.conn.execute('DELETE FROM strings WHERE locale = ?', (locale,))
+                    changes[locale] = cursor.rowcount
+        return changes
+
+    def _replace_locale(self, locale, order, strings, now):
+        """用解析结果替换某语言的数据，只有值真正变化的条目才会更新 updated_at"""
+        existing = dict(self.conn.execute('SELECT key, value FROM strings WHERE locale = ?', (locale,)))
+        changed = 0
+        for position, key in enumerate(order):
+            value = strings[key]
+            if existing.get(key) != value:
+                self.conn.execute('INSERT OR REPLACE INTO strings (key, locale, value, position, updated_at) '
+                                  'VALUES (?, ?, ?, ?, ?)', (key, locale, value, position, now))
+                changed += 1
+            else:
+                self.conn.execute('UPDATE strings SET position = ? WHERE key = ? AND locale = ?',
+                                  (position, key, locale))
+        removed = set(existing) - set(strings)
+        self.conn.executemany('DELETE FROM strings WHERE key = ? AND locale = ?',
+                              [(key, locale) for key in removed])
+        return changed + len(removed)
+
+    def locales(self):
+        """返回除默认语言外的所有语言代码"""
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT locale FROM strings WHERE locale != ? ORDER BY locale', (DEFAULT_LOCALE,))]
+
+    def missing(self, locales=None):
+        """返回 {语言: [缺少翻译的 key]}，key 按默认语言中的顺序排列"""
+        result = {}
+        for locale in locales or self.locales():
+            result[locale] = [row[0] for row in self.conn.execute(
+                'SELECT d.key FROM strings d WHERE d.locale = ? AND NOT EXISTS '
+                '(SELECT 1 FROM strings s WHERE s.key = d.key AND s.locale = ?) ORDER BY d.position',
+                (DEFAULT_LOCALE, locale))]
+        return result
+
+    def changed_since(self, timestamp, locales=None):
+        """返回 updated_at 不早于 timestamp 的 [(key, 语言, 值, 更新时间)]"""
+        sql = 'SELECT key, locale, value, updated_at FROM strings WHERE updated_at >= ?'
+        params = [timestamp]
+        if locales:
+            sql += f' AND locale IN ({",".join("?" * len(locales))})'
+            params += list(locales)
+        return self.conn.execute(sql + ' ORDER BY updated_at, locale, key', params).fetchall()
+
+    def coverage(self):
+        """返回 {语言: {'total', 'translated', 'missing', 'coverage'}}"""
+        total = self.conn.execute('SELECT COUNT(*) FROM strings WHERE locale = ?', (DEFAULT_LOCALE,)).fetchone()[0]
+        result = {}
+        for locale, translated in self.conn.execute(
+                'SELECT s.locale, COUNT(*) FROM strings s JOIN strings d ON d.key = s.key AND d.locale = ? '
+                'WHERE s.locale != ? GROUP BY s.locale ORDER BY s.locale', (DEFAULT_LOCALE, DEFAULT_LOCALE)):
+            result[locale] = {
+                'total': total,
+                'translated': translated,
+                'missing': total - translated,
+                'coverage': round(translated / total, 4) if total else 1.0,
+            }
+        return result
+
+    def snapshot(self, locales=None, keys=None):
+        """返回与 processor.load_resources() 相同结构的 (默认顺序, 语言代码列表, {语言: 数据})"""
+        lang_codes = list(locales or self.locales())
+        default_order = [row[0] for row in self.conn.execute(
+            'SELECT key FROM strings WHERE locale = ? ORDER BY position', (DEFAULT_LOCALE,))]
+        if keys is not None:
+            keys = set(keys)
+            default_order = [key for key in default_order if key in keys]
+        all_langs = {}
+        for locale in [DEFAULT_LOCALE] + lang_codes:
+            all_langs[locale] = dict(self.conn.execute(
+                'SELECT key, value FROM strings WHERE locale = ?', (locale,)))
+        return default_order, lang_codes, all_langs
+
+    def export_workbook(self, output_file, locales=None, missing_only=False, compression='default'):
+        """从数据库导出工作簿，可按语言筛选，或只导出至少缺一种翻译的 key；compression 为 zip 压缩级别"""
+        keys = None
+        if missing_only:
+            keys = set()
+            for missing_keys in self.missing(locales).values():
+                keys.update(missing_keys)
+        default_order, lang_codes, all_langs = self.snapshot(locales, keys)
+        # 只有 Android 的值是 strings.xml 的写法，需要反转义；Flutter 的值本身就是文本
+        headers, main_rows, untrans_rows = build_export_rows(default_order, lang_codes, all_langs,
+                                                             unescape=(self.format or 'android') == 'android')
+        write_workbook(output_file, headers, main_rows, untrans_rows, compression=compression)
+        return len(main_rows)
+
+    def import_workbook(self, input_file, mode='full', write_back=False, strict=False, validate_report=None):
+        """将工作簿中的翻译写入数据库；write_back 为 True 时同时写回资源文件
+
+        写回前先校验占位符与标签（见 validation.py）；strict 为 True 且有问题时数据库和资源文件都不写入
+        """
+        fmt = self.format or 'android'
+        lang_data = read_workbook_updates(input_file, mode, escape=(fmt == 'android'))
+        if write_back:
+            self.check_write_back(lang_data, strict, validate_report)
+        now = time.time()
+        with self.conn:
+            for locale, data in lang_data.items():
+                existing = dict(self.conn.execute('SELECT key, value FROM strings WHERE locale = ?', (locale,)))
+                next_position = len(existing)
+                for key, value in data.items():
+                    if existing.get(key) == value:
+                        continue
+                    if key in existing:
+                        self.conn.execute('UPDATE strings SET value = ?, updated_at = ? WHERE key = ? AND locale = ?',
+                                          (value, now, key, locale))
+                    else:
+                        self.conn.execute('INSERT INTO strings (key, locale, value, position, updated_at) '
+                                          'VALUES (?, ?, ?, ?, ?)', (key, locale, value, next_position, now))
+                        next_position += 1
+        if write_back:
+            self.write_back(lang_data)
+        return lang_data
+
+    def check_write_back(self, lang_data, strict=False, validate_report=None):
+        """以默认语言为准校验将要写回的译文，返回问题列表；strict 为 True 且有问题时抛出 ValueError"""
+        if not self.root:
+            raise ValueError("数据库中没有记录资源目录，请先执行 sync")
+        if (self.format or 'android') == 'android':
+            return check_import(self.root, lang_data, strict, validate_report)
+        # arb / json 的占位符都是 {name} 形式
+        source = dict(self.conn.execute('SELECT key, value FROM strings WHERE locale = ?', (DEFAULT_LOCALE,)))
+        source.update(lang_data.get(DEFAULT_LOCALE, {}))
+        return check_updates(source, lang_data, 'flutter', strict, validate_report, DEFAULT_LOCALE)
+
+    def write_back(self, lang_data):
+        """将 {语言: {key: value}} 写回资源目录"""
+        root = self.root
+        fmt = self.format or 'android'
+        if not root:
+            raise ValueError("数据库中没有记录资源目录，请先执行 sync")
+        if fmt == 'android':
+            write_updates(root, lang_data)
+            return
+        for locale, data in lang_data.items():
+            path = locale_file_path(root, fmt, locale)
+            translations = {}
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    translations = json.load(f)
+            translations.update(data)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(translations, f, ensure_ascii=False, indent=2)
+
+
+def parse_locales(value):
+    return [lc.strip() for lc in value.split(',') if lc.strip()] if value else None
+
+
+def parse_since(value):
+    """支持 Unix 时间戳或 ISO 日期（如 2025-06-01）"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='基于 SQLite 的翻译存储')
+    parser.add_argument('--db', default='translations.db', help='数据库文件路径（默认 translations.db）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_sync = subparsers.add_parser('sync', help='从资源目录增量同步到数据库')
+    parser_sync.add_argument('--root', help='资源目录（首次同步必填，之后默认使用上次的目录）')
+    parser_sync.add_argument('--format', choices=FORMATS, help='资源格式（默认 android）')
+
+    parser_missing = subparsers.add_parser('missing', help='列出缺少翻译的 key')
+    parser_missing.add_argument('--locales', help='逗号分隔的语言代码，默认全部')
+
+    parser_changed = subparsers.add_parser('changed', help='列出指定时间之后变更的字符串')
+    parser_changed.add_argument('--since', required=True, help='Unix 时间戳或 ISO 日期')
+    parser_changed.add_argument('--locales', help='逗号分隔的语言代码，默认全部')
+
+    subparsers.add_parser('coverage', help='输出各语言翻译覆盖率')
+
+    parser_export = subparsers.add_parser('export', help='从数据库导出工作簿')
+    parser_export.add_argument('excel_file')
+    parser_export.add_argument('--locales', help='逗号分隔的语言代码，默认全部')
+    parser_export.add_argument('--missing-only', action='store_true', help='只导出至少缺少一种翻译的 key')
+    add_compression_argument(parser_export)
+
+    parser_import = subparsers.add_parser('import', help='将工作簿导入数据库')
+    parser_import.add_argument('excel_file')
+    parser_import.add_argument('--mode', choices=['full', 'partial'], default='full')
+    parser_import.add_argument('--write-back', action='store_true', help='同时写回资源文件')
+    add_validate_arguments(parser_import)
+
+    args = parser.parse_args()
+
+    with TranslationStore(args.db) as store:
+        if args.command == 'sync':
+            started = time.perf_counter()
+            changes = store.sync(args.root, args.format)
+            print(f"同步完成，耗时 {time.perf_counter() - started:.3f}s，变更：{changes or '无'}")
+        elif args.command == 'missing':
+            for locale, keys in store.missing(parse_locales(args.locales)).items():
+                print(f"{locale}: {len(keys)}")
+                for key in keys:
+                    print(f"    {key}")
+        elif args.command == 'changed':
+            for key, locale, value, updated_at in store.changed_since(parse_since(args.since),
+                                                                     parse_locales(args.locales)):
+                print(f"{datetime.fromtimestamp(updated_at).isoformat(timespec='seconds')}  {locale}  {key}  {value}")
+        elif args.command == 'coverage':
+            print(json.dumps(store.coverage(), ensure_ascii=False, indent=2))
+        elif args.command == 'export':
+            rows = store.export_workbook(args.excel_file, parse_locales(args.locales), args.missing_only,
+                                         args.compression)
+            print(f"导出成功：{args.excel_file}（{rows} 行）")
+        elif args.command == 'import':
+            lang_data = store.import_workbook(args.excel_file, args.mode, args.write_back, args.strict,
+                                              args.validate_report)
+            print(f"导入成功！\n模式：{args.mode} \n更新语言：{list(lang_data.keys())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .processor import NULL_PROFILER
+    from .progress import NULL_PROGRESS
+except ImportError:
+    from processor import NULL_PROFILER
+    from progress import NULL_PROGRESS
+
+"""
+导入时的占位符与标签校验
+
+翻译中丢失或改坏的占位符（%1$s、%d、{userAgreement}）以及不成对的内联标签（<b>、<xliff:g>）会在运行时崩溃或显示错乱。
+导入时对每个源 key（默认语言）只提取一次签名，再把各语言的译文与之比较：
+  android  格式说明符：带序号的（%1$s）按集合比较，允许调整顺序；不带序号的（%s %d）必须保持顺序；%% 与 %n 不计
+  flutter  {name} 占位符按集合比较；ICU plural/select 文案只比较选择参数（{count, plural, ...} 中的 count）
+  两种格式都比较内联标签（只看标签名，不看属性），并检查译文中的标签是否正确嵌套
+语言数较多时各语言分给多个进程并行比较；不含 % { < 的译文只需一次扫描，记号序列与源文本相同的译文只需两次。
+
+问题分为 placeholder（占位符不一致）、markup（标签不一致）、unbalanced（标签数量一致但嵌套错误）三类，
+默认打印报告并继续导入；--strict 时有问题则不写入任何文件并以非零状态退出。
+
+用法：
+python3 processor.py --import res_dir translations.xlsx [--strict] [--validate-report report.json]
+python3 i18n_manager.py import --input translations.xlsx [--strict] [--validate-report report.json]
+"""
+
+FORMATS = ('android', 'flutter')
+# Java/Android 格式说明符 %[序号$][标志][宽度][.精度]转换，分组为 (序号, 标志宽度精度, 转换)，flutter_sync.py 共用：
+#   转换只限 Formatter 的转换字符，t/T 后须跟日期时间后缀（50%OFF 中的 %O 不是说明符）
+#   紧跟在数字后的不带序号的 % 是百分号（Up to 30%discount），不是 %d
+#   不接受空格标志，否则 "50% off"、"100 % sure" 中的 "% o"、"% s" 会被当作占位符
+FORMAT_SPECIFIER = (r'(?:(?<!\d)%|%(?=\d+\$))(?:(\d+)\$)?([-#+0,(]*\d*(?:\.\d+)?)'
+                    r'([bBhHsScCdoxXeEfgGaA]|[tT][HIklMSLNpzZsQBbhAaCYyjmdeRTrDFc])')
+ANDROID_TOKEN = re.compile(FORMAT_SPECIFIER + r'|%%|<(/?)([A-Za-z][\w:.-]*)[^<>]*?(/?)>')
+FLUTTER_TOKEN = re.compile(r'\{\s*(\w+)\s*[},]|<(/?)([A-Za-z][\w:.-]*)[^<>]*?(/?)>')
+ICU_SELECTOR = re.compile(r'\{\s*(\w+)\s*,\s*(?:plural|select|selectordinal)\s*,')
+ICU_TAG = re.compile(r'<(/?)([A-Za-z][\w:.-]*)[^<>]*?(/?)>')
+# 记号的原文序列：译文中的记号序列与源文本完全相同时不必再提取签名
+RAW_TOKEN = {'android': ANDROID_TOKEN, 'flutter': FLUTTER_TOKEN}
+# 含有这些字符的译文才需要提取签名
+SPECIAL = {'android': re.compile(r'[%<]'), 'flutter': re.compile(r'[{<]')}
+EMPTY_SIGNATURE = ((), ())
+# 每个进程至少分到这么多条译文时才并行
+PARALLEL_MIN_VALUES = 200000
+
+
+def _tags(matches):
+    """(是否闭合标签, 标签名, 是否自闭合) -> 标签记号与是否正确嵌套"""
+    tokens = []
+    stack = []
+    balanced = True
+    for closing, name, self_closing in matches:
+        if self_closing:
+            tokens.append(f'<{name}/>')
+        elif closing:
+            tokens.append(f'</{name}>')
+            if not stack or stack.pop() != name:
+                balanced = False
+        else:
+            tokens.append(f'<{name}>')
+            stack.append(name)
+    return tokens, balanced and not stack
+
+
+def signature(value, fmt='android'):
+    """返回 ((无序记号...), (有序记号...))，以及标签是否正确嵌套"""
+    unordered = []
+    ordered = []
+    if fmt == 'android':
+        tag_matches = []
+        for match in ANDROID_TOKEN.finditer(value):
+            index, _, conversion, closing, name, self_closing = match.groups()
+            if name:
+                tag_matches.append((closing, name, self_closing))
+            elif conversion in ('n', None):
+                continue
+            elif index:
+                unordered.append(f'%{index}${conversion}')
+            else:
+                ordered.append(f'%{conversion}')
+    else:
+        selectors = ICU_SELECTOR.findall(value)
+        if selectors:
+            unordered.extend('{' + name + ',}' for name in set(selectors))
+            tag_matches = ICU_TAG.findall(value)
+        else:
+            tag_matches = []
+            names = set()
+            for name, closing, tag, self_closing in FLUTTER_TOKEN.findall(value):
+                if tag:
+                    tag_matches.append((closing, tag, self_closing))
+                else:
+                    names.add(name)
+            unordered.extend('{' + name + '}' for name in names)
+    tokens, balanced = _tags(tag_matches)
+    unordered.extend(tokens)
+    return (tuple(sorted(unordered)), tuple(ordered)), balanced
+
+
+def _raw_tokens(pattern):
+    finditer = pattern.finditer
+    return lambda value: [match.group(0) for match in finditer(value)]
+
+
+def build_signatures(source, fmt='android'):
+    """为每个源 key 提取一次签名 {key: (签名, 记号序列)}"""
+    special = SPECIAL[fmt].search
+    findall = _raw_tokens(RAW_TOKEN[fmt])
+    empty = (EMPTY_SIGNATURE, [])
+    signatures = {}
+    for key, value in source.items():
+        if isinstance(value, str) and special(value):
+            signatures[key] = (signature(value, fmt)[0], findall(value))
+        else:
+            signatures[key] = empty
+    return signatures
+
+
+def _describe(expected, found):
+    missing = Counter(expected[0]) - Counter(found[0])
+    extra = Counter(found[0]) - Counter(expected[0])
+    if expected[1] != found[1]:
+        missing.update(Counter(expected[1]) - Counter(found[1]))
+        extra.update(Counter(found[1]) - Counter(expected[1]))
+    changed = list(missing) + list(extra)
+    if changed and all(token.startswith('<') for token in changed):
+        kind = 'markup'
+    else:
+        # 不带序号的占位符只是顺序不同时 missing/extra 均为空
+        kind = 'placeholder'
+    return kind, sorted(missing.elements()), sorted(extra.elements())
+
+
+def validate_locale(lang_code, data, signatures, fmt='android'):
+    """比较一种语言的译文 {key: 值}，返回问题列表"""
+    special = SPECIAL[fmt].search
+    findall = _raw_tokens(RAW_TOKEN[fmt])
+    issues = []
+    for key, value in data.items():
+        entry = signatures.get(key)
+        # 源语言中没有的 key 无从比较
+        if entry is None or not isinstance(value, str):
+            continue
+        expected, raw = entry
+        if not special(value):
+            if not raw:
+                continue
+            found, balanced = EMPTY_SIGNATURE, True
+        elif findall(value) == raw:
+            continue
+        else:
+            found, balanced = signature(value, fmt)
+        if found != expected:
+            kind, missing, extra = _describe(expected, found)
+            issues.append({'locale': lang_code, 'key': key, 'kind': kind, 'missing': missing, 'extra': extra})
+        elif not balanced:
+            issues.append({'locale': lang_code, 'key': key, 'kind': 'unbalanced', 'missing': [], 'extra': []})
+    return issues
+
+
+def _validate_chunk(chunk, signatures, fmt):
+    return [issue for lang_code, data in chunk for issue in validate_locale(lang_code, data, signatures, fmt)]
+
+
+def validate_updates(source, lang_data, fmt='android', source_locale='en', workers=None, profiler=NULL_PROFILER,
+                     progress=NULL_PROGRESS):
+    """以 source（默认语言 {key: 值}）为准校验 {语言: {key: 值}}，返回问题列表（按语言、key 的导入顺序）"""
+    with profiler.phase('validate') as p, progress.task('validate', total=len(lang_data), unit='locales') as task:
+        signatures = build_signatures(source, fmt)
+        locales = [(lang_code, data) for lang_code, data in lang_data.items() if lang_code != source_locale]
+        total = sum(len(data) for _, data in locales)
+        workers = min(workers or os.cpu_count() or 1, len(locales), total // PARALLEL_MIN_VALUES)
+        if workers > 1:
+            # 每个进程分到若干种语言，签名随每组只传一次
+            chunks = [locales[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_validate_chunk, chunk, signatures, fmt) for chunk in chunks]
+                results = {}
+                for chunk, future in zip(chunks, futures):
+                    for issue in future.result():
+                        results.setdefault(issue['locale'], []).append(issue)
+                    task.advance(len(chunk))
+            issues = [issue for lang_code, _ in locales for issue in results.get(lang_code, ())]
+        else:
+            issues = []
+            for lang_code, data in locales:
+                issues.extend(validate_locale(lang_code, data, signatures, fmt))
+                task.advance(item=lang_code)
+        p.items = total
+    return issues
+
+
+def format_issues(issues, limit=20):
+    """问题摘要：按语言计数，并列出前 limit 条"""
+    if not issues:
+        return '校验通过：占位符与标签一致'
+    counts = Counter(issue['locale'] for issue in issues)
+    lines = [f"校验发现 {len(issues)} 条问题（" + '，'.join(f'{lc} {n}' for lc, n in counts.items()) + '）']
+    for issue in issues[:limit]:
+        detail = []
+        if issue['missing']:
+            detail.append('缺少 ' + ' '.join(issue['missing']))
+        if issue['extra']:
+            detail.append('多出 ' + ' '.join(issue['extra']))
+        if not detail:
+            detail.append('标签嵌套错误' if issue['kind'] == 'unbalanced' else '不带序号的占位符顺序不同')
+        lines.append(f"  [{issue['kind']}] {issue['locale']} {issue['key']}：{'；'.join(detail)}")
+    if len(issues) > limit:
+        lines.append(f'  ...（其余 {len(issues) - limit} 条见报告文件）')
+    return '\n'.join(lines)
+
+
+def write_report(issues, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'issues': issues}, f, ensure_ascii=False, indent=2)
+
+
+def add_validate_arguments(parser):
+    """为导入命令添加 --strict / --validate-report 选项"""
+    parser.add_argument('--strict', action='store_true',
+                        help='占位符或标签校验有问题时不写入任何文件，并以非零状态退出')
+    parser.add_argument('--validate-report', default=None, metavar='JSON',
+                        help='把占位符与标签校验的全部问题写入 JSON 文件')
+
+
+def check_updates(source, lang_data, fmt='android', strict=False, report_path=None, source_locale='en',
+                  profiler=NULL_PROFILER, progress=NULL_PROGRESS):
+    """校验、打印摘要并按需写报告；strict 且有问题时抛出 ValueError"""
+    issues = validate_updates(source, lang_data, fmt, source_locale, profiler=profiler, progress=progress)
+    return report_issues(issues, strict, report_path)
+
+
+def report_issues(issues, strict=False, report_path=None):
+    """打印校验摘要并按需写报告；strict 且有问题时抛出 ValueError"""
+    print(format_issues(issues))
+    if report_path:
+        write_report(issues, report_path)
+    if strict and issues:
+        raise ValueError(f"占位符与标签校验未通过（{len(issues)} 条问题），未写入任何文件")
+    return issues
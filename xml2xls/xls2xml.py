@@ -10,6 +10,11 @@ import os
 
 import time
 
+try:
+    from .progress import NULL_PROGRESS, add_progress_options, progress_from_args
+except ImportError:
+    from progress import NULL_PROGRESS, add_progress_options, progress_from_args
+
 
 def open_excel(path):
     try:
@@ -43,6 +48,7 @@ def write_to_xml(keys, values, file_path, language_name):
     fo = open(file_path, "wb")
     string_encoding = "<?xml version=\"1.0\" encoding=\"utf-8\"?>\n<resources>\n"
     fo.write(bytes(string_encoding, encoding="utf-8"))
+    count = 0
     for x in range(len(keys)):
         if values[x] is None or values[x] == '':
             Log().error("Language: " + language_name + " Key:" + keys[x] + " value is None. Index:" + str(x + 1))
@@ -52,8 +58,10 @@ def write_to_xml(keys, values, file_path, language_name):
         value = str(values[x])
         content = "    <string name=\"" + key + "\">" + value + "</string>\n"
         fo.write(bytes(content, encoding="utf-8"))
+        count += 1
     fo.write(bytes("</resources>", encoding="utf-8"))
     fo.close()
+    return count
 
 
 def add_parser():
@@ -67,41 +75,46 @@ def add_parser():
                       help="The directory where the xml files will be saved.",
                       metavar="targetDir")
 
+    add_progress_options(parser)
+
     (options, args) = parser.parse_args()
     # print("options: %s, args: %s" % (options, args))
 
     return options
 
 
-def convert_to_xml(file_dir, target_dir):
+def convert_to_xml(file_dir, target_dir, progress=NULL_PROGRESS):
     dest_dir = target_dir + "/xls2xml/" + time.strftime("%Y%m%d_%H%M%S")
-    for _, _, file_names in os.walk(file_dir):
-        xls_file_names = [fi for fi in file_names if fi.endswith(".xls") or fi.endswith(".xlsx")]
-        for file in xls_file_names:
-            data = xlrd.open_workbook(file_dir + "/" + file, 'utf-8')
-            sheet = data.sheets()
-            for table in sheet:
-                first_row = table.row_values(0)
-                keys = table.col_values(0)
-                del keys[0]
-
-                for index in range(len(first_row)):
-                    if index <= 0:
-                        continue
-                    language_name = first_row[index]
-                    values = table.col_values(index)
-                    del values[0]
-
-                    if language_name == "zh-Hans":
-                        language_name = "zh-rCN"
-
-                    path = dest_dir + "/values-" + language_name + "/"
-                    if language_name == 'en':
-                        path = dest_dir + "/values/"
-                    if not os.path.exists(path):
-                        os.makedirs(path)
-                    filename = 'strings.xml'
-                    write_to_xml(keys, values, path + filename, language_name)
+    with progress.task('parse', unit='files') as parse_task, progress.task('write', unit='rows') as write_task:
+        for _, _, file_names in os.walk(file_dir):
+            xls_file_names = [fi for fi in file_names if fi.endswith(".xls") or fi.endswith(".xlsx")]
+            for file in xls_file_names:
+                data = xlrd.open_workbook(file_dir + "/" + file, 'utf-8')
+                parse_task.advance(item=file)
+                sheet = data.sheets()
+                for table in sheet:
+                    first_row = table.row_values(0)
+                    keys = table.col_values(0)
+                    del keys[0]
+
+                    for index in range(len(first_row)):
+                        if index <= 0:
+                            continue
+                        language_name = first_row[index]
+                        values = table.col_values(index)
+                        del values[0]
+
+                        if language_name == "zh-Hans":
+                            language_name = "zh-rCN"
+
+                        path = dest_dir + "/values-" + language_name + "/"
+                        if language_name == 'en':
+                            path = dest_dir + "/values/"
+                        if not os.path.exists(path):
+                            os.makedirs(path)
+                        filename = 'strings.xml'
+                        count = write_to_xml(keys, values, path + filename, language_name)
+                        write_task.advance(count, item=language_name)
     print("Convert %s successfully! you can see xml files in %s" % (
         file_dir, dest_dir))
 
@@ -126,7 +139,9 @@ def start_convert(options):
     if not os.path.exists(target_dir):
         os.makedirs(target_dir)
 
-    convert_to_xml(file_dir, target_dir)
+    progress = progress_from_args(options)
+    convert_to_xml(file_dir, target_dir, progress)
+    progress.close()
 
 
 def main():
@@ -136,4 +151,5 @@ def main():
     # convert_to_xml("/Users/shewenbiao/Desktop/xls2xml", os.getcwd())
 
 
-main()
+if __name__ == '__main__':
+    main()
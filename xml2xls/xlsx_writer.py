@@ -0,0 +1,182 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.writer.excel import ExcelWriter
+
+"""
+工作簿的保存：压缩级别、确定性输出与输入清单
+
+仓库中所有 xlsx 写出（导出、分片、流水线、过期条目、差异表、Flutter 管理脚本）都通过 save_workbook 保存，
+--compression 选择 zip 压缩级别，大项目保存时的大部分时间花在 DEFLATE 上：
+  store    不压缩，最快，文件最大（适合 CI 中间产物）
+  fast     zlib 级别 1
+  default  zlib 默认级别（6），与 openpyxl 默认相同
+  max      zlib 级别 9，最慢，文件最小（适合上传给翻译供应商）
+每次保存后打印文件大小、压缩级别和耗时。
+
+openpyxl 每次保存都会写入当前时间（zip 条目时间戳、docProps/core.xml 的 created/modified），
+同样的资源导出两次得到的 xlsx 字节不同，CI 无法按内容缓存或跳过上传。确定性保存（--deterministic）时：
+  - zip 条目时间戳固定为 1980-01-01，权限与创建系统固定，write_only 工作表的临时文件不带入文件时间
+  - 文档属性的创建/修改时间固定
+  - 条目顺序与 openpyxl 的写出顺序一致（工作表、共享字符串、样式的顺序只取决于内容）
+保存后打印文件的 sha256（内容哈希）。
+
+--skip-unchanged 另外在输出文件旁写入输入清单 <name>.inputs.json，记录全部字符串文件（以及过期翻译旁路文件）的
+sha256、导出选项和输出文件的 sha256。下次导出时输入与选项都没变、输出文件也未被改动，就直接跳过解析和写出。
+
+用法：
+python3 processor.py --export res_dir translations.xlsx --compression store
+python3 processor.py --export res_dir translations.xlsx --deterministic
+python3 processor.py --export res_dir translations.xlsx --skip-unchanged
+"""
+
+COMPRESSION_LEVELS = ('store', 'fast', 'default', 'max')
+# 压缩级别 -> (zip 压缩方式, zlib 级别)
+ZIP_SETTINGS = {
+    'store': (zipfile.ZIP_STORED, None),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'default': (zipfile.ZIP_DEFLATED, None),
+    'max': (zipfile.ZIP_DEFLATED, 9),
+}
+
+# 确定性保存时 zip 条目与文档属性使用的固定时间
+FIXED_ZIP_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_DOC_TIME = datetime.datetime(2000, 1, 1)
+INPUTS_SUFFIX = '.inputs.json'
+HASH_CHUNK = 1 << 20
+HASH_WORKERS = 8
+
+
+class DeterministicZipFile(zipfile.ZipFile):
+    """条目时间戳、权限和创建系统固定的 ZipFile，相同的条目内容总是得到相同的字节"""
+
+    def _zinfo(self, arcname, file_size=0):
+        zinfo = zipfile.ZipInfo(arcname, date_time=FIXED_ZIP_TIME)
+        zinfo.create_system = 3
+        zinfo.external_attr = 0o600 << 16
+        zinfo.compress_type = self.compression
+        # 与 ZipFile.write 相同，压缩级别通过 ZipInfo 传给压缩器
+        zinfo._compresslevel = self.compresslevel
+        zinfo.file_size = file_size
+        return zinfo
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            zinfo_or_arcname = self._zinfo(zinfo_or_arcname)
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        # write_only 工作表先写入临时文件再整体复制，不能带入临时文件的修改时间
+        zinfo = self._zinfo(arcname or os.path.basename(filename), os.path.getsize(filename))
+        with open(filename, 'rb') as src, self.open(zinfo, 'w') as dest:
+            shutil.copyfileobj(src, dest, HASH_CHUNK)
+
+
+def file_digest(path):
+    """文件的 sha256（十六进制）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_workbook(wb, output_file, deterministic=False, compression='default'):
+    """按压缩级别保存工作簿并打印大小与耗时
+
+    deterministic 为 True 时相同内容总是得到相同字节，并返回文件的 sha256，否则返回 None
+    """
+    if compression not in ZIP_SETTINGS:
+        raise ValueError(f"不支持的压缩级别：{compression}")
+    start = time.perf_counter()
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    if deterministic:
+        wb.properties.created = wb.properties.modified = FIXED_DOC_TIME
+        zip_class = DeterministicZipFile
+    else:
+        wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+        zip_class = zipfile.ZipFile
+    compress_type, level = ZIP_SETTINGS[compression]
+    # 先写临时文件再替换，中途失败不会留下不完整的输出
+    tmp_path = output_file + '.tmp'
+    with zip_class(tmp_path, 'w', compress_type, allowZip64=True, compresslevel=level) as archive:
+        ExcelWriter(wb, archive).save()
+    os.replace(tmp_path, output_file)
+    elapsed = time.perf_counter() - start
+    print(f"已保存：{output_file}（{os.path.getsize(output_file) / 1024:.1f} KB，压缩 {compression}，"
+          f"{elapsed:.2f} 秒）")
+    return file_digest(output_file) if deterministic else None
+
+
+def save_dataframe(df, output_file, compression='default'):
+    """DataFrame（表头与各行）写入只写工作簿后保存，代替 df.to_excel 以便选择压缩级别"""
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet(title='Sheet1')
+    for row in dataframe_to_rows(df, index=False, header=True):
+        sheet.append(row)
+    save_workbook(wb, output_file, compression=compression)
+
+
+def add_compression_argument(parser):
+    """为导出命令添加 --compression 选项"""
+    parser.add_argument('--compression', choices=COMPRESSION_LEVELS, default='default',
+                        help='xlsx 的 zip 压缩级别：store 不压缩最快，fast，default（默认），max 文件最小')
+
+
+def inputs_path(output_file):
+    return os.path.splitext(output_file)[0] + INPUTS_SUFFIX
+
+
+def input_digests(res_dir, paths):
+    """{相对 res_dir 的路径: sha256}；文件由多个线程并发计算（hashlib 计算大块数据时释放 GIL）"""
+    paths = sorted(set(paths))
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        digests = list(executor.map(file_digest, paths))
+    return {os.path.relpath(path, res_dir).replace(os.sep, '/'): digest for path, digest in zip(paths, digests)}
+
+
+def _manifest(inputs, options):
+    return {
+        'version': 1,
+        'openpyxl': openpyxl.__version__,
+        'options': options,
+        'inputs': inputs,
+    }
+
+
+def unchanged_outputs(output_file, inputs, options):
+    """输入清单与当前输入、选项一致且输出文件未被改动时返回 {输出文件: sha256}，否则返回 None"""
+    path = inputs_path(output_file)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    outputs = manifest.pop('outputs', None) or {}
+    if manifest != _manifest(inputs, options) or os.path.basename(output_file) not in outputs:
+        return None
+    folder = os.path.dirname(output_file)
+    for name, digest in outputs.items():
+        output_path = os.path.join(folder, name)
+        if not os.path.exists(output_path) or file_digest(output_path) != digest:
+            return None
+    return outputs
+
+
+def write_inputs_manifest(output_file, inputs, options, outputs):
+    """写入输入清单；outputs 为 {输出文件路径: sha256}，清单中记录相对 output_file 所在目录的路径"""
+    folder = os.path.dirname(output_file) or '.'
+    manifest = _manifest(inputs, options)
+    manifest['outputs'] = {os.path.relpath(path, folder).replace(os.sep, '/'): digest
+                           for path, digest in outputs.items()}
+    with open(inputs_path(output_file), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
@@ -13,6 +13,15 @@ from xml.etree import ElementTree
 import xlwt
 from bs4 import BeautifulSoup
 
+try:
+    from .processor import string_files
+    from .progress import NULL_PROGRESS, add_progress_options, progress_from_args
+    from .qualifiers import locale_qualifier
+except ImportError:
+    from processor import string_files
+    from progress import NULL_PROGRESS, add_progress_options, progress_from_args
+    from qualifiers import locale_qualifier
+
 
 def read_xml(path):
     """通过ElementTree获取
@@ -89,6 +98,9 @@ def read_xml3(path):
     keys = []
     values = []
     for string in strings:
+        # 不需要翻译的条目不导出
+        if string.get('translatable') == 'false':
+            continue
         key = string.get('name')
         # value = string.string 如果包含多个子标签， 结果返回None
         value = del_content_blank(string.get_text().strip())
@@ -98,17 +110,38 @@ def read_xml3(path):
     return keys, values
 
 
+def read_string_files(paths):
+    """依次读取同一语言的多个字符串文件（strings.xml、strings_onboarding.xml ...），同名条目以先出现的为准
+
+    :param paths:
+    :return: 合并后的 keys, values
+    """
+    keys = []
+    values = []
+    seen = set()
+    for path in paths:
+        file_keys, file_values = read_xml3(path)
+        for key, value in zip(file_keys, file_values):
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+                values.append(value)
+    return keys, values
+
+
 def del_content_blank(s):
     clean_str = re.sub(r'\n| {8}', ' ', str(s))
     return clean_str.replace('  ', ' ')
 
 
 def get_country_code(dir_name):
-    code = 'en'
-    dir_split = dir_name.split('values-')
-    if len(dir_split) > 1:
-        code = dir_split[1]
-    return code
+    # 默认 values 目录为 en，其余为规范的语言限定符（values-zh-rcn -> zh-rCN）
+    return locale_qualifier(dir_name) or 'en'
+
+
+def is_translation_dir(dir_name):
+    """values 或只含语言限定符的目录；values-night、values-v21、values-de-night 等跳过"""
+    return locale_qualifier(dir_name) is not None
 
 
 def get_dest_dir(target_dir, option):
@@ -126,158 +159,178 @@ def get_dest_dir(target_dir, option):
     return dest_dir
 
 
-def convert_to_multiple_files(file_dir, target_dir):
+def convert_to_multiple_files(file_dir, target_dir, progress=NULL_PROGRESS):
     dest_dir = get_dest_dir(target_dir, 3)
-    for _, dir_names, _ in os.walk(file_dir):
-        values_dirs = [di for di in dir_names if di.startswith("values")]
-        for dir_name in values_dirs:
-            country_code = get_country_code(dir_name)
-            xml_file = 'strings.xml'
-            xml_file_path = file_dir + '/' + dir_name + '/' + xml_file
-            if not os.path.exists(xml_file_path):
-                continue
-            file_name = xml_file.replace(".xml", "-" + country_code)
-            sheet_name = file_name
-            dest_file_path = dest_dir + "/" + file_name + ".xls"
-            if not os.path.exists(dest_file_path):
-                workbook = xlwt.Workbook(encoding='utf-8')
-                ws = workbook.add_sheet(sheet_name)
-                ws.write(0, 0, 'name')
-                ws.write(0, 1, country_code)
-                path = file_dir + '/' + dir_name + '/' + xml_file
-                (keys, values) = read_xml3(path)
-
-                print("Start Converting %s " % country_code)
-                print('Total: %s' % len(keys))
-
-                for x in range(len(keys)):
-                    key = keys[x]
-                    value = values[x]
-                    ws.write(x + 1, 0, key)
-                    ws.write(x + 1, 1, value)
-                workbook.save(dest_file_path)
-                print("Convert %s successfully! you can see xls file in %s" % (path, dest_dir))
-
-
-def convert_to_single_file_with_one_sheet(file_dir, target_dir):
-    dest_dir = get_dest_dir(target_dir, 1)
-    sheet_name = 'strings'
-    dest_file_path = dest_dir + "/" + "single_file_one_sheet.xls"
-    if not os.path.exists(dest_file_path):
-        workbook = xlwt.Workbook(encoding='utf-8')
-        ws = workbook.add_sheet(sheet_name)
-        ws.write(0, 0, 'name')
+    with progress.task('parse', unit='locales') as parse_task, progress.task('write', unit='rows') as write_task:
         for _, dir_names, _ in os.walk(file_dir):
-            values_dirs = [di for di in dir_names if di.startswith("values")]
-            index = 0
-            en_keys = []
-            values_dirs.sort()
+            values_dirs = [di for di in dir_names if is_translation_dir(di)]
             for dir_name in values_dirs:
+                country_code = get_country_code(dir_name)
                 xml_file = 'strings.xml'
-                xml_file_path = file_dir + '/' + dir_name + '/' + xml_file
-                if not os.path.exists(xml_file_path):
+                xml_dir = file_dir + '/' + dir_name
+                xml_paths = string_files(xml_dir)
+                if not xml_paths:
                     continue
-                country_code = get_country_code(dir_name)
-                ws.write(0, index + 1, country_code)
-                (keys, values) = read_xml3(xml_file_path)
+                file_name = xml_file.replace(".xml", "-" + country_code)
+                sheet_name = file_name
+                dest_file_path = dest_dir + "/" + file_name + ".xls"
+                if not os.path.exists(dest_file_path):
+                    workbook = xlwt.Workbook(encoding='utf-8')
+                    ws = workbook.add_sheet(sheet_name)
+                    ws.write(0, 0, 'name')
+                    ws.write(0, 1, country_code)
+                    (keys, values) = read_string_files(xml_paths)
+                    parse_task.advance(item=country_code)
 
-                print("Start Converting %s " % country_code)
-                print('Total: %s' % len(keys))
+                    print("Start Converting %s " % country_code)
+                    print('Total: %s' % len(keys))
 
-                if country_code == 'en':
-                    en_keys = keys
                     for x in range(len(keys)):
                         key = keys[x]
                         value = values[x]
                         ws.write(x + 1, 0, key)
                         ws.write(x + 1, 1, value)
-                else:
-                    for x in range(len(keys)):
-                        key = keys[x]
-                        for x2 in range(len(en_keys)):
-                            key2 = en_keys[x2]
-                            if key == key2:
-                                value = values[x]
-                                ws.write(x2 + 1, index + 1, value)
-                print("Convert %s successfully! you can see xls file in %s" % (xml_file_path, dest_dir))
-                index += 1
-        workbook.save(dest_file_path)
+                        write_task.advance()
+                    save_workbook(workbook, dest_file_path, progress)
+                    print("Convert %s successfully! you can see xls file in %s" % (xml_dir, dest_dir))
 
 
-def convert_to_single_file_with_multiple_sheets(file_dir, target_dir):
+def convert_to_single_file_with_one_sheet(file_dir, target_dir, progress=NULL_PROGRESS):
+    dest_dir = get_dest_dir(target_dir, 1)
+    sheet_name = 'strings'
+    dest_file_path = dest_dir + "/" + "single_file_one_sheet.xls"
+    with progress.task('parse', unit='locales') as parse_task, progress.task('write', unit='rows') as write_task:
+        if not os.path.exists(dest_file_path):
+            workbook = xlwt.Workbook(encoding='utf-8')
+            ws = workbook.add_sheet(sheet_name)
+            ws.write(0, 0, 'name')
+            for _, dir_names, _ in os.walk(file_dir):
+                values_dirs = [di for di in dir_names if is_translation_dir(di)]
+                index = 0
+                en_keys = []
+                values_dirs.sort()
+                for dir_name in values_dirs:
+                    xml_file = 'strings.xml'
+                    xml_dir = file_dir + '/' + dir_name
+                    xml_paths = string_files(xml_dir)
+                    if not xml_paths:
+                        continue
+                    country_code = get_country_code(dir_name)
+                    ws.write(0, index + 1, country_code)
+                    (keys, values) = read_string_files(xml_paths)
+                    parse_task.advance(item=country_code)
+
+                    print("Start Converting %s " % country_code)
+                    print('Total: %s' % len(keys))
+
+                    if country_code == 'en':
+                        en_keys = keys
+                        for x in range(len(keys)):
+                            key = keys[x]
+                            value = values[x]
+                            ws.write(x + 1, 0, key)
+                            ws.write(x + 1, 1, value)
+                            write_task.advance()
+                    else:
+                        for x in range(len(keys)):
+                            key = keys[x]
+                            for x2 in range(len(en_keys)):
+                                key2 = en_keys[x2]
+                                if key == key2:
+                                    value = values[x]
+                                    ws.write(x2 + 1, index + 1, value)
+                                    write_task.advance()
+                    print("Convert %s successfully! you can see xls file in %s" % (xml_dir, dest_dir))
+                    index += 1
+            save_workbook(workbook, dest_file_path, progress)
+
+
+def convert_to_single_file_with_multiple_sheets(file_dir, target_dir, progress=NULL_PROGRESS):
     dest_dir = get_dest_dir(target_dir, 2)
     dest_file_path = dest_dir + "/" + "single_file_multi_sheets.xls"
     workbook = xlwt.Workbook(encoding='utf-8')
-    for _, dirnames, _ in os.walk(file_dir):
-        values_dirs = [di for di in dirnames if di.startswith("values")]
-        for dirname in values_dirs:
-            xml_file = 'strings.xml'
-            xml_file_path = file_dir + '/' + dirname + '/' + xml_file
-            if not os.path.exists(xml_file_path):
-                continue
-            country_code = get_country_code(dirname)
-            sheet_name = xml_file.replace(".xml", "-" + country_code)
-            if not os.path.exists(dest_file_path):
-                ws = workbook.add_sheet(sheet_name)
-                ws.write(0, 0, 'name')
-                ws.write(0, 1, country_code)
-                path = file_dir + '/' + dirname + '/' + xml_file
-                (keys, values) = read_xml3(path)
-
-                print('Start Converting %s' % country_code)
-                print('Total: %s' % len(keys))
-
-                for x in range(len(keys)):
-                    key = keys[x]
-                    value = values[x]
-                    ws.write(x + 1, 0, key)
-                    ws.write(x + 1, 1, value)
-                print("Convert %s successfully! you can see xls file in %s" % (path, dest_dir))
-    workbook.save(dest_file_path)
-
-
-def convert_to_multiple_files_no_translate(file_dir, target_dir):
-    dest_dir = get_dest_dir(target_dir, 4)
-    for _, dir_names, _ in os.walk(file_dir):
-        values_dirs = [di for di in dir_names if di.startswith("values")]
-        values_dirs.sort()
-        en_keys = []
-        en_values = []
-        for dir_name in values_dirs:
-            country_code = get_country_code(dir_name)
-            xml_file = 'strings.xml'
-            xml_file_path = file_dir + '/' + dir_name + '/' + xml_file
-            if not os.path.exists(xml_file_path):
-                continue
-            path = file_dir + '/' + dir_name + '/' + xml_file
-            (keys, values) = read_xml3(path)
-            if country_code == 'en':
-                en_keys = keys
-                en_values = values
-            else:
-
-                print("Start converting %s" % country_code)
-                print('Translated Count: %s' % len(keys))
-
-                file_name = xml_file.replace(".xml", "_no_translate_to_" + country_code)
-                sheet_name = file_name
-                dest_file_path = dest_dir + "/" + file_name + ".xls"
+    with progress.task('parse', unit='locales') as parse_task, progress.task('write', unit='rows') as write_task:
+        for _, dirnames, _ in os.walk(file_dir):
+            values_dirs = [di for di in dirnames if is_translation_dir(di)]
+            for dirname in values_dirs:
+                xml_file = 'strings.xml'
+                xml_dir = file_dir + '/' + dirname
+                xml_paths = string_files(xml_dir)
+                if not xml_paths:
+                    continue
+                country_code = get_country_code(dirname)
+                sheet_name = xml_file.replace(".xml", "-" + country_code)
                 if not os.path.exists(dest_file_path):
-                    workbook = xlwt.Workbook(encoding='utf-8')
                     ws = workbook.add_sheet(sheet_name)
                     ws.write(0, 0, 'name')
-                    ws.write(0, 1, 'en')
-                    index = 0
-                    for x in range(len(en_keys)):
-                        key = en_keys[x]
-                        if key not in keys:
-                            value = en_values[x]
-                            ws.write(index + 1, 0, key)
-                            ws.write(index + 1, 1, value)
-                            index += 1
-                    workbook.save(dest_file_path)
-                    print("Untranslated Count: %s" % index)
-                    print("Convert %s successfully! you can see xls file in %s" % (path, dest_dir))
+                    ws.write(0, 1, country_code)
+                    (keys, values) = read_string_files(xml_paths)
+                    parse_task.advance(item=country_code)
+
+                    print('Start Converting %s' % country_code)
+                    print('Total: %s' % len(keys))
+
+                    for x in range(len(keys)):
+                        key = keys[x]
+                        value = values[x]
+                        ws.write(x + 1, 0, key)
+                        ws.write(x + 1, 1, value)
+                        write_task.advance()
+                    print("Convert %s successfully! you can see xls file in %s" % (xml_dir, dest_dir))
+        save_workbook(workbook, dest_file_path, progress)
+
+
+def convert_to_multiple_files_no_translate(file_dir, target_dir, progress=NULL_PROGRESS):
+    dest_dir = get_dest_dir(target_dir, 4)
+    with progress.task('parse', unit='locales') as parse_task, progress.task('write', unit='rows') as write_task:
+        for _, dir_names, _ in os.walk(file_dir):
+            values_dirs = [di for di in dir_names if is_translation_dir(di)]
+            values_dirs.sort()
+            en_keys = []
+            en_values = []
+            for dir_name in values_dirs:
+                country_code = get_country_code(dir_name)
+                xml_file = 'strings.xml'
+                xml_dir = file_dir + '/' + dir_name
+                xml_paths = string_files(xml_dir)
+                if not xml_paths:
+                    continue
+                (keys, values) = read_string_files(xml_paths)
+                parse_task.advance(item=country_code)
+                if country_code == 'en':
+                    en_keys = keys
+                    en_values = values
+                else:
+
+                    print("Start converting %s" % country_code)
+                    print('Translated Count: %s' % len(keys))
+
+                    file_name = xml_file.replace(".xml", "_no_translate_to_" + country_code)
+                    sheet_name = file_name
+                    dest_file_path = dest_dir + "/" + file_name + ".xls"
+                    if not os.path.exists(dest_file_path):
+                        workbook = xlwt.Workbook(encoding='utf-8')
+                        ws = workbook.add_sheet(sheet_name)
+                        ws.write(0, 0, 'name')
+                        ws.write(0, 1, 'en')
+                        index = 0
+                        for x in range(len(en_keys)):
+                            key = en_keys[x]
+                            if key not in keys:
+                                value = en_values[x]
+                                ws.write(index + 1, 0, key)
+                                ws.write(index + 1, 1, value)
+                                write_task.advance()
+                                index += 1
+                        save_workbook(workbook, dest_file_path, progress)
+                        print("Untranslated Count: %s" % index)
+                        print("Convert %s successfully! you can see xls file in %s" % (xml_dir, dest_dir))
+
+
+def save_workbook(workbook, path, progress=NULL_PROGRESS):
+    with progress.task('save', unit='bytes') as task:
+        workbook.save(path)
+        task.advance(os.path.getsize(path), item=path)
 
 
 def add_parser():
@@ -303,6 +356,8 @@ def add_parser():
                            "Default is single file with one sheet(-e 1).",
                       metavar="excelStorageForm")
 
+    add_progress_options(parser)
+
     (options, args) = parser.parse_args()
     # print("options: %s, args: %s" % (options, args))
 
@@ -326,21 +381,23 @@ def start_convert(options):
 
     print("------------------------------Start converting------------------------------")
 
+    progress = progress_from_args(options)
     if options.excelStorageForm == 1:
-        convert_to_single_file_with_one_sheet(file_dir, target_dir)
+        convert_to_single_file_with_one_sheet(file_dir, target_dir, progress)
     elif options.excelStorageForm == 2:
-        convert_to_single_file_with_multiple_sheets(file_dir, target_dir)
+        convert_to_single_file_with_multiple_sheets(file_dir, target_dir, progress)
     elif options.excelStorageForm == 3:
-        convert_to_multiple_files(file_dir, target_dir)
+        convert_to_multiple_files(file_dir, target_dir, progress)
     elif options.excelStorageForm == 4:
-        convert_to_multiple_files_no_translate(file_dir, target_dir)
+        convert_to_multiple_files_no_translate(file_dir, target_dir, progress)
     elif options.excelStorageForm == 5:
-        convert_to_single_file_with_one_sheet(file_dir, target_dir)
-        convert_to_single_file_with_multiple_sheets(file_dir, target_dir)
-        convert_to_multiple_files(file_dir, target_dir)
-        convert_to_multiple_files_no_translate(file_dir, target_dir)
+        convert_to_single_file_with_one_sheet(file_dir, target_dir, progress)
+        convert_to_single_file_with_multiple_sheets(file_dir, target_dir, progress)
+        convert_to_multiple_files(file_dir, target_dir, progress)
+        convert_to_multiple_files_no_translate(file_dir, target_dir, progress)
     else:
         Log().error('Invalid value %s , -e only for values 1, 2, 3, 4, 5' % options.excelStorageForm)
+    progress.close()
 
 
 def main():
@@ -352,4 +409,5 @@ def main():
     # convert_to_multiple_files_no_translate('/home/shewenbiao/Android/Workspace/CompanyProject/CleanMaster/Cleaner/app/src/main/res', os.getcwd())
 
 
-main()
+if __name__ == '__main__':
+    main()